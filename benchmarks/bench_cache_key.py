@@ -0,0 +1,41 @@
+"""
+Cache hit path cost with the generic `inspect` based cache key and with the precompiled one.
+
+    python -m benchmarks.bench_cache_key
+"""
+
+import inspect
+import timeit
+
+from caching.bucket import CacheBucket
+from caching.cache import cache
+
+NUMBER = 200_000
+
+
+def _per_call_ns(statement, number: int = NUMBER) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e9
+
+
+def add(a, b, c=3):
+    return a + b + c
+
+
+def main():
+    signature = inspect.signature(add)
+    make_cache_key = CacheBucket.compile_cache_key_function(signature, None, ())
+
+    cached_add = cache(ttl=3600)(add)
+    cached_add(1, 2)
+
+    generic = _per_call_ns(lambda: CacheBucket.create_cache_key(signature, None, (), (1, 2), {}))
+    compiled = _per_call_ns(lambda: make_cache_key((1, 2), {}))
+    hit = _per_call_ns(lambda: cached_add(1, 2))
+
+    print(f"create_cache_key (generic):  {generic:8.0f} ns/call")
+    print(f"create_cache_key (compiled): {compiled:8.0f} ns/call  ({generic / compiled:.1f}x)")
+    print(f"cached hit path:             {hit:8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
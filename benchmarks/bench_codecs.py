@@ -0,0 +1,56 @@
+"""
+Encode/decode throughput and payload size of the codecs for typical cached results.
+
+    python -m benchmarks.bench_codecs
+"""
+
+import pickle
+import timeit
+
+from caching.codecs import Codec, CompressedCodec, MsgpackCodec, PickleCodec, payload_size
+
+RESULTS = {
+    "small dict": {"id": 1, "name": "BTC-USD", "price": 65000.5, "active": True},
+    "list of 1k dicts": [{"id": i, "name": f"market-{i}", "price": i * 1.5} for i in range(1000)],
+    "1MB bytes": b"\x01\x02\x03\x04" * 256 * 1024,
+    "1MB bytearray in dict": {"data": bytearray(b"\x01\x02\x03\x04" * 256 * 1024)},
+    "1MB PickleBuffer in dict": {"data": pickle.PickleBuffer(bytearray(b"\x01\x02\x03\x04" * 256 * 1024))},
+}
+
+
+def _codecs() -> dict[str, Codec]:
+    codecs: dict[str, Codec] = {"pickle": PickleCodec(), "zlib(pickle)": CompressedCodec(PickleCodec())}
+    try:
+        codecs["msgpack"] = MsgpackCodec()
+        codecs["zlib(msgpack)"] = CompressedCodec(MsgpackCodec())
+    except Exception:
+        pass
+    return codecs
+
+
+def _join(chunks) -> bytes:
+    # What a backend hands back to decode: the payload as one buffer
+    return b"".join(chunks)
+
+
+def main():
+    print(f"{'result':<28}{'codec':<16}{'size':>12}{'encode MB/s':>14}{'decode MB/s':>14}")
+    for result_name, result in RESULTS.items():
+        raw_size = payload_size(PickleCodec().encode(result))
+        for codec_name, codec in _codecs().items():
+            try:
+                payload = _join(codec.encode(result))
+            except Exception:
+                continue  # msgpack can't serialize PickleBuffer objects
+
+            number = max(1, 2_000_000 // raw_size)
+            encode = min(timeit.repeat(lambda: codec.encode(result), number=number, repeat=3)) / number
+            decode = min(timeit.repeat(lambda: codec.decode(payload), number=number, repeat=3)) / number
+            print(
+                f"{result_name:<28}{codec_name:<16}{len(payload):>12}"
+                f"{raw_size / encode / 1e6:>14.0f}{raw_size / decode / 1e6:>14.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Microbenchmarks of the decorator hot paths, with machine-readable results to track regressions.
+
+    python -m benchmarks.suite                              # print a table
+    python -m benchmarks.suite --json results.json          # also write the results
+    python -m benchmarks.suite --compare baseline.json      # fail when a benchmark is more than 10% slower
+    python -m benchmarks.suite --filter hit                 # only benchmarks whose name contains "hit"
+
+Timings are the best of `--repeat` runs, in ns per operation, lower is better.
+Memory figures are bytes per cached entry, measured with tracemalloc.
+"""
+
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import timeit
+import tracemalloc
+from datetime import datetime, timezone
+from inspect import signature
+from typing import Any, Callable
+
+from caching.bucket import CacheBucket
+from caching.cache import cache
+from caching.sizing import estimate_size
+from caching.utils.functions import get_function_id
+
+BENCHMARKS: dict[str, Callable[["Settings"], dict[str, float]]] = {}
+
+
+class Settings:
+    def __init__(self, repeat: int, scale: float):
+        self.repeat = repeat
+        self.scale = scale
+
+    def number(self, base: int) -> int:
+        return max(1, int(base * self.scale))
+
+
+def benchmark(name: str):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+
+def _timings(runs: list[float], number: int) -> dict[str, float]:
+    per_op = [run / number * 1e9 for run in runs]
+    return {"ns_per_op": min(per_op), "median_ns_per_op": statistics.median(per_op)}
+
+
+def _time_sync(statement: Callable[[], Any], settings: Settings, number: int) -> dict[str, float]:
+    return _timings(timeit.repeat(statement, number=number, repeat=settings.repeat), number)
+
+
+def _time_async(statement: Callable[[], Any], settings: Settings, number: int) -> dict[str, float]:
+    async def run() -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            await statement()
+        return time.perf_counter() - started
+
+    async def runs() -> list[float]:
+        return [await run() for _ in range(settings.repeat)]
+
+    return _timings(asyncio.run(runs()), number)
+
+
+def _add(a, b, c=3):
+    return a + b + c
+
+
+# Hit and miss paths
+
+
+@benchmark("hit_sync")
+def hit_sync(settings: Settings) -> dict[str, float]:
+    cached = cache(ttl=3600)(_add)
+    cached(1, 2)
+    return _time_sync(lambda: cached(1, 2), settings, settings.number(200_000))
+
+
+@benchmark("hit_async")
+def hit_async(settings: Settings) -> dict[str, float]:
+    @cache(ttl=3600)
+    async def cached(a, b, c=3):
+        return a + b + c
+
+    asyncio.run(cached(1, 2))
+    return _time_async(lambda: cached(1, 2), settings, settings.number(200_000))
+
+
+@benchmark("miss_sync")
+def miss_sync(settings: Settings) -> dict[str, float]:
+    cached = cache(ttl=3600)(_add)
+    keys = itertools.count()
+    try:
+        return _time_sync(lambda: cached(next(keys), 2), settings, settings.number(50_000))
+    finally:
+        CacheBucket.clear()
+
+
+@benchmark("miss_async")
+def miss_async(settings: Settings) -> dict[str, float]:
+    @cache(ttl=3600)
+    async def cached(a, b, c=3):
+        return a + b + c
+
+    keys = itertools.count()
+    try:
+        return _time_async(lambda: cached(next(keys), 2), settings, settings.number(50_000))
+    finally:
+        CacheBucket.clear()
+
+
+@benchmark("hit_never_die_10k_keys")
+def hit_never_die(settings: Settings) -> dict[str, float]:
+    """Hit path of a never_die function, including its registration check, with 10k registered keys"""
+    cached = cache(ttl=3600, never_die=True)(_add)
+    for i in range(10_000):
+        cached(i, 2)
+    return _time_sync(lambda: cached(1, 2), settings, settings.number(200_000))
+
+
+@benchmark("bulk_loop_100_hits")
+def hit_loop(settings: Settings) -> dict[str, float]:
+    """100 hits through single calls, the baseline of bulk_map_100_hits"""
+    cached = cache(ttl=3600)(_add)
+    keys = list(range(100))
+    cached.map(keys, keys)
+    return _time_sync(lambda: [cached(key, key) for key in keys], settings, settings.number(2_000))
+
+
+@benchmark("bulk_map_100_hits")
+def map_hits(settings: Settings) -> dict[str, float]:
+    """100 hits through one bulk call"""
+    cached = cache(ttl=3600)(_add)
+    keys = list(range(100))
+    cached.map(keys, keys)
+    return _time_sync(lambda: cached.map(keys, keys), settings, settings.number(2_000))
+
+
+# Cache keys
+
+
+def _cache_key_benchmark(function, args: tuple, kwargs: dict, **options) -> Callable[[Settings], dict[str, float]]:
+    def run(settings: Settings) -> dict[str, float]:
+        make_cache_key = CacheBucket.compile_cache_key_function(
+            signature(function), options.get("cache_key_func"), options.get("ignore_fields", ())
+        )
+        return _time_sync(lambda: make_cache_key(args, kwargs), settings, settings.number(200_000))
+
+    return run
+
+
+def _varargs(*args):
+    return args
+
+
+def _varkwargs(a, **kwargs):
+    return kwargs
+
+
+BENCHMARKS["cache_key_positional"] = _cache_key_benchmark(_add, (1, 2), {})
+BENCHMARKS["cache_key_keywords"] = _cache_key_benchmark(_add, (1,), {"b": 2})
+BENCHMARKS["cache_key_var_args"] = _cache_key_benchmark(_varargs, (1, 2, 3), {})
+BENCHMARKS["cache_key_var_kwargs"] = _cache_key_benchmark(_varkwargs, (1,), {"b": 2, "c": 3})
+BENCHMARKS["cache_key_ignore_fields"] = _cache_key_benchmark(_add, (1, 2), {}, ignore_fields=("c",))
+BENCHMARKS["cache_key_func"] = _cache_key_benchmark(_add, (1, 2), {}, cache_key_func=lambda args, kwargs: args)
+BENCHMARKS["cache_key_unhashable"] = _cache_key_benchmark(_add, ([1, 2], {"b": (3, 4)}), {})
+
+
+@benchmark("cache_key_buffer_1mb")
+def cache_key_buffer(settings: Settings) -> dict[str, float]:
+    """Key of a 1MB buffer argument, hashed from its memory without copying"""
+    make_cache_key = CacheBucket.compile_cache_key_function(signature(_varargs), None, ())
+    args = (bytearray(1 << 20),)
+    timings = _time_sync(lambda: make_cache_key(args, {}), settings, settings.number(500))
+    return {**timings, "mb_per_s": (1 << 20) / timings["ns_per_op"] * 1e3}
+
+
+# Contention, throughput of every caller together expressed per operation
+
+
+def _thread_contention(settings: Settings, threads: int, keys: int) -> dict[str, float]:
+    cached = cache(ttl=3600)(_add)
+    for key in range(keys):
+        cached(key, 2)
+
+    number = settings.number(20_000)
+    runs = []
+    for _ in range(settings.repeat):
+        barrier = threading.Barrier(threads + 1)
+
+        def work(offset: int):
+            barrier.wait()
+            for i in range(number):
+                cached((offset + i) % keys, 2)
+
+        workers = [threading.Thread(target=work, args=(offset,)) for offset in range(threads)]
+        for worker in workers:
+            worker.start()
+        started = time.perf_counter()
+        barrier.wait()
+        for worker in workers:
+            worker.join()
+        runs.append(time.perf_counter() - started)
+    return _timings(runs, number * threads)
+
+
+def _task_contention(settings: Settings, tasks: int, keys: int) -> dict[str, float]:
+    @cache(ttl=3600)
+    async def cached(a, b):
+        await asyncio.sleep(0)  # every miss yields, so concurrent tasks actually share flights
+        return a + b
+
+    number = settings.number(5_000)
+
+    async def work(offset: int):
+        for i in range(number):
+            await cached((offset + i) % keys, 2)
+
+    async def run() -> float:
+        CacheBucket.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(work(offset) for offset in range(tasks)))
+        return time.perf_counter() - started
+
+    async def runs() -> list[float]:
+        return [await run() for _ in range(settings.repeat)]
+
+    return _timings(asyncio.run(runs()), number * tasks)
+
+
+def _store_run(threads: int, keys: list[str], number: int) -> float:
+    """Seconds for `threads` threads to each write then read `number` keys of their own, in one function"""
+    barrier = threading.Barrier(threads + 1)
+
+    def work(offset: int):
+        barrier.wait()
+        for i in range(number):
+            cache_key = keys[(offset * number + i) % len(keys)]
+            CacheBucket.set("bench.store", cache_key, i, 3600)
+            CacheBucket.get("bench.store", cache_key, False)
+
+    workers = [threading.Thread(target=work, args=(offset,)) for offset in range(threads)]
+    for worker in workers:
+        worker.start()
+    started = time.perf_counter()
+    barrier.wait()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started
+
+
+@benchmark("store_scaling_8_threads")
+def store_scaling(settings: Settings) -> dict[str, float]:
+    """
+    Writes and reads of the process local store from 8 threads, `speedup` is their throughput over one thread's.
+    It only goes past 1 on free-threaded builds with cores to spare, the GIL runs one thread at a time.
+    """
+    threads = 8
+    number = settings.number(10_000)
+    keys = [CacheBucket.compile_cache_key_function(signature(_add), None, ())((i, 2), {}) for i in range(100_000)]
+    single = min(_store_run(1, keys, number) for _ in range(settings.repeat))
+    runs = [_store_run(threads, keys, number) for _ in range(settings.repeat)]
+    CacheBucket.clear()
+    timings = _timings(runs, number * threads)
+    return {**timings, "speedup": single / number * 1e9 / timings["ns_per_op"]}
+
+
+BENCHMARKS["contention_8_threads_1_key"] = lambda settings: _thread_contention(settings, 8, 1)
+BENCHMARKS["contention_8_threads_1k_keys"] = lambda settings: _thread_contention(settings, 8, 1000)
+BENCHMARKS["contention_100_tasks_1_key"] = lambda settings: _task_contention(settings, 100, 1)
+BENCHMARKS["contention_100_tasks_1k_keys"] = lambda settings: _task_contention(settings, 100, 1000)
+
+
+# Memory
+
+
+@benchmark("memory_per_entry")
+def memory_per_entry(settings: Settings) -> dict[str, float]:
+    """Bucket overhead of an entry caching a small int, excluding the cache key strings themselves"""
+    entries = settings.number(100_000)
+    function_id = get_function_id(_add)
+    keys = [CacheBucket.compile_cache_key_function(signature(_add), None, ())((i, 2), {}) for i in range(entries)]
+
+    CacheBucket.clear()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for key in keys:
+        CacheBucket.set(function_id, key, 1, 3600)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    CacheBucket.clear()
+    return {"bytes_per_entry": (after - before) / entries}
+
+
+@benchmark("memory_per_entry_budgeted")
+def memory_per_entry_budgeted(settings: Settings) -> dict[str, float]:
+    """`memory_per_entry` with a global memory budget tracking the size of every entry"""
+    CacheBucket.set_memory_budget(1 << 40)
+    try:
+        return memory_per_entry(settings)
+    finally:
+        CacheBucket.set_memory_budget(None)
+
+
+@benchmark("estimate_size_100k_items")
+def estimate_size_large(settings: Settings) -> dict[str, float]:
+    """Default sizer on a list of 100k dicts, sampled rather than walked"""
+    result = [{"id": i, "name": f"user {i}", "tags": ["a", "b"]} for i in range(100_000)]
+    return _time_sync(lambda: estimate_size(result), settings, settings.number(20_000))
+
+
+def _metadata(settings: Settings) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "gil": getattr(sys, "_is_gil_enabled", lambda: True)(),
+        "machine": platform.machine(),
+        "repeat": settings.repeat,
+        "scale": settings.scale,
+    }
+
+
+def _compare(
+    results: dict[str, dict[str, float]], settings: Settings, baseline_path: str, threshold: float
+) -> list[str]:
+    with open(baseline_path) as file:
+        data = json.load(file)
+    baseline = data["results"]
+    if data["metadata"].get("scale") != settings.scale:
+        # Iteration counts change how many calls hit a warm cache in the contention benchmarks
+        print(f"Warning: the baseline was recorded with --scale {data['metadata'].get('scale')}")
+
+    regressions = []
+    for name, metrics in results.items():
+        for metric in ("ns_per_op", "bytes_per_entry"):
+            if metric not in metrics or metric not in baseline.get(name, {}):
+                continue
+            before, after = baseline[name][metric], metrics[metric]
+            change = after / before - 1 if before else 0.0
+            print(f"{name:<32}{metric:<18}{before:>12.1f}{after:>12.1f}{change:>+10.1%}")
+            if change > threshold:
+                regressions.append(name)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown failing --compare, 0.1 for 10%%")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier of the iteration counts")
+    args = parser.parse_args(argv)
+
+    settings = Settings(args.repeat, args.scale)
+    results = {}
+    for name, run in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        results[name] = run(settings)
+        print(f"{name:<32}" + "".join(f"{metric}={value:.1f}  " for metric, value in results[name].items()))
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"metadata": _metadata(settings), "results": results}, file, indent=2)
+
+    if args.compare:
+        if regressions := _compare(results, settings, args.compare, args.threshold):
+            print(f"Regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,60 @@
-from .cache import cache
+from .backends import CacheBackend, RedisBackend, SharedMemoryBackend
+from .cache import (
+    cache,
+    cache_stats,
+    eviction_stats,
+    invalidate_tags,
+    load_snapshot,
+    memory_stats,
+    save_snapshot,
+    set_clock_resolution,
+    set_default_backend,
+    set_max_entries,
+    set_memory_budget,
+    set_never_die_concurrency,
+    set_snapshots,
+    set_stats_exporter,
+    awarm_all,
+    warm_all,
+)
+from .codecs import Codec, CompressedCodec, MsgpackCodec, PickleCodec
+from .eviction import EvictionPolicy, EvictionStats, MemoryStats
+from .features.warming import Warmup
+from .metrics import CacheStats, HistogramSnapshot, set_metrics_enabled
+from .sizing import estimate_size
 from .types import CacheKwargs
 
-__all__ = ["cache", "CacheKwargs"]
+__all__ = [
+    "cache",
+    "CacheKwargs",
+    "CacheBackend",
+    "Codec",
+    "CompressedCodec",
+    "MsgpackCodec",
+    "PickleCodec",
+    "RedisBackend",
+    "SharedMemoryBackend",
+    "EvictionPolicy",
+    "EvictionStats",
+    "MemoryStats",
+    "CacheStats",
+    "HistogramSnapshot",
+    "cache_stats",
+    "eviction_stats",
+    "invalidate_tags",
+    "load_snapshot",
+    "memory_stats",
+    "estimate_size",
+    "save_snapshot",
+    "set_clock_resolution",
+    "set_default_backend",
+    "set_max_entries",
+    "set_memory_budget",
+    "set_metrics_enabled",
+    "set_never_die_concurrency",
+    "set_snapshots",
+    "set_stats_exporter",
+    "awarm_all",
+    "warm_all",
+    "Warmup",
+]
@@ -1,10 +1,12 @@
 import functools
 import inspect
-from typing import Any, cast
+import time
+from typing import Any, Callable, Iterable, cast
 
-from caching._async.lock import _ASYNC_LOCKS
+from caching._async.flight import _ASYNC_FLIGHTS
 from caching.bucket import CacheBucket
-from caching.types import CacheKeyFunction, F, Number
+from caching.metrics import CacheStats, function_metrics
+from caching.types import CacheKeyFunction, F, Number, Tags
 from caching.utils.functions import get_function_id
 
 
@@ -14,29 +16,212 @@ def async_decorator(
     never_die: bool = False,
     cache_key_func: CacheKeyFunction | None = None,
     ignore_fields: tuple[str, ...] = (),
+    stale_ttl: Number | None = None,
+    never_die_priority: int = 0,
+    never_die_retire_after: int | None = None,
+    never_die_adaptive: bool = False,
+    early_recompute: float | None = None,
+    batch_func: Callable[..., Any] | None = None,
+    max_batch_size: int | None = None,
+    batch_window_ms: Number | None = None,
+    tags: Tags | None = None,
+    cache_exceptions: tuple[type[BaseException], ...] = (),
+    error_ttl: Number = 5,
 ) -> F:
-    from caching.features.never_die import register_never_die_function
+    from caching.features.batching import AsyncBatcher
+    from caching.features.bulk import DEFAULT_CONCURRENCY, gather_limited
+    from caching.features.early_recompute import EarlyRecompute
+    from caching.features.negative_caching import CachedError, unwrap
+    from caching.features.never_die import (
+        register_never_die_function,
+        unregister_never_die_function,
+        unregister_never_die_keys,
+    )
+    from caching.features.stale_while_revalidate import revalidate_in_task
+    from caching.features.warming import Warmup, warm_async
 
     function_id = get_function_id(function)
     function_signature = inspect.signature(function)  # to map args→param names
+    make_cache_key = CacheBucket.compile_cache_key_function(function_signature, cache_key_func, ignore_fields)
+    call_tags = CacheBucket.compile_tags_function(tags)
+    serve_stale = bool(stale_ttl)
+    cache_errors = bool(cache_exceptions)
+    early = EarlyRecompute(early_recompute) if early_recompute else None
+    metrics = function_metrics(function_id)
+    # Misses go through the batcher when the function has a bulk counterpart
+    window = None if batch_window_ms is None else batch_window_ms / 1000
+    load = function if batch_func is None else AsyncBatcher(batch_func, function_signature, max_batch_size, window).load
+
+    async def compute(args: tuple, kwargs: dict, cache_key: str, skip_cache: bool) -> Any:
+        # A flight for this key may have landed between the caller's lookup and this one taking off
+        if cache_entry := await CacheBucket.aget(function_id, cache_key, skip_cache):
+            return unwrap(cache_entry.result)
+
+        entry_tags = call_tags(args, kwargs) if call_tags is not None else ()
+        try:
+            if early is None and not metrics.enabled:
+                result = await load(*args, **kwargs)
+            else:
+                started = time.perf_counter()
+                result = await load(*args, **kwargs)
+                duration = time.perf_counter() - started
+                if early is not None:
+                    early.record(duration)
+                if metrics.enabled:
+                    metrics.compute_time.record(duration)
+        except cache_exceptions as exception:
+            # Callers arriving until it expires get the exception too, instead of calling again
+            CacheBucket.set_error(function_id, cache_key, CachedError(exception), error_ttl, entry_tags)
+            raise
+        await CacheBucket.aset(function_id, cache_key, result, None if never_die else ttl, entry_tags)
+        return result
 
     @functools.wraps(function)
     async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
         skip_cache = kwargs.pop("skip_cache", False)
-        cache_key = CacheBucket.create_cache_key(function_signature, cache_key_func, ignore_fields, args, kwargs)
+        cache_key = make_cache_key(args, kwargs)
 
         if never_die:
-            register_never_die_function(function, ttl, args, kwargs, cache_key_func, ignore_fields)
-
-        if cache_entry := CacheBucket.get(function_id, cache_key, skip_cache):
-            return cache_entry.result
+            register_never_die_function(
+                function_id,
+                cache_key,
+                function,
+                ttl,
+                args,
+                kwargs,
+                never_die_priority,
+                never_die_retire_after,
+                never_die_adaptive,
+            )
 
-        async with _ASYNC_LOCKS[function_id][cache_key]:
-            if cache_entry := CacheBucket.get(function_id, cache_key, skip_cache):
+        # Awaiting is only worth its overhead when the entry lives in a backend
+        if CacheBucket.get_backend(function_id) is None:
+            cache_entry = CacheBucket.get(function_id, cache_key, skip_cache, serve_stale)
+        else:
+            cache_entry = await CacheBucket.aget(function_id, cache_key, skip_cache, serve_stale)
+        if cache_entry:
+            if serve_stale and cache_entry.is_expired():
+                if metrics.enabled:
+                    metrics.stale_hits += 1
+                refresh = functools.partial(compute, args, kwargs, cache_key, False)
+                revalidate_in_task(function_id, cache_key, refresh)
                 return cache_entry.result
+            if early is None or not early.should_recompute(cache_entry):
+                if metrics.enabled:
+                    metrics.hits += 1
+                if cache_errors and type(cache_entry.result) is CachedError:
+                    cache_entry.result.reraise()
+                return cache_entry.result
+            # Recomputed ahead of its expiry, like a skip_cache call
+            skip_cache = True
+            if metrics.enabled:
+                metrics.early_recomputes += 1
+
+        if metrics.enabled:
+            metrics.misses += 1
+
+        return await _ASYNC_FLIGHTS.run(
+            function_id, cache_key, functools.partial(compute, args, kwargs, cache_key, skip_cache), fresh=skip_cache
+        )
+
+    async def get_many(calls: Iterable[tuple[tuple, dict]], max_concurrency: int = DEFAULT_CONCURRENCY) -> list[Any]:
+        """
+        Results of many `(args, kwargs)` calls in input order. Hits are looked up in one pass, misses are computed
+        concurrently, at most `max_concurrency` at once, each through its key's flight like single calls.
+        """
+        calls = [(tuple(args), dict(kwargs)) for args, kwargs in calls]
+        cache_keys = [make_cache_key(args, kwargs) for args, kwargs in calls]
+
+        if never_die:
+            for (args, kwargs), cache_key in zip(calls, cache_keys):
+                register_never_die_function(
+                    function_id,
+                    cache_key,
+                    function,
+                    ttl,
+                    args,
+                    kwargs,
+                    never_die_priority,
+                    never_die_retire_after,
+                    never_die_adaptive,
+                )
+
+        results: list[Any] = [None] * len(calls)
+        # Positions waiting on each missing key, a key repeated within the batch is computed once
+        missing: dict[str, list[int]] = {}
+        computes = []
+        for index, cache_entry in enumerate(await CacheBucket.aget_many(function_id, cache_keys, serve_stale)):
+            args, kwargs = calls[index]
+            cache_key = cache_keys[index]
+            skip_cache = False
+            if cache_entry:
+                if serve_stale and cache_entry.is_expired():
+                    if metrics.enabled:
+                        metrics.stale_hits += 1
+                    revalidate_in_task(
+                        function_id, cache_key, functools.partial(compute, args, kwargs, cache_key, False)
+                    )
+                    results[index] = cache_entry.result
+                    continue
+                if early is None or not early.should_recompute(cache_entry):
+                    if metrics.enabled:
+                        metrics.hits += 1
+                    results[index] = unwrap(cache_entry.result)
+                    continue
+                skip_cache = True
+                if metrics.enabled:
+                    metrics.early_recomputes += 1
+
+            if metrics.enabled:
+                metrics.misses += 1
+            if (waiting := missing.get(cache_key)) is not None:
+                waiting.append(index)
+                continue
+            missing[cache_key] = [index]
+            refresh = functools.partial(compute, args, kwargs, cache_key, skip_cache)
+            computes.append(functools.partial(_ASYNC_FLIGHTS.run, function_id, cache_key, refresh, fresh=skip_cache))
+
+        for waiting, result in zip(missing.values(), await gather_limited(computes, max_concurrency)):
+            for index in waiting:
+                results[index] = result
+        return results
+
+    async def map_(*iterables: Iterable[Any], max_concurrency: int = DEFAULT_CONCURRENCY) -> list[Any]:
+        """Like the builtin `map` over positional arguments, with the lookups and misses of `get_many`"""
+        return await get_many([(args, {}) for args in zip(*iterables)], max_concurrency)
+
+    async def invalidate(*args: Any, **kwargs: Any) -> None:
+        """Remove the cached entry of a call, its next call computes it again"""
+        cache_key = make_cache_key(args, kwargs)
+        if never_die:
+            # Unregistered first, so a refresh can't bring the entry back
+            unregister_never_die_keys([(function_id, cache_key)])
+        await CacheBucket.adelete(function_id, cache_key)
+
+    async def cache_clear() -> None:
+        """Remove every cached entry of the function, other functions keep theirs"""
+        if never_die:
+            unregister_never_die_function(function_id)
+        await CacheBucket.adelete_function(function_id)
+
+    async def warm(
+        calls: Iterable[Any], concurrency: int = DEFAULT_CONCURRENCY, warmup: Warmup | None = None
+    ) -> Warmup:
+        """
+        Cache the given calls, each a tuple of positional arguments or a single argument, at most `concurrency`
+        at once, registering never_die ones. Progress and failures are reported on the returned `Warmup`,
+        pass one in to poll it while warming runs in a task.
+        """
+        return await warm_async({async_wrapper: calls}, concurrency, warmup)
 
-            result = await function(*args, **kwargs)
-            CacheBucket.set(function_id, cache_key, result, None if never_die else ttl)
-            return result
+    def cache_stats() -> CacheStats:
+        """Hits, misses, compute and wait times, evictions and refresh failures of the function"""
+        return CacheBucket.cache_stats([function_id])[function_id]
 
+    async_wrapper.cache_stats = cache_stats  # type: ignore[attr-defined]
+    async_wrapper.get_many = get_many  # type: ignore[attr-defined]
+    async_wrapper.map = map_  # type: ignore[attr-defined]
+    async_wrapper.invalidate = invalidate  # type: ignore[attr-defined]
+    async_wrapper.cache_clear = cache_clear  # type: ignore[attr-defined]
+    async_wrapper.warm = warm  # type: ignore[attr-defined]
     return cast(F, async_wrapper)
@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from caching.metrics import record_wait
+
+
+class _Flight:
+    __slots__ = ("future", "fresh")
+
+    def __init__(self, future: asyncio.Future, fresh: bool):
+        self.future = future
+        self.fresh = fresh
+
+
+class AsyncSingleFlight:
+    """
+    Shares one in-flight computation per (function_id, cache_key) between every concurrent task of an event loop.
+
+    The first task leads the flight and publishes its result, or exception, on a shared `asyncio.Future`
+    that wakes every waiter in one pass. Flights are dropped as soon as they land, so memory stays flat.
+    """
+
+    def __init__(self):
+        # Keyed by loop as well, a future can only be awaited from the loop it belongs to
+        self._flights: dict[tuple[asyncio.AbstractEventLoop, str, str], _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(
+        self,
+        function_id: str,
+        cache_key: str,
+        compute: Callable[[], Awaitable[Any]],
+        fresh: bool = False,
+    ) -> Any:
+        """
+        Run `compute` unless a flight for the key is already running, in which case its outcome is shared.
+        `fresh` callers (skip_cache) don't accept a flight that may serve a cached value, they wait for it to land
+        and share the next fresh one instead.
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, function_id, cache_key)
+
+        # No awaits between the lookup and the registration, so no lock is needed within a loop
+        while (flight := self._flights.get(key)) is not None:
+            started = time.perf_counter()
+            try:
+                # Never cancels the shared future, and only raises when this waiter itself is cancelled
+                await asyncio.wait([flight.future])
+            finally:
+                record_wait(function_id, time.perf_counter() - started)
+            # A cancelled leader, or a flight that may serve a cached value to a fresh caller, elects a new leader
+            if flight.future.cancelled() or fresh and not flight.fresh:
+                continue
+            return flight.future.result()
+
+        flight = self._flights[key] = _Flight(loop.create_future(), fresh)
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            flight.future.cancel()
+            raise
+        except BaseException as e:
+            flight.future.set_exception(e)
+            flight.future.exception()  # marks it as retrieved, waiters are not required to exist
+            raise
+        else:
+            flight.future.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+
+_ASYNC_FLIGHTS = AsyncSingleFlight()
@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import wait as wait_futures
+from typing import Any, Callable
+
+from caching.metrics import record_wait
+
+
+class _Flight:
+    __slots__ = ("future", "fresh")
+
+    def __init__(self, fresh: bool):
+        self.future: Future = Future()
+        self.fresh = fresh
+
+
+class SyncSingleFlight:
+    """
+    Shares one in-flight computation per (function_id, cache_key) between every concurrent caller.
+
+    The first caller leads the flight and publishes its result, or exception, on a shared `Future`
+    that wakes every waiter at once. Flights are dropped as soon as they land, so memory stays flat.
+    """
+
+    def __init__(self):
+        self._flights: dict[tuple[str, str], _Flight] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def run(self, function_id: str, cache_key: str, compute: Callable[[], Any], fresh: bool = False) -> Any:
+        """
+        Run `compute` unless a flight for the key is already running, in which case its outcome is shared.
+        `fresh` callers (skip_cache) don't accept a flight that may serve a cached value, they wait for it to land
+        and share the next fresh one instead.
+        """
+        key = (function_id, cache_key)
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight(fresh)
+                    break
+
+            started = time.perf_counter()
+            try:
+                if fresh and not flight.fresh:
+                    wait_futures([flight.future])
+                    continue
+
+                return flight.future.result()
+            finally:
+                record_wait(function_id, time.perf_counter() - started)
+
+        try:
+            result = compute()
+        except BaseException as e:
+            flight.future.set_exception(e)
+            raise
+        else:
+            flight.future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+
+_SYNC_FLIGHTS = SyncSingleFlight()
@@ -0,0 +1,5 @@
+from caching.backends.base import CacheBackend
+from caching.backends.redis import RedisBackend, RedisError
+from caching.backends.shared_memory import SharedMemoryBackend
+
+__all__ = ["CacheBackend", "RedisBackend", "RedisError", "SharedMemoryBackend"]
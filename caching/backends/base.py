@@ -0,0 +1,69 @@
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+
+from caching.types import Buffer, Number
+
+
+class CacheBackend(ABC):
+    """
+    Storage for cached results outside of the process local `CacheBucket` dict.
+
+    Backends store opaque payloads, results are serialized by the codec of their function before reaching them:
+    `set` receives the payload as a list of bytes-like chunks that should be written out without joining them,
+    and `get` returns it as a single bytes-like object.
+    Backends own the expiry of their entries, `get` must return `None` for missing or expired keys.
+    The async variants default to running the sync ones in the default executor, so backends doing
+    blocking IO don't stall the event loop, backends with native async clients should override them.
+    """
+
+    @abstractmethod
+    def get(self, function_id: str, cache_key: str) -> tuple[Buffer, float | None] | None:
+        """Returns (payload, remaining ttl in seconds or None if the entry never expires), or None on a miss"""
+
+    def get_many(self, function_id: str, cache_keys: list[str]) -> list[tuple[Buffer, float | None] | None]:
+        """`get` of every key, in order, backends that can batch lookups should override it"""
+        return [self.get(function_id, cache_key) for cache_key in cache_keys]
+
+    @abstractmethod
+    def set(self, function_id: str, cache_key: str, payload: list[Buffer], ttl: Number | None) -> None: ...
+
+    @abstractmethod
+    def delete(self, function_id: str, cache_key: str) -> None: ...
+
+    @abstractmethod
+    def delete_function(self, function_id: str) -> None:
+        """Delete every entry of a function"""
+
+    @abstractmethod
+    def expire(self, function_id: str, cache_key: str, ttl: Number | None) -> None:
+        """Change the ttl of an existing entry, `None` makes it never expire"""
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    async def aget(self, function_id: str, cache_key: str) -> tuple[Buffer, float | None] | None:
+        return await self._run_in_executor(self.get, function_id, cache_key)
+
+    async def aget_many(self, function_id: str, cache_keys: list[str]) -> list[tuple[Buffer, float | None] | None]:
+        return await self._run_in_executor(self.get_many, function_id, cache_keys)
+
+    async def aset(self, function_id: str, cache_key: str, payload: list[Buffer], ttl: Number | None) -> None:
+        return await self._run_in_executor(self.set, function_id, cache_key, payload, ttl)
+
+    async def adelete(self, function_id: str, cache_key: str) -> None:
+        return await self._run_in_executor(self.delete, function_id, cache_key)
+
+    async def adelete_function(self, function_id: str) -> None:
+        return await self._run_in_executor(self.delete_function, function_id)
+
+    async def aexpire(self, function_id: str, cache_key: str, ttl: Number | None) -> None:
+        return await self._run_in_executor(self.expire, function_id, cache_key, ttl)
+
+    async def aclear(self) -> None:
+        return await self._run_in_executor(self.clear)
+
+    @staticmethod
+    async def _run_in_executor(function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(function, *args))
@@ -0,0 +1,361 @@
+import asyncio
+import queue
+import re
+import socket
+import threading
+import weakref
+from typing import Any, Sequence
+
+from caching.backends.base import CacheBackend
+from caching.codecs import payload_size
+from caching.types import Buffer, Number
+
+# Arguments given as a list of chunks are sent as a single bulk string without joining the chunks
+Command = Sequence[str | bytes | int | float | list[Buffer]]
+
+# Chunks at least this large are handed to the socket as they are, smaller pieces are coalesced
+_LARGE_CHUNK = 16 * 1024
+_IOV_MAX = 1024
+
+
+class RedisError(Exception):
+    pass
+
+
+def _encode_pipeline(commands: Sequence[Command]) -> list[Buffer]:
+    """RESP encoding of the commands, as chunks where large payload buffers are referenced instead of copied"""
+    chunks: list[Buffer] = []
+    pending = bytearray()
+    for command in commands:
+        pending += b"*%d\r\n" % len(command)
+        for arg in command:
+            if isinstance(arg, list):
+                pending += b"$%d\r\n" % payload_size(arg)
+                for chunk in arg:
+                    if memoryview(chunk).nbytes >= _LARGE_CHUNK:
+                        chunks.append(bytes(pending))
+                        chunks.append(chunk)
+                        pending.clear()
+                    else:
+                        pending += chunk
+                pending += b"\r\n"
+                continue
+
+            if isinstance(arg, str):
+                arg = arg.encode()
+            elif not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            pending += b"$%d\r\n%s\r\n" % (len(arg), arg)
+
+    if pending:
+        chunks.append(bytes(pending))
+    return chunks
+
+
+def _send_chunks(sock: socket.socket, chunks: list[Buffer]):
+    """Scatter-gather send, the kernel reads the chunks where they are"""
+    views = [memoryview(chunk).cast("B") for chunk in chunks]
+    index = 0
+    while index < len(views):
+        sent = sock.sendmsg(views[index : index + _IOV_MAX])
+        while sent:
+            size = views[index].nbytes
+            if sent >= size:
+                sent -= size
+                index += 1
+            else:
+                views[index] = views[index][sent:]
+                sent = 0
+
+
+def _parse_line(line: bytes) -> tuple[bytes, bytes]:
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by the redis server")
+    return line[:1], line[1:-2]
+
+
+class _Connection:
+    def __init__(self, host: str, port: int, timeout: float):
+        self.socket = socket.create_connection((host, port), timeout=timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.socket.makefile("rb")
+
+    def execute(self, commands: Sequence[Command]) -> list[Any]:
+        """Send every command in a single write and read their replies in order"""
+        _send_chunks(self.socket, _encode_pipeline(commands))
+        return [self._read_reply() for _ in commands]
+
+    def _read_reply(self) -> Any:
+        kind, payload = _parse_line(self.reader.readline())
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                # Short at EOF, the payload is truncated
+                raise ConnectionError("Connection closed by the redis server")
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        if kind == b":":
+            return int(payload)
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RedisError(payload.decode())
+        raise RedisError(f"Unexpected redis reply {kind + payload!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.socket.close()
+        except OSError:
+            pass
+
+
+class _AsyncConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host: str, port: int, timeout: float) -> "_AsyncConnection":
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        return cls(reader, writer)
+
+    async def execute(self, commands: Sequence[Command]) -> list[Any]:
+        """Send every command in a single write and read their replies in order"""
+        self.writer.writelines(_encode_pipeline(commands))
+        await self.writer.drain()
+        return [await self._read_reply() for _ in commands]
+
+    async def _read_reply(self) -> Any:
+        kind, payload = _parse_line(await self.reader.readline())
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [await self._read_reply() for _ in range(length)]
+        if kind == b":":
+            return int(payload)
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RedisError(payload.decode())
+        raise RedisError(f"Unexpected redis reply {kind + payload!r}")
+
+    def close(self):
+        self.writer.close()
+
+
+class _AsyncConnectionPool:
+    """Connections of a single event loop, streams can't be shared between loops"""
+
+    def __init__(self, size: int):
+        self.idle: list[_AsyncConnection] = []
+        self.semaphore = asyncio.Semaphore(size)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache backend speaking the redis protocol, so any redis compatible server can be shared by every worker.
+
+    Connections are pooled (per event loop for the async API), and the commands of a single operation are
+    pipelined in one round trip, payload chunks are written with scatter-gather IO instead of being joined.
+    Keys are `{prefix}{function_id}:{cache_key}`.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: str | None = None,
+        prefix: str = "caching:",
+        pool_size: int = 16,
+        timeout: float = 5.0,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        self._pool: queue.LifoQueue[_Connection | None] = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put(None)  # lazily connected slots
+        self._async_pools: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncConnectionPool] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._async_pools_lock = threading.Lock()
+
+    def _key(self, function_id: str, cache_key: str) -> str:
+        return f"{self.prefix}{function_id}:{cache_key}"
+
+    def _setup_commands(self) -> list[Command]:
+        commands: list[Command] = []
+        if self.password is not None:
+            commands.append(("AUTH", self.password))
+        if self.db:
+            commands.append(("SELECT", self.db))
+        return commands
+
+    def execute(self, *commands: Command) -> list[Any]:
+        """Run the commands in one pipelined round trip on a pooled connection"""
+        connection = self._pool.get(timeout=self.timeout)
+        try:
+            if connection is None:
+                connection = _Connection(self.host, self.port, self.timeout)
+                if setup := self._setup_commands():
+                    _raise_errors(connection.execute(setup))
+            replies = connection.execute(commands)
+        except BaseException:
+            if connection is not None:
+                connection.close()
+            self._pool.put(None)
+            raise
+
+        self._pool.put(connection)
+        return _raise_errors(replies)
+
+    async def aexecute(self, *commands: Command) -> list[Any]:
+        """Run the commands in one pipelined round trip on a connection pooled for the running loop"""
+        pool = self._async_pool()
+        async with pool.semaphore:
+            connection = pool.idle.pop() if pool.idle else None
+            try:
+                if connection is None:
+                    connection = await _AsyncConnection.open(self.host, self.port, self.timeout)
+                    if setup := self._setup_commands():
+                        _raise_errors(await connection.execute(setup))
+                replies = await asyncio.wait_for(connection.execute(commands), self.timeout)
+            except BaseException:
+                if connection is not None:
+                    connection.close()
+                raise
+
+            pool.idle.append(connection)
+            return _raise_errors(replies)
+
+    def _async_pool(self) -> _AsyncConnectionPool:
+        loop = asyncio.get_running_loop()
+        with self._async_pools_lock:
+            if (pool := self._async_pools.get(loop)) is None:
+                pool = self._async_pools[loop] = _AsyncConnectionPool(self.pool_size)
+            return pool
+
+    @staticmethod
+    def _entry(payload: bytes | None, pttl: int) -> tuple[Buffer, float | None] | None:
+        # PTTL is -1 for keys without a ttl and -2 for missing ones, GET and PTTL aren't atomic,
+        # a key that expired between the two is a miss and not a key that never expires
+        if payload is None or pttl == -2:
+            return None
+        return payload, None if pttl == -1 else pttl / 1000
+
+    def _get_many_commands(self, function_id: str, cache_keys: list[str]) -> list[Command]:
+        """GET and PTTL of every key, pipelined in a single round trip"""
+        commands: list[Command] = []
+        for cache_key in cache_keys:
+            key = self._key(function_id, cache_key)
+            commands.append(("GET", key))
+            commands.append(("PTTL", key))
+        return commands
+
+    @staticmethod
+    def _set_command(key: str, payload: list[Buffer], ttl: Number | None) -> Command:
+        if ttl is None:
+            return ("SET", key, payload)
+        return ("SET", key, payload, "PX", max(1, int(ttl * 1000)))
+
+    @staticmethod
+    def _expire_command(key: str, ttl: Number | None) -> Command:
+        if ttl is None:
+            return ("PERSIST", key)
+        return ("PEXPIRE", key, max(1, int(ttl * 1000)))
+
+    def get(self, function_id: str, cache_key: str) -> tuple[Buffer, float | None] | None:
+        key = self._key(function_id, cache_key)
+        payload, pttl = self.execute(("GET", key), ("PTTL", key))
+        return self._entry(payload, pttl)
+
+    def get_many(self, function_id: str, cache_keys: list[str]) -> list[tuple[Buffer, float | None] | None]:
+        replies = self.execute(*self._get_many_commands(function_id, cache_keys)) if cache_keys else []
+        return [self._entry(payload, pttl) for payload, pttl in zip(replies[::2], replies[1::2])]
+
+    def set(self, function_id: str, cache_key: str, payload: list[Buffer], ttl: Number | None) -> None:
+        self.execute(self._set_command(self._key(function_id, cache_key), payload, ttl))
+
+    def delete(self, function_id: str, cache_key: str) -> None:
+        self.execute(("DEL", self._key(function_id, cache_key)))
+
+    def expire(self, function_id: str, cache_key: str, ttl: Number | None) -> None:
+        self.execute(self._expire_command(self._key(function_id, cache_key), ttl))
+
+    def clear(self) -> None:
+        """Delete every key under this backend's prefix"""
+        self._delete_matching(f"{_escape_glob(self.prefix)}*")
+
+    def delete_function(self, function_id: str) -> None:
+        self._delete_matching(f"{_escape_glob(self._key(function_id, ''))}*")
+
+    def _delete_matching(self, pattern: str):
+        cursor = b"0"
+        while True:
+            ((cursor, keys),) = self.execute(("SCAN", cursor, "MATCH", pattern, "COUNT", 1000))
+            if keys:
+                self.execute(("DEL", *keys))
+            if cursor == b"0":
+                return
+
+    async def aget(self, function_id: str, cache_key: str) -> tuple[Buffer, float | None] | None:
+        key = self._key(function_id, cache_key)
+        payload, pttl = await self.aexecute(("GET", key), ("PTTL", key))
+        return self._entry(payload, pttl)
+
+    async def aget_many(self, function_id: str, cache_keys: list[str]) -> list[tuple[Buffer, float | None] | None]:
+        replies = await self.aexecute(*self._get_many_commands(function_id, cache_keys)) if cache_keys else []
+        return [self._entry(payload, pttl) for payload, pttl in zip(replies[::2], replies[1::2])]
+
+    async def aset(self, function_id: str, cache_key: str, payload: list[Buffer], ttl: Number | None) -> None:
+        await self.aexecute(self._set_command(self._key(function_id, cache_key), payload, ttl))
+
+    async def adelete(self, function_id: str, cache_key: str) -> None:
+        await self.aexecute(("DEL", self._key(function_id, cache_key)))
+
+    async def aexpire(self, function_id: str, cache_key: str, ttl: Number | None) -> None:
+        await self.aexecute(self._expire_command(self._key(function_id, cache_key), ttl))
+
+    async def aclear(self) -> None:
+        await self._adelete_matching(f"{_escape_glob(self.prefix)}*")
+
+    async def adelete_function(self, function_id: str) -> None:
+        await self._adelete_matching(f"{_escape_glob(self._key(function_id, ''))}*")
+
+    async def _adelete_matching(self, pattern: str):
+        cursor = b"0"
+        while True:
+            ((cursor, keys),) = await self.aexecute(("SCAN", cursor, "MATCH", pattern, "COUNT", 1000))
+            if keys:
+                await self.aexecute(("DEL", *keys))
+            if cursor == b"0":
+                return
+
+
+def _escape_glob(text: str) -> str:
+    """Escape the characters SCAN MATCH patterns give a meaning to"""
+    return re.sub(r"([*?\[\]\\])", r"\\\1", text)
+
+
+def _raise_errors(replies: list[Any]) -> list[Any]:
+    for reply in replies:
+        if isinstance(reply, RedisError):
+            raise reply
+    return replies
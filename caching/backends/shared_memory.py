@@ -0,0 +1,268 @@
+import functools
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Sequence
+
+from caching.backends.base import CacheBackend
+from caching.codecs import payload_size
+from caching.config import logger
+from caching.types import Buffer, Number
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on windows
+    fcntl = None
+
+_MAGIC = b"CACHING2"
+_HEADER = struct.Struct("<8sII")  # magic, slots, slot_size
+_HEADER_SIZE = 64
+_SEQUENCE = struct.Struct("<I")
+# The digest of a slot is the digest of its (function id, cache key) followed by the digest of its function id
+_KEY_DIGEST_SIZE = 16
+_FUNCTION_DIGEST_SIZE = 8
+_DIGEST_SIZE = _KEY_DIGEST_SIZE + _FUNCTION_DIGEST_SIZE
+_SLOT_HEADER = struct.Struct(f"<I{_DIGEST_SIZE}sdI")  # sequence, digest, expires_at, payload length
+_EMPTY = 0.0  # expires_at of a free slot
+_NEVER = math.inf  # expires_at of an entry without ttl
+_PROBES = 8
+_READ_RETRIES = 100
+
+
+class SharedMemoryBackend(CacheBackend):
+    """
+    Cache backend storing serialized results in a `multiprocessing.shared_memory` hash table, so every worker
+    process on a host shares a single copy of each cached result.
+
+    The table has `slots` fixed size slots, payloads that don't fit in `slot_size` are not cached.
+    Keys are placed with open addressing over a short probe window, and once the window is full the entry
+    closest to expiring is replaced. Every slot is protected by a seqlock, so reads never take a lock:
+    readers copy the payload once and retry if a writer touched the slot meanwhile.
+    Writers are serialized with a file lock shared by all processes.
+
+    Expiry uses `time.monotonic()`, which is system wide, so ttls mean the same thing in every process.
+    """
+
+    def __init__(self, name: str = "caching", slots: int = 65536, slot_size: int = 4096):
+        if fcntl is None:
+            raise Exception("SharedMemoryBackend requires fcntl, which is not available on this platform")
+        if slot_size <= _SLOT_HEADER.size:
+            raise Exception(f"slot_size must be larger than {_SLOT_HEADER.size} bytes")
+
+        self.name = name
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_payload_size = slot_size - _SLOT_HEADER.size
+
+        self._memory = self._open(name, _HEADER_SIZE + slots * slot_size)
+        self._buffer = self._memory.buf
+        self._check_header()
+
+        self._thread_lock = threading.Lock()
+        self._lock_file = os.open(os.path.join(_lock_directory(), f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _open(self, name: str, size: int) -> shared_memory.SharedMemory:
+        try:
+            memory = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            memory = shared_memory.SharedMemory(name)
+        else:
+            _HEADER.pack_into(memory.buf, 0, _MAGIC, self.slots, self.slot_size)
+        # The table outlives every process using it, attaching registers it with the resource tracker as well,
+        # which would unlink it when the first of those processes exits
+        resource_tracker.unregister(memory._name, "shared_memory")  # type: ignore[attr-defined]
+        return memory
+
+    def _check_header(self):
+        for _ in range(_READ_RETRIES):
+            magic, slots, slot_size = _HEADER.unpack_from(self._buffer, 0)
+            if magic == _MAGIC:
+                break
+            time.sleep(0.001)  # created by another process that didn't write the header yet
+        else:
+            raise Exception(f"Shared memory {self.name!r} is not a cache table")
+
+        if (slots, slot_size) != (self.slots, self.slot_size):
+            raise Exception(
+                f"Shared memory {self.name!r} was created with slots={slots} and slot_size={slot_size}, "
+                f"got slots={self.slots} and slot_size={self.slot_size}"
+            )
+
+    @staticmethod
+    def _digest(function_id: str, cache_key: str) -> bytes:
+        key_digest = hashlib.blake2b(f"{function_id}\0{cache_key}".encode(), digest_size=_KEY_DIGEST_SIZE).digest()
+        return key_digest + _function_digest(function_id)
+
+    def _offsets(self, digest: bytes) -> list[int]:
+        home = int.from_bytes(digest[:8], "little")
+        return [_HEADER_SIZE + (home + probe) % self.slots * self.slot_size for probe in range(_PROBES)]
+
+    def _read(self, offset: int, digest: bytes) -> tuple[float, bytes] | None:
+        """Seqlock read of a slot, returns (expires_at, payload) if the slot holds the digest"""
+        buffer = self._buffer
+        for _ in range(_READ_RETRIES):
+            sequence, slot_digest, expires_at, length = _SLOT_HEADER.unpack_from(buffer, offset)
+            if sequence & 1:
+                continue  # being written
+
+            if slot_digest != digest or expires_at == _EMPTY:
+                found = None
+            else:
+                start = offset + _SLOT_HEADER.size
+                found = expires_at, bytes(buffer[start : start + length])
+
+            if _SEQUENCE.unpack_from(buffer, offset)[0] == sequence:
+                return found
+        return None
+
+    def _write(self, offset: int, digest: bytes, expires_at: float, payload: Sequence[Buffer] = ()):
+        """Must be called with the writer lock held, the payload chunks are copied straight into the slot"""
+        buffer = self._buffer
+        # Odd while writing, a sequence left odd by a writer that died mid write stays odd until rewritten
+        writing = _SEQUENCE.unpack_from(buffer, offset)[0] | 1
+        _SEQUENCE.pack_into(buffer, offset, writing)
+        _SLOT_HEADER.pack_into(buffer, offset, writing, digest, expires_at, payload_size(payload))
+        start = offset + _SLOT_HEADER.size
+        for chunk in payload:
+            view = memoryview(chunk).cast("B")
+            buffer[start : start + view.nbytes] = view
+            start += view.nbytes
+        _SEQUENCE.pack_into(buffer, offset, (writing + 1) & 0xFFFFFFFF)
+
+    def _write_lock(self):
+        return _WriteLock(self._thread_lock, self._lock_file)
+
+    def _find(self, digest: bytes) -> int | None:
+        for offset in self._offsets(digest):
+            if _SLOT_HEADER.unpack_from(self._buffer, offset)[1] == digest:
+                return offset
+        return None
+
+    def get(self, function_id: str, cache_key: str) -> tuple[Buffer, float | None] | None:
+        digest = self._digest(function_id, cache_key)
+        for offset in self._offsets(digest):
+            if (found := self._read(offset, digest)) is None:
+                continue
+
+            expires_at, payload = found
+            now = time.monotonic()
+            if expires_at <= now:
+                return None
+            return payload, None if expires_at == _NEVER else expires_at - now
+        return None
+
+    def set(self, function_id: str, cache_key: str, payload: list[Buffer], ttl: Number | None) -> None:
+        if (size := payload_size(payload)) > self.max_payload_size:
+            logger.debug(f"Result of {function_id} is {size} bytes, too large for shared memory slots")
+            return
+
+        digest = self._digest(function_id, cache_key)
+        expires_at = _NEVER if ttl is None else time.monotonic() + ttl
+        with self._write_lock():
+            offset = self._find(digest)
+            if offset is None:
+                now = time.monotonic()
+                offsets = self._offsets(digest)
+                expiries = [_SLOT_HEADER.unpack_from(self._buffer, offset)[2] for offset in offsets]
+                # Free or expired slots first, otherwise replace the entry closest to expiring
+                offset = min(zip(offsets, expiries), key=lambda item: (item[1] > now, item[1]))[0]
+            self._write(offset, digest, expires_at, payload)
+
+    def delete(self, function_id: str, cache_key: str) -> None:
+        digest = self._digest(function_id, cache_key)
+        with self._write_lock():
+            if (offset := self._find(digest)) is not None:
+                self._write(offset, bytes(_DIGEST_SIZE), _EMPTY)
+
+    def delete_function(self, function_id: str) -> None:
+        """Empty every slot of the function, which scans the whole table"""
+        function_digest = _function_digest(function_id)
+        with self._write_lock():
+            for index in range(self.slots):
+                offset = _HEADER_SIZE + index * self.slot_size
+                _, digest, expires_at, _ = _SLOT_HEADER.unpack_from(self._buffer, offset)
+                if expires_at != _EMPTY and digest[_KEY_DIGEST_SIZE:] == function_digest:
+                    self._write(offset, bytes(_DIGEST_SIZE), _EMPTY)
+
+    def expire(self, function_id: str, cache_key: str, ttl: Number | None) -> None:
+        digest = self._digest(function_id, cache_key)
+        with self._write_lock():
+            if (offset := self._find(digest)) is None:
+                return
+            if (found := self._read(offset, digest)) is not None:
+                expires_at = _NEVER if ttl is None else time.monotonic() + ttl
+                self._write(offset, digest, expires_at, [found[1] or b""])
+
+    def clear(self) -> None:
+        with self._write_lock():
+            for index in range(self.slots):
+                offset = _HEADER_SIZE + index * self.slot_size
+                if _SLOT_HEADER.unpack_from(self._buffer, offset)[2] != _EMPTY:
+                    self._write(offset, bytes(_DIGEST_SIZE), _EMPTY)
+
+    async def aget(self, function_id: str, cache_key: str) -> tuple[Buffer, float | None] | None:
+        # Memory reads don't block, no need for an executor
+        return self.get(function_id, cache_key)
+
+    async def aget_many(self, function_id: str, cache_keys: list[str]) -> list[tuple[Buffer, float | None] | None]:
+        return self.get_many(function_id, cache_keys)
+
+    async def aset(self, function_id: str, cache_key: str, payload: list[Buffer], ttl: Number | None) -> None:
+        self.set(function_id, cache_key, payload, ttl)
+
+    async def adelete(self, function_id: str, cache_key: str) -> None:
+        self.delete(function_id, cache_key)
+
+    async def aexpire(self, function_id: str, cache_key: str, ttl: Number | None) -> None:
+        self.expire(function_id, cache_key, ttl)
+
+    def close(self):
+        """Detach this process from the table, which stays available to the others"""
+        self._buffer = None
+        self._memory.close()
+        os.close(self._lock_file)
+
+    def unlink(self):
+        """Destroy the table, only meant to be called once every process is done with it"""
+        # SharedMemory.unlink unregisters the table from the resource tracker, which _open already did
+        resource_tracker.register(self._memory._name, "shared_memory")  # type: ignore[attr-defined]
+        self._memory.unlink()
+        try:
+            os.unlink(os.path.join(_lock_directory(), f"{self.name}.lock"))
+        except FileNotFoundError:
+            pass
+
+
+class _WriteLock:
+    """Thread lock for this process plus an exclusive file lock for the other processes"""
+
+    __slots__ = ("_thread_lock", "_lock_file")
+
+    def __init__(self, thread_lock: threading.Lock, lock_file: int):
+        self._thread_lock = thread_lock
+        self._lock_file = lock_file
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def __exit__(self, *_):
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+@functools.lru_cache(maxsize=1024)
+def _function_digest(function_id: str) -> bytes:
+    return hashlib.blake2b(function_id.encode(), digest_size=_FUNCTION_DIGEST_SIZE).digest()
+
+
+def _lock_directory() -> str:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else os.environ.get("TMPDIR", "/tmp")
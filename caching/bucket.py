@@ -1,71 +1,724 @@
+import math
+import random
+import threading
 import time
-from dataclasses import dataclass, field
-from inspect import Signature
-from typing import Any
+from inspect import Parameter, Signature
+from typing import Any, Callable, Iterable
 
-from caching.types import CacheKeyFunction, Number
+from caching import clock
+from caching.backends import CacheBackend
+from caching.codecs import Codec, PickleCodec
+from caching.config import logger
+from caching.eviction import EvictionPolicy, EvictionStats, MemoryBudget, MemoryStats, create_eviction_policy
+from caching.expiry import ExpiryIndex
+from caching.metrics import CacheStats, function_metrics, record_eviction
+from caching.sizing import DEFAULT_SIZE, estimate_size
+from caching.utils.keys import arguments_key, positional_key
+from caching.types import Buffer, CacheKeyFunction, EvictionPolicyName, Number, Sizer, Tags, TagsFunction
+
+GLOBAL_POLICY_ID = "*"
+NEVER = math.inf
+# Shards per function, a power of two
+SHARDS = 16
+_SHARD_MASK = SHARDS - 1
 
 
-@dataclass
 class CacheEntry:
-    result: Any
-    ttl: float | None
+    """A cached result with only the deadlines expiry needs, entries without ttl have infinite deadlines"""
 
-    cached_at: float = field(init=False)
-    expires_at: float = field(init=False)
+    __slots__ = ("result", "expires_at", "stale_until")
 
-    @classmethod
-    def time(cls) -> float:
-        return time.monotonic()
+    def __init__(self, result: Any, ttl: Number | None, stale_ttl: Number = 0):
+        self.result = result
+        if ttl is None:
+            self.expires_at = self.stale_until = NEVER
+        else:
+            self.expires_at = clock.now() + ttl
+            # Shares the float object when there is no stale window
+            self.stale_until = self.expires_at + stale_ttl if stale_ttl else self.expires_at
 
-    def __post_init__(self):
-        self.cached_at = self.time()
-        self.expires_at = 0 if self.ttl is None else self.cached_at + self.ttl
+    def __repr__(self) -> str:
+        return f"CacheEntry(result={self.result!r}, expires_at={self.expires_at}, stale_until={self.stale_until})"
 
     def is_expired(self) -> bool:
-        if self.ttl is None:
-            return False
-        return self.time() > self.expires_at
+        return (clock.coarse_now or time.monotonic()) > self.expires_at
+
+    def is_stale_expired(self) -> bool:
+        """Past the stale window as well, the entry can't be served anymore"""
+        return (clock.coarse_now or time.monotonic()) > self.stale_until
+
+
+class Shard:
+    """Slice of the entries of a function, written under its own lock, read lock-free"""
+
+    __slots__ = ("entries", "tags", "lock")
+
+    def __init__(self):
+        self.entries: dict[str, CacheEntry] = {}
+        # Tags of the tagged entries, per cache key
+        self.tags: dict[str, tuple[str, ...]] = {}
+        self.lock = threading.Lock()
+
+    def items(self) -> list[tuple[str, CacheEntry]]:
+        with self.lock:
+            return list(self.entries.items())
+
+
+class Namespace:
+    """Entries of one function, spread over `SHARDS` shards by the hash of their cache key"""
+
+    __slots__ = ("shards", "entries", "bounded")
+
+    def __init__(self, bounded: bool = False):
+        self.shards = tuple(Shard() for _ in range(SHARDS))
+        # The dicts of the shards, lookups index them directly
+        self.entries = tuple(shard.entries for shard in self.shards)
+        # If a policy or budget covers the function, the only check its unbounded reads and writes make
+        self.bounded = bounded
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self.shards)
+
+    def shard(self, cache_key: str) -> Shard:
+        return self.shards[hash(cache_key) & _SHARD_MASK]
 
 
 class CacheBucket:
-    _CACHE: dict[tuple[str, str], CacheEntry] = {}
+    # Process local entries per function id, functions never share a lock or a dict with each other
+    _NAMESPACES: dict[str, Namespace] = {}
+    _NAMESPACES_LOCK: threading.Lock = threading.Lock()
+    _EXPIRY_INDEX: ExpiryIndex = ExpiryIndex(SHARDS)
+
+    # Eviction policies, per function id and one optional global policy covering every entry
+    _POLICIES: dict[str, EvictionPolicy] = {}
+    _GLOBAL_POLICY: EvictionPolicy | None = None
+    # Memory budgets on the estimated size of the entries, per function id and one optional global budget
+    _BUDGETS: dict[str, MemoryBudget] = {}
+    _GLOBAL_BUDGET: MemoryBudget | None = None
+    # How results are sized for the budgets, per function id and one default
+    _SIZERS: dict[str, Sizer] = {}
+    _DEFAULT_SIZER: Sizer = estimate_size
+
+    # Storage backends used instead of the process local dict, per function id and one optional default
+    _BACKENDS: dict[str, CacheBackend] = {}
+    _DEFAULT_BACKEND: CacheBackend | None = None
+    # Serialization of results stored in backends, per function id
+    _CODECS: dict[str, Codec] = {}
+    _DEFAULT_CODEC: Codec = PickleCodec()
+    # How long expired entries are kept around to be served while they are refreshed, per function id
+    _STALE_TTLS: dict[str, float] = {}
+    # Fraction of the ttl randomly cut off every entry, per function id, so entries cached together expire apart
+    _TTL_JITTERS: dict[str, float] = {}
+
+    # (function id, cache key) pairs per tag, invalidating a tag only visits its own keys
+    _TAG_KEYS: dict[str, set[tuple[str, str]]] = {}
+    _TAGS_LOCK: threading.Lock = threading.Lock()
+
+    # Guards the eviction policies. Writes of bounded functions take it before the shard lock, so the entries and
+    # the policies tracking them change together, unbounded functions never take it
+    _POLICY_LOCK: threading.Lock = threading.Lock()
 
     @classmethod
     def clear_expired_cached_items(cls):
-        """Clear expired cached items from the cache bucket."""
+        """Remove cached items as they expire, sleeping until the next expiry is due."""
         while True:
             try:
-                for key, entry in list(cls._CACHE.items()):
-                    if entry.is_expired():
-                        del cls._CACHE[key]
+                for stale_until, (function_id, cache_key) in cls._EXPIRY_INDEX.wait_for_due(time.monotonic):
+                    # Entries overwritten since this deadline was indexed have their own, later, deadline
+                    cls._remove(function_id, cache_key, stale_until)
+
+                if cls._EXPIRY_INDEX.needs_compaction(cls._entry_count()):
+                    cls._EXPIRY_INDEX.compact(cls._is_live)
             except Exception:
-                pass
-            finally:
-                time.sleep(10)
+                time.sleep(1)
 
     @classmethod
-    def set(cls, function_id: str, cache_key: str, result: Any, ttl: Number | None):
-        cls._CACHE[function_id, cache_key] = CacheEntry(result, ttl)
+    def set(cls, function_id: str, cache_key: str, result: Any, ttl: Number | None, tags: tuple[str, ...] = ()):
+        if cls._TTL_JITTERS and ttl is not None:
+            ttl = cls._jittered(function_id, ttl)
+        if cls._BACKENDS or cls._DEFAULT_BACKEND is not None:
+            if (backend := cls.get_backend(function_id)) is not None:
+                encoded = cls.get_codec(function_id).encode(result)
+                return backend.set(function_id, cache_key, encoded, cls._storage_ttl(function_id, ttl))
+
+        entry = CacheEntry(result, ttl, cls._STALE_TTLS.get(function_id, 0) if cls._STALE_TTLS else 0)
+        cls._write(function_id, cache_key, entry, tags)
+
+    @classmethod
+    def set_error(cls, function_id: str, cache_key: str, error: Any, ttl: Number, tags: tuple[str, ...] = ()):
+        """
+        Store a cached exception, in the process and without a stale window, so it's never served past `ttl`.
+        A result that can still be served, e.g. a stale one whose revalidation failed, is kept instead.
+        """
+        if (namespace := cls._NAMESPACES.get(function_id)) is not None:
+            entry = namespace.shard(cache_key).entries.get(cache_key)
+            if entry is not None and not entry.is_stale_expired() and type(entry.result) is not type(error):
+                return
+        cls._write(function_id, cache_key, CacheEntry(error, ttl), tags)
+
+    @classmethod
+    def restore(
+        cls, function_id: str, cache_key: str, result: Any, ttl: Number | None, stale_ttl: Number, tags: tuple[str, ...]
+    ) -> bool:
+        """Insert an entry loaded back from a snapshot, unless the key was cached meanwhile, returns if it was"""
+        return cls._write(function_id, cache_key, CacheEntry(result, ttl, stale_ttl), tags, replace=False)
 
     @classmethod
-    def get(cls, function_id: str, cache_key: str, skip_cache: bool) -> CacheEntry | None:
+    def snapshot_entries(cls) -> list[tuple[str, str, CacheEntry, tuple[str, ...]]]:
+        """Every process local entry with its tags, only the copy of each shard holds its lock"""
+        entries = []
+        for function_id, namespace in list(cls._NAMESPACES.items()):
+            for shard in namespace.shards:
+                with shard.lock:
+                    items = list(shard.entries.items())
+                    tags = dict(shard.tags)
+                entries += [(function_id, cache_key, entry, tags.get(cache_key, ())) for cache_key, entry in items]
+        return entries
+
+    @classmethod
+    def get(cls, function_id: str, cache_key: str, skip_cache: bool, allow_stale: bool = False) -> CacheEntry | None:
+        """
+        Cached entry of the call, `allow_stale` also returns entries that expired but are still in their stale window,
+        callers tell them apart with `is_expired()`.
+        """
         if skip_cache:
             return None
-        if entry := cls._CACHE.get((function_id, cache_key)):
-            if not entry.is_expired():
+        if cls._BACKENDS or cls._DEFAULT_BACKEND is not None:
+            if (backend := cls.get_backend(function_id)) is not None:
+                return cls._backend_entry(function_id, backend.get(function_id, cache_key), allow_stale)
+        if (namespace := cls._NAMESPACES.get(function_id)) is None:
+            return None
+        if entry := namespace.entries[hash(cache_key) & _SHARD_MASK].get(cache_key):
+            if not entry.is_expired() or allow_stale and not entry.is_stale_expired():
+                if namespace.bounded:
+                    cls._record_hit(function_id, cache_key)
                 return entry
         return None
 
+    @classmethod
+    def get_many(cls, function_id: str, cache_keys: list[str], allow_stale: bool = False) -> list[CacheEntry | None]:
+        """`get` of every key in one pass, a single round trip for backends that batch lookups"""
+        if cls._BACKENDS or cls._DEFAULT_BACKEND is not None:
+            if (backend := cls.get_backend(function_id)) is not None:
+                stored = backend.get_many(function_id, cache_keys)
+                return [cls._backend_entry(function_id, item, allow_stale) for item in stored]
+
+        if (namespace := cls._NAMESPACES.get(function_id)) is None:
+            return [None] * len(cache_keys)
+        shards = namespace.entries
+        record_hits = namespace.bounded
+        now = clock.now()
+        entries: list[CacheEntry | None] = []
+        for cache_key in cache_keys:
+            entry = shards[hash(cache_key) & _SHARD_MASK].get(cache_key)
+            if entry is not None and (now <= entry.expires_at or allow_stale and now <= entry.stale_until):
+                if record_hits:
+                    cls._record_hit(function_id, cache_key)
+                entries.append(entry)
+            else:
+                entries.append(None)
+        return entries
+
+    @classmethod
+    async def aget_many(
+        cls, function_id: str, cache_keys: list[str], allow_stale: bool = False
+    ) -> list[CacheEntry | None]:
+        if (backend := cls.get_backend(function_id)) is not None:
+            stored = await backend.aget_many(function_id, cache_keys)
+            return [cls._backend_entry(function_id, item, allow_stale) for item in stored]
+        return cls.get_many(function_id, cache_keys, allow_stale)
+
+    @classmethod
+    async def aset(cls, function_id: str, cache_key: str, result: Any, ttl: Number | None, tags: tuple[str, ...] = ()):
+        if (backend := cls.get_backend(function_id)) is not None:
+            if cls._TTL_JITTERS and ttl is not None:
+                ttl = cls._jittered(function_id, ttl)
+            encoded = cls.get_codec(function_id).encode(result)
+            return await backend.aset(function_id, cache_key, encoded, cls._storage_ttl(function_id, ttl))
+        cls.set(function_id, cache_key, result, ttl, tags)
+
+    @classmethod
+    def _storage_ttl(cls, function_id: str, ttl: Number | None) -> Number | None:
+        """Backends keep entries through their stale window as well"""
+        if ttl is None or not cls._STALE_TTLS:
+            return ttl
+        return ttl + cls._STALE_TTLS.get(function_id, 0)
+
+    @classmethod
+    async def aget(
+        cls, function_id: str, cache_key: str, skip_cache: bool, allow_stale: bool = False
+    ) -> CacheEntry | None:
+        if skip_cache:
+            return None
+        if (backend := cls.get_backend(function_id)) is not None:
+            return cls._backend_entry(function_id, await backend.aget(function_id, cache_key), allow_stale)
+        return cls.get(function_id, cache_key, skip_cache, allow_stale)
+
+    @classmethod
+    def delete(cls, function_id: str, cache_key: str):
+        if cls._BACKENDS or cls._DEFAULT_BACKEND is not None:
+            if (backend := cls.get_backend(function_id)) is not None:
+                return backend.delete(function_id, cache_key)
+
+        cls._remove(function_id, cache_key)
+
+    @classmethod
+    async def adelete(cls, function_id: str, cache_key: str):
+        if (backend := cls.get_backend(function_id)) is not None:
+            return await backend.adelete(function_id, cache_key)
+        cls.delete(function_id, cache_key)
+
+    @classmethod
+    def delete_function(cls, function_id: str):
+        """Remove every entry of a function, the rest of the cache stays warm"""
+        if cls._BACKENDS or cls._DEFAULT_BACKEND is not None:
+            if (backend := cls.get_backend(function_id)) is not None:
+                return backend.delete_function(function_id)
+
+        if (namespace := cls._NAMESPACES.get(function_id)) is not None:
+            for shard in namespace.shards:
+                for cache_key, _ in shard.items():
+                    cls._remove(function_id, cache_key)
+
+    @classmethod
+    async def adelete_function(cls, function_id: str):
+        if (backend := cls.get_backend(function_id)) is not None:
+            return await backend.adelete_function(function_id)
+        cls.delete_function(function_id)
+
+    @classmethod
+    def tagged_keys(cls, tags: Iterable[str]) -> "set[tuple[str, str]]":
+        """(function id, cache key) pairs of the entries cached with any of the tags"""
+        keys: set[tuple[str, str]] = set()
+        with cls._TAGS_LOCK:
+            for tag in tags:
+                keys.update(cls._TAG_KEYS.get(tag, ()))
+        return keys
+
+    @classmethod
+    def delete_tags(cls, tags: Iterable[str]):
+        """Remove every entry cached with any of the tags"""
+        for function_id, cache_key in cls.tagged_keys(tags):
+            cls._remove(function_id, cache_key)
+
+    @classmethod
+    def set_backend(cls, backend: CacheBackend | None, function_id: str | None = None):
+        """
+        Store the entries of a function, or of every function without its own backend when no function id is given,
+        in `backend` instead of the process local dict. Passing `None` goes back to the default.
+        """
+        if function_id is None:
+            cls._DEFAULT_BACKEND = backend
+        elif backend is None:
+            cls._BACKENDS.pop(function_id, None)
+        else:
+            cls._BACKENDS[function_id] = backend
+
+    @classmethod
+    def get_backend(cls, function_id: str) -> CacheBackend | None:
+        return cls._BACKENDS.get(function_id, cls._DEFAULT_BACKEND)
+
+    @classmethod
+    def set_codec(cls, codec: Codec | None, function_id: str):
+        """Serialize the results a function stores in backends with `codec`, `None` for the default pickle codec"""
+        if codec is None:
+            cls._CODECS.pop(function_id, None)
+        else:
+            cls._CODECS[function_id] = codec
+
+    @classmethod
+    def get_codec(cls, function_id: str) -> Codec:
+        return cls._CODECS.get(function_id, cls._DEFAULT_CODEC)
+
+    @classmethod
+    def set_stale_ttl(cls, stale_ttl: Number | None, function_id: str):
+        """Keep the expired entries of a function for `stale_ttl` more seconds, `None` to drop them on expiry"""
+        if not stale_ttl:
+            cls._STALE_TTLS.pop(function_id, None)
+        else:
+            cls._STALE_TTLS[function_id] = stale_ttl
+
+    @classmethod
+    def set_ttl_jitter(cls, ttl_jitter: float, function_id: str):
+        """Cut a random fraction of up to `ttl_jitter` off the ttl of every entry of a function, 0 to disable"""
+        if not 0 <= ttl_jitter < 1:
+            raise Exception("ttl_jitter must be a fraction of the ttl, between 0 and 1")
+        if not ttl_jitter:
+            cls._TTL_JITTERS.pop(function_id, None)
+        else:
+            cls._TTL_JITTERS[function_id] = ttl_jitter
+
+    @classmethod
+    def _jittered(cls, function_id: str, ttl: Number) -> Number:
+        # Only ever shortened, entries are never served for longer than their ttl
+        if jitter := cls._TTL_JITTERS.get(function_id):
+            return ttl * (1 - jitter * random.random())
+        return ttl
+
+    @classmethod
+    def _backend_entry(
+        cls, function_id: str, stored: tuple[Buffer, float | None] | None, allow_stale: bool = False
+    ) -> CacheEntry | None:
+        if stored is None:
+            return None
+        payload, remaining = stored
+        if remaining is None:
+            return CacheEntry(cls.get_codec(function_id).decode(payload), None)
+
+        # Backends keep entries for their stale window too, what remains of the ttl itself may be negative
+        stale_ttl = cls._STALE_TTLS.get(function_id, 0)
+        if remaining <= stale_ttl and not allow_stale:
+            return None
+        return CacheEntry(cls.get_codec(function_id).decode(payload), remaining - stale_ttl, stale_ttl)
+
     @classmethod
     def is_cache_expired(cls, function_id: str, cache_key: str) -> bool:
-        if entry := cls._CACHE.get((function_id, cache_key)):
-            return entry.is_expired()
+        if (namespace := cls._NAMESPACES.get(function_id)) is not None:
+            if entry := namespace.shard(cache_key).entries.get(cache_key):
+                return entry.is_expired()
         return True
 
     @classmethod
     def clear(cls):
-        cls._CACHE.clear()
+        with cls._POLICY_LOCK:
+            for namespace in list(cls._NAMESPACES.values()):
+                for shard in namespace.shards:
+                    with shard.lock:
+                        shard.entries.clear()
+                        shard.tags.clear()
+            with cls._TAGS_LOCK:
+                cls._TAG_KEYS.clear()
+            cls._EXPIRY_INDEX.clear()
+            for policy in cls._iter_policies():
+                policy.clear()
+            for budget in cls._iter_budgets():
+                budget.clear()
+
+    @classmethod
+    def set_max_entries(
+        cls,
+        max_entries: int | None,
+        eviction_policy: EvictionPolicyName | type[EvictionPolicy] = "lru",
+        function_id: str | None = None,
+    ):
+        """
+        Bound the number of cached entries of a function, or of the whole bucket when no function id is given.
+        Passing `max_entries=None` removes the bound.
+        """
+        policy = None if max_entries is None else create_eviction_policy(eviction_policy, max_entries)
+
+        with cls._POLICY_LOCK:
+            if function_id is None:
+                cls._GLOBAL_POLICY = policy
+            elif policy is None:
+                cls._POLICIES.pop(function_id, None)
+            else:
+                cls._POLICIES[function_id] = policy
+            cls._update_bounded()
+
+            if policy is None:
+                return
+
+            # Entries cached before the policy was installed still have to count towards its bound
+            for key_function_id, namespace in list(cls._NAMESPACES.items()):
+                if function_id is not None and key_function_id != function_id:
+                    continue
+                for shard in namespace.shards:
+                    for cache_key, _ in shard.items():
+                        if (victim := policy.admit((key_function_id, cache_key))) is not None:
+                            cls._evict(victim, policy)
+
+    @classmethod
+    def eviction_stats(cls) -> dict[str, EvictionStats]:
+        """Snapshot of the eviction counters per function id, the global policy is keyed by `GLOBAL_POLICY_ID`"""
+        with cls._POLICY_LOCK:
+            stats = {function_id: policy.stats() for function_id, policy in cls._POLICIES.items()}
+            if cls._GLOBAL_POLICY is not None:
+                stats[GLOBAL_POLICY_ID] = cls._GLOBAL_POLICY.stats()
+            return stats
+
+    @classmethod
+    def set_memory_budget(cls, max_bytes: int | None, function_id: str | None = None):
+        """
+        Bound the estimated bytes of the cached entries of a function, or of the whole bucket when no function id
+        is given. Passing `max_bytes=None` removes the bound.
+        """
+        budget = None if max_bytes is None else MemoryBudget(max_bytes)
+
+        # Entries cached before the budget was installed still have to count towards it, they are sized before
+        # taking the lock so a large cache doesn't block bounded reads and writes meanwhile
+        sized: dict[tuple[str, str], tuple[CacheEntry, int]] = {}
+        if budget is not None:
+            for key, entry in cls._covered_entries(function_id):
+                sized[key] = entry, cls._size(key[0], entry.result)
+
+        with cls._POLICY_LOCK:
+            if function_id is None:
+                cls._GLOBAL_BUDGET = budget
+            elif budget is None:
+                cls._BUDGETS.pop(function_id, None)
+            else:
+                cls._BUDGETS[function_id] = budget
+            cls._update_bounded()
+
+            if budget is None:
+                return
+
+            for key, entry in cls._covered_entries(function_id):
+                # Only entries cached or replaced since they were sized are sized under the lock
+                known = sized.get(key)
+                size = known[1] if known is not None and known[0] is entry else cls._size(key[0], entry.result)
+                for victim in budget.admit(key, size):
+                    cls._evict(victim, budget)
+
+    @classmethod
+    def _covered_entries(cls, function_id: str | None) -> "list[tuple[tuple[str, str], CacheEntry]]":
+        """Process local entries of a function, or of every function when no function id is given"""
+        entries = []
+        for key_function_id, namespace in list(cls._NAMESPACES.items()):
+            if function_id is None or key_function_id == function_id:
+                for shard in namespace.shards:
+                    entries += [((key_function_id, cache_key), entry) for cache_key, entry in shard.items()]
+        return entries
+
+    @classmethod
+    def _size(cls, function_id: str, result: Any) -> int:
+        """Estimated bytes of a result, a sizer that raises falls back to the default estimate"""
+        for sizer in (cls.get_sizer(function_id), estimate_size):
+            try:
+                return sizer(result)
+            except Exception:
+                logger.debug(f"Exception sizing a {function_id} result", exc_info=True)
+        return DEFAULT_SIZE
+
+    @classmethod
+    def set_sizer(cls, sizer: Sizer | None, function_id: str | None = None):
+        """Size the results of a function, or of every function without its own sizer, with `sizer`"""
+        if function_id is None:
+            cls._DEFAULT_SIZER = estimate_size if sizer is None else sizer
+        elif sizer is None:
+            cls._SIZERS.pop(function_id, None)
+        else:
+            cls._SIZERS[function_id] = sizer
+
+    @classmethod
+    def get_sizer(cls, function_id: str) -> Sizer:
+        return cls._SIZERS.get(function_id, cls._DEFAULT_SIZER)
+
+    @classmethod
+    def memory_stats(cls) -> dict[str, MemoryStats]:
+        """Snapshot of the memory budgets per function id, the global budget is keyed by `GLOBAL_POLICY_ID`"""
+        with cls._POLICY_LOCK:
+            stats = {function_id: budget.stats() for function_id, budget in cls._BUDGETS.items()}
+            if cls._GLOBAL_BUDGET is not None:
+                stats[GLOBAL_POLICY_ID] = cls._GLOBAL_BUDGET.stats()
+            return stats
+
+    @classmethod
+    def cache_stats(cls, function_ids: list[str]) -> dict[str, CacheStats]:
+        """
+        Snapshot of the metrics of the functions, with the number of entries they have in the local dict
+        and their estimated bytes when a memory budget covers them
+        """
+        entries = {function_id: len(namespace) for function_id, namespace in list(cls._NAMESPACES.items())}
+
+        stats = {}
+        for function_id in function_ids:
+            local = cls.get_backend(function_id) is None
+            snapshot = function_metrics(function_id).snapshot(entries.get(function_id, 0) if local else None)
+            if local and (budget := cls._BUDGETS.get(function_id, cls._GLOBAL_BUDGET)) is not None:
+                snapshot.memory_bytes = budget.usage(function_id)
+            stats[function_id] = snapshot
+        return stats
+
+    @classmethod
+    def _iter_policies(cls, function_id: str | None = None):
+        if function_id is None:
+            yield from cls._POLICIES.values()
+        elif (policy := cls._POLICIES.get(function_id)) is not None:
+            yield policy
+        if cls._GLOBAL_POLICY is not None:
+            yield cls._GLOBAL_POLICY
+
+    @classmethod
+    def _iter_budgets(cls, function_id: str | None = None):
+        if function_id is None:
+            yield from cls._BUDGETS.values()
+        elif (budget := cls._BUDGETS.get(function_id)) is not None:
+            yield budget
+        if cls._GLOBAL_BUDGET is not None:
+            yield cls._GLOBAL_BUDGET
+
+    @classmethod
+    def _is_bounded(cls, function_id: str) -> bool:
+        return (
+            cls._GLOBAL_POLICY is not None
+            or cls._GLOBAL_BUDGET is not None
+            or function_id in cls._POLICIES
+            or function_id in cls._BUDGETS
+        )
+
+    @classmethod
+    def _update_bounded(cls):
+        """Must be called with the policy lock held"""
+        with cls._NAMESPACES_LOCK:
+            for function_id, namespace in cls._NAMESPACES.items():
+                namespace.bounded = cls._is_bounded(function_id)
+
+    @classmethod
+    def _record_hit(cls, function_id: str, cache_key: str):
+        key = (function_id, cache_key)
+        with cls._POLICY_LOCK:
+            for policy in cls._iter_policies(function_id):
+                policy.record_hit(key)
+            for budget in cls._iter_budgets(function_id):
+                budget.record_hit(key)
+
+    @classmethod
+    def _namespace(cls, function_id: str) -> Namespace:
+        if (namespace := cls._NAMESPACES.get(function_id)) is None:
+            with cls._NAMESPACES_LOCK:
+                if (namespace := cls._NAMESPACES.get(function_id)) is None:
+                    namespace = cls._NAMESPACES[function_id] = Namespace(cls._is_bounded(function_id))
+        return namespace
+
+    @classmethod
+    def _entry_count(cls) -> int:
+        return sum(len(namespace) for namespace in list(cls._NAMESPACES.values()))
+
+    @classmethod
+    def _is_live(cls, stale_until: float, key: tuple[str, str]) -> bool:
+        """If the entry of an expiry index item is still the one cached, with that deadline"""
+        if (namespace := cls._NAMESPACES.get(key[0])) is None:
+            return False
+        entry = namespace.shard(key[1]).entries.get(key[1])
+        return entry is not None and entry.stale_until == stale_until
+
+    @classmethod
+    def _write(
+        cls, function_id: str, cache_key: str, entry: CacheEntry, tags: tuple[str, ...], replace: bool = True
+    ) -> bool:
+        """Store an entry, unless `replace` is False and the key is cached already, returns if it was stored"""
+        if (namespace := cls._NAMESPACES.get(function_id)) is None:
+            namespace = cls._namespace(function_id)
+        index = hash(cache_key) & _SHARD_MASK
+        shard = namespace.shards[index]
+        if namespace.bounded:
+            # Sized before taking the lock, sizers may take a while on large results
+            sized = cls._GLOBAL_BUDGET is not None or function_id in cls._BUDGETS
+            size = cls._size(function_id, entry.result) if sized else 0
+            with cls._POLICY_LOCK:
+                if not cls._store(function_id, cache_key, shard, entry, tags, replace):
+                    return False
+                cls._admit((function_id, cache_key), size)
+        elif not cls._store(function_id, cache_key, shard, entry, tags, replace):
+            return False
+        if entry.stale_until != NEVER:
+            cls._EXPIRY_INDEX.push(entry.stale_until, (function_id, cache_key), index)
+        return True
+
+    @classmethod
+    def _store(
+        cls, function_id: str, cache_key: str, shard: Shard, entry: CacheEntry, tags: tuple[str, ...], replace: bool
+    ) -> bool:
+        with shard.lock:
+            if not replace and cache_key in shard.entries:
+                return False
+            shard.entries[cache_key] = entry
+            if tags:
+                cls._index_tags(function_id, cache_key, shard, tags)
+        return True
+
+    @classmethod
+    def _remove(cls, function_id: str, cache_key: str, stale_until: float | None = None):
+        """Remove an entry, only if its deadline is still `stale_until` when one is given"""
+        if (namespace := cls._NAMESPACES.get(function_id)) is None:
+            return
+        shard = namespace.shard(cache_key)
+        if namespace.bounded:
+            with cls._POLICY_LOCK:
+                if cls._pop(function_id, cache_key, shard, stale_until):
+                    for policy in cls._iter_policies(function_id):
+                        policy.discard((function_id, cache_key))
+                    for budget in cls._iter_budgets(function_id):
+                        budget.discard((function_id, cache_key))
+        else:
+            cls._pop(function_id, cache_key, shard, stale_until)
+
+    @classmethod
+    def _pop(cls, function_id: str, cache_key: str, shard: Shard, stale_until: float | None = None) -> bool:
+        with shard.lock:
+            entry = shard.entries.get(cache_key)
+            if entry is None or stale_until is not None and entry.stale_until != stale_until:
+                return False
+            del shard.entries[cache_key]
+            if shard.tags:
+                cls._unindex_tags(function_id, cache_key, shard)
+        return True
+
+    @classmethod
+    def _admit(cls, key: tuple[str, str], size: int):
+        """Must be called with the policy lock held"""
+        for policy in cls._iter_policies(key[0]):
+            # Misses are recorded when their result is stored, lookups are repeated under the per key lock
+            if key not in policy:
+                policy.record_miss(key)
+            victim = policy.admit(key)
+            if victim is not None:
+                cls._evict(victim, policy)
+            if victim == key:
+                # Rejected by the admission filter, no other policy should track it
+                return
+        for budget in cls._iter_budgets(key[0]):
+            rejected = False
+            for victim in budget.admit(key, size):
+                cls._evict(victim, budget)
+                rejected = rejected or victim == key
+            if rejected:
+                # Larger than the whole budget
+                return
+
+    @classmethod
+    def _evict(cls, key: tuple[str, str], evicted_by: EvictionPolicy | MemoryBudget):
+        """Must be called with the policy lock held"""
+        if (namespace := cls._NAMESPACES.get(key[0])) is not None:
+            cls._pop(key[0], key[1], namespace.shard(key[1]))
+        record_eviction(key[0])
+        for policy in cls._iter_policies(key[0]):
+            if policy is not evicted_by:
+                policy.discard(key)
+        for budget in cls._iter_budgets(key[0]):
+            if budget is not evicted_by:
+                budget.discard(key)
+
+    @classmethod
+    def _index_tags(cls, function_id: str, cache_key: str, shard: Shard, tags: tuple[str, ...]):
+        """Must be called with the shard lock held"""
+        previous = shard.tags.get(cache_key, ())
+        added = tuple(tag for tag in tags if tag not in previous)
+        if not added:
+            return
+        shard.tags[cache_key] = previous + added
+        key = (function_id, cache_key)
+        with cls._TAGS_LOCK:
+            for tag in added:
+                if (tagged := cls._TAG_KEYS.get(tag)) is None:
+                    tagged = cls._TAG_KEYS[tag] = set()
+                tagged.add(key)
+
+    @classmethod
+    def _unindex_tags(cls, function_id: str, cache_key: str, shard: Shard):
+        """Must be called with the shard lock held"""
+        if not (tags := shard.tags.pop(cache_key, None)):
+            return
+        key = (function_id, cache_key)
+        with cls._TAGS_LOCK:
+            for tag in tags:
+                tagged = cls._TAG_KEYS[tag]
+                tagged.discard(key)
+                # Tags are often per argument, don't keep one empty set per value ever seen
+                if not tagged:
+                    del cls._TAG_KEYS[tag]
 
     @classmethod
     def create_cache_key(
@@ -77,16 +730,63 @@ class CacheBucket:
         kwargs: dict,
     ) -> str:
         if not cache_key_func:
-            items = tuple(cls.iter_arguments(function_signature, args, kwargs, ignore_fields))
-            return str(hash(items))
-
-        cache_key = cache_key_func(args, kwargs)
-        try:
-            return str(hash(cache_key))
-        except TypeError:
-            raise Exception(
-                "Cache key function must be return an hashable cache key - be carefull with mutable types (list, dict, set) and non built-in types"
-            )
+            return arguments_key(tuple(cls.iter_arguments(function_signature, args, kwargs, ignore_fields)))
+        return arguments_key((cache_key_func(args, kwargs),))
+
+    @staticmethod
+    def compile_tags_function(tags: Tags | None) -> TagsFunction | None:
+        """Tags of a call's entry from its `(args, kwargs)`, None when the function isn't tagged"""
+        if tags is None:
+            return None
+        if callable(tags):
+            return lambda args, kwargs: tuple(tags(*args, **kwargs))
+        fixed = tuple(tags)
+        return (lambda args, kwargs: fixed) if fixed else None
+
+    @classmethod
+    def compile_cache_key_function(
+        cls,
+        function_signature: Signature,
+        cache_key_func: CacheKeyFunction | None,
+        ignore_fields: tuple[str, ...],
+    ) -> Callable[[tuple, dict], str]:
+        """
+        Build a cache key function specialized for the signature, meant to be created once at decoration time.
+
+        Calls that only pass positional arguments to a function without `*args`, `**kwargs` or keyword-only params
+        skip the `inspect` binding entirely and produce the same key as `create_cache_key`,
+        everything else falls back to it.
+        """
+
+        def generic(args: tuple, kwargs: dict) -> str:
+            return cls.create_cache_key(function_signature, cache_key_func, ignore_fields, args, kwargs)
+
+        parameters = list(function_signature.parameters.values())
+        positional_kinds = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)
+        if cache_key_func or any(param.kind not in positional_kinds for param in parameters):
+            return generic
+
+        names = tuple(param.name for param in parameters)
+        defaults = tuple(param.default for param in parameters if param.default is not param.empty)
+        total = len(names)
+        required = total - len(defaults)
+
+        kept = tuple(index for index, name in enumerate(names) if name not in ignore_fields)
+        kept_names = tuple(names[index] for index in kept)
+        all_kept = len(kept) == total
+
+        def positional(args: tuple, kwargs: dict) -> str:
+            count = len(args)
+            if kwargs or not required <= count <= total:
+                return generic(args, kwargs)
+
+            if count < total:
+                args += defaults[count - required :]
+            if all_kept:
+                return positional_key(names, args)
+            return positional_key(kept_names, tuple([args[index] for index in kept]))
+
+        return positional
 
     @classmethod
     def iter_arguments(cls, function_signature: Signature, args: tuple, kwargs: dict, ignore_fields: tuple[str, ...]):
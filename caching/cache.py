@@ -1,18 +1,25 @@
 import inspect
 import threading
-from typing import Callable
+from typing import Any, Callable, Iterable, Mapping
 
+from caching import clock
 from caching._async import async_decorator
 from caching._sync import sync_decorator
+from caching.backends import CacheBackend
 from caching.bucket import CacheBucket
-from caching.types import CacheKeyFunction, F, Number
+from caching.codecs import Codec
+from caching.eviction import EvictionPolicy, EvictionStats, MemoryStats
+from caching.features.warming import Warmup
+from caching.metrics import CacheStats, set_exporter, tracked_function_ids
+from caching.types import CacheKeyFunction, EvictionPolicyName, F, Number, Sizer, Tags
+from caching.utils.functions import get_function_id
 
 _CACHE_CLEAR_THREAD: threading.Thread | None = None
 _CACHE_CLEAR_LOCK: threading.Lock = threading.Lock()
 
 
 def _start_cache_clear_thread():
-    """This is to avoid memory leaks by clearing expired cache items periodically."""
+    """This is to avoid memory leaks by removing cached items as soon as they expire."""
     global _CACHE_CLEAR_THREAD
     with _CACHE_CLEAR_LOCK:
         if _CACHE_CLEAR_THREAD and _CACHE_CLEAR_THREAD.is_alive():
@@ -26,6 +33,24 @@ def cache(
     never_die: bool = False,
     cache_key_func: CacheKeyFunction | None = None,
     ignore_fields: tuple[str, ...] = (),
+    max_entries: int | None = None,
+    eviction_policy: EvictionPolicyName | type[EvictionPolicy] = "lru",
+    backend: CacheBackend | None = None,
+    codec: Codec | None = None,
+    stale_ttl: Number | None = None,
+    never_die_priority: int = 0,
+    never_die_retire_after: int | None = None,
+    never_die_adaptive: bool = False,
+    early_recompute: float | None = None,
+    ttl_jitter: float = 0,
+    batch_func: Callable[..., Any] | None = None,
+    max_batch_size: int | None = None,
+    batch_window_ms: Number | None = None,
+    tags: Tags | None = None,
+    max_bytes: int | None = None,
+    sizer: Sizer | None = None,
+    cache_exceptions: type[BaseException] | tuple[type[BaseException], ...] = (),
+    error_ttl: Number = 5,
 ) -> Callable[[F], F]:
     """
     A decorator that caches function results based on function id and arguments.
@@ -37,6 +62,36 @@ def cache(
         never_die: If True, the cache will never expire and will be recalculated based on the ttl
         cache_key_func: custom cache key function, used for more complex cache scenarios
         ignore_fields: tuple of strings with the function params that we want to ignore when creating the cache key
+        max_entries: maximum number of cached entries kept for this function, unbounded by default
+        eviction_policy: how entries are picked for eviction once `max_entries` is reached, "lru", "lfu", "tinylfu"
+            or an `EvictionPolicy` subclass
+        backend: where results are stored (e.g. a shared `RedisBackend`), defaults to the global default backend
+            set with `set_default_backend`, or the process local bucket
+        codec: how results are serialized for backends, defaults to pickle protocol 5 with out-of-band buffers
+        stale_ttl: seconds an expired result is still served for, while a single background call refreshes it
+        never_die_priority: never_die refreshes of higher priority functions go first when refreshes queue up
+        never_die_retire_after: number of refresh periods in a row without reads after which a never_die call
+            stops being refreshed and is removed from the cache, kept forever by default
+        never_die_adaptive: refresh never_die calls that go unread less often, down to once every 8 ttls
+        early_recompute: XFetch `beta`, reads recompute the entry ahead of its expiry with a probability growing
+            with the compute duration as the expiry gets closer, 1.0 is a good start and higher recomputes earlier
+        ttl_jitter: fraction of the ttl randomly cut off every entry, e.g. 0.1 for ttls between 90% and 100%,
+            so entries cached together don't all expire together
+        batch_func: bulk counterpart of the function, misses of different keys arriving together are coalesced
+            into one call receiving a list per parameter (`get_users(ids)` for `get_user(id)`), returning the
+            results in the same order, async for async functions
+        max_batch_size: misses per `batch_func` call, a full batch is sent right away, unbounded by default
+        batch_window_ms: how long a batch collects misses, defaults to 1ms for sync functions and to the current
+            event loop iteration for async ones
+        tags: tags of the cached entries, fixed or a function of the call's arguments returning them,
+            entries are removed by tag with `invalidate_tags`, only for functions cached in the process
+        max_bytes: memory quota of the function's entries, by estimated size, the largest of its least recently
+            used entries are evicted past it, only for functions cached in the process
+        sizer: estimates the bytes of a result for the memory budgets, defaults to the sizer given to
+            `set_memory_budget` or `estimate_size`
+        cache_exceptions: exception types cached like results when the function raises them, e.g. `TimeoutError`,
+            callers get the exception raised again instead of calling the function until `error_ttl` passes
+        error_ttl: seconds a cached exception is raised for, 5 by default, keep it short
 
     Features:
         - Works for both sync and async functions
@@ -47,11 +102,195 @@ def cache(
     if cache_key_func and ignore_fields:
         raise Exception("Either cache_key_func or ignore_fields can be provided, but not both")
 
+    if never_die and stale_ttl:
+        raise Exception("Either never_die or stale_ttl can be provided, but not both")
+
+    if max_batch_size is not None and max_batch_size < 1:
+        raise Exception("max_batch_size must be at least 1")
+
+    if isinstance(cache_exceptions, type):
+        cache_exceptions = (cache_exceptions,)
+    if cache_exceptions and error_ttl <= 0:
+        raise Exception("error_ttl must be positive")
+
     _start_cache_clear_thread()
 
     def decorator(function):
-        if inspect.iscoroutinefunction(function):
-            return async_decorator(function, ttl, never_die, cache_key_func, ignore_fields)
-        return sync_decorator(function, ttl, never_die, cache_key_func, ignore_fields)
+        function_id = get_function_id(function)
+        CacheBucket.set_max_entries(max_entries, eviction_policy, function_id)
+        CacheBucket.set_backend(backend, function_id)
+        CacheBucket.set_codec(codec, function_id)
+        CacheBucket.set_stale_ttl(stale_ttl, function_id)
+        CacheBucket.set_ttl_jitter(ttl_jitter, function_id)
+
+        if tags is not None and CacheBucket.get_backend(function_id) is not None:
+            raise Exception("tags are only supported for functions cached in the process, not in a backend")
+        if max_bytes is not None and CacheBucket.get_backend(function_id) is not None:
+            raise Exception("max_bytes is only supported for functions cached in the process, not in a backend")
+        if cache_exceptions and CacheBucket.get_backend(function_id) is not None:
+            raise Exception("cache_exceptions is only supported for functions cached in the process, not in a backend")
+        CacheBucket.set_sizer(sizer, function_id)
+        CacheBucket.set_memory_budget(max_bytes, function_id)
+
+        coroutine = inspect.iscoroutinefunction(function)
+        if batch_func is not None and inspect.iscoroutinefunction(batch_func) != coroutine:
+            raise Exception("batch_func must be async if and only if the cached function is")
+
+        wrap = async_decorator if coroutine else sync_decorator
+        return wrap(
+            function,
+            ttl,
+            never_die,
+            cache_key_func,
+            ignore_fields,
+            stale_ttl,
+            never_die_priority,
+            never_die_retire_after,
+            never_die_adaptive,
+            early_recompute,
+            batch_func,
+            max_batch_size,
+            batch_window_ms,
+            tags,
+            cache_exceptions,
+            error_ttl,
+        )
 
     return decorator
+
+
+def set_max_entries(
+    max_entries: int | None,
+    eviction_policy: EvictionPolicyName | type[EvictionPolicy] = "lru",
+) -> None:
+    """
+    Bound the total number of cached entries across all functions, on top of any per function `max_entries`.
+    Passing `None` removes the bound.
+    """
+    CacheBucket.set_max_entries(max_entries, eviction_policy)
+
+
+def eviction_stats() -> dict[str, EvictionStats]:
+    """Hits, misses and evictions of every bounded function, plus the global bound under the "*" key"""
+    return CacheBucket.eviction_stats()
+
+
+def set_memory_budget(max_bytes: int | None, sizer: Sizer | None = None) -> None:
+    """
+    Bound the estimated bytes of every cached entry together, on top of any per function `max_bytes`, evicting the
+    largest of the least recently used entries past it. `sizer` estimates the results of functions without their
+    own, `estimate_size` by default. Passing `max_bytes=None` removes the bound.
+    """
+    CacheBucket.set_sizer(sizer)
+    CacheBucket.set_memory_budget(max_bytes)
+
+
+def memory_stats() -> dict[str, MemoryStats]:
+    """Used bytes, per function as well, and evictions of every memory budget, the global one under the "*" key"""
+    return CacheBucket.memory_stats()
+
+
+def set_default_backend(backend: CacheBackend | None) -> None:
+    """Store the results of every function without its own `backend` in `backend`, `None` to go back to local"""
+    CacheBucket.set_backend(backend)
+
+
+def set_never_die_concurrency(max_workers: int | None) -> None:
+    """
+    Bound the number of sync never_die refreshes running at once, refreshes that come due meanwhile wait
+    their turn by priority. `None` uses the `ThreadPoolExecutor` default.
+    """
+    from caching.features.never_die import set_refresh_concurrency
+
+    set_refresh_concurrency(max_workers)
+
+
+def set_clock_resolution(resolution: Number | None) -> None:
+    """
+    Read expiry deadlines against a clock ticking every `resolution` seconds instead of the system clock,
+    trading up to `resolution` seconds of extra staleness for cheaper reads. `None` restores the precise clock.
+    """
+    clock.set_resolution(resolution)
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Remove every entry cached with any of the tags, across functions, never_die calls stop being refreshed"""
+    from caching.features.never_die import unregister_never_die_keys
+
+    # Unregistered first, so a refresh can't bring the entries back
+    unregister_never_die_keys(CacheBucket.tagged_keys(tags))
+    CacheBucket.delete_tags(tags)
+
+
+def cache_stats() -> dict[str, CacheStats]:
+    """Snapshot of the metrics of every cached function, keyed by function id"""
+    return CacheBucket.cache_stats(tracked_function_ids())
+
+
+def set_stats_exporter(exporter: Callable[[dict[str, CacheStats]], None] | None, interval: float = 10) -> None:
+    """
+    Call `exporter` with a `cache_stats()` snapshot every `interval` seconds, from a background thread,
+    e.g. to update prometheus gauges. `None` stops the current exporter.
+    """
+    set_exporter(None if exporter is None else lambda: exporter(cache_stats()), interval)
+
+
+def warm_all(
+    plan: Mapping[Callable[..., Any], Iterable[Any]], concurrency: int = 16, background: bool = False
+) -> Warmup:
+    """
+    Warm several sync cached functions at once, `plan` maps each function to its calls like `fn.warm`.
+    Every call shares the `concurrency` threads and the returned `Warmup`, which `background=True` returns
+    right away, e.g. for a readiness probe to wait on.
+    """
+    from caching.features.warming import warm_sync
+
+    if any(inspect.iscoroutinefunction(function) for function in plan):
+        raise Exception("warm_all only warms sync functions, use awarm_all for async ones")
+    return warm_sync(plan, concurrency, None, background)
+
+
+async def awarm_all(
+    plan: Mapping[Callable[..., Any], Iterable[Any]], concurrency: int = 16, warmup: Warmup | None = None
+) -> Warmup:
+    """Async `warm_all`, every call of the async functions shares the `concurrency` bound and the `Warmup`"""
+    from caching.features.warming import warm_async
+
+    if not all(inspect.iscoroutinefunction(function) for function in plan):
+        raise Exception("awarm_all only warms async functions, use warm_all for sync ones")
+    return await warm_async(plan, concurrency, warmup)
+
+
+def save_snapshot(path: str) -> int:
+    """
+    Write the process local cache to `path`, with wall clock deadlines so it can be loaded back after a restart.
+    Returns the number of entries written, results that can't be pickled are skipped.
+    """
+    from caching.features.snapshot import save_snapshot as save
+
+    return save(path)
+
+
+def load_snapshot(path: str, background: bool = True) -> int | None:
+    """
+    Load a snapshot written by `save_snapshot` or `set_snapshots`, a missing file loads nothing.
+    Entries are streamed in from a background thread by default so startup doesn't wait on the file,
+    with `background=False` they are loaded before returning how many were.
+    """
+    from caching.features.snapshot import load_snapshot as load
+    from caching.features.snapshot import load_snapshot_in_background
+
+    if not background:
+        return load(path)
+    load_snapshot_in_background(path)
+    return None
+
+
+def set_snapshots(path: str | None, interval: float | None = None, on_exit: bool = True) -> None:
+    """
+    Save the process local cache to `path` every `interval` seconds from a background thread,
+    and when the process exits unless `on_exit` is False. `None` stops saving.
+    """
+    from caching.features.snapshot import set_snapshots as set_saving
+
+    set_saving(path, interval, on_exit)
@@ -0,0 +1,42 @@
+import threading
+import time
+
+# Time of the last tick while the coarse clock runs, None when every read queries the monotonic clock
+coarse_now: float | None = None
+
+_TICKER: threading.Thread | None = None
+_TICKER_STOP: threading.Event = threading.Event()
+_TICKER_LOCK: threading.Lock = threading.Lock()
+
+
+def now() -> float:
+    """Monotonic time used for cache expiry, as of the last tick when the coarse clock runs"""
+    return coarse_now or time.monotonic()
+
+
+def set_resolution(resolution: float | None) -> None:
+    """
+    Update the expiry clock from a ticker thread every `resolution` seconds instead of querying it on every read,
+    entries may then be served up to `resolution` seconds past their ttl. `None` goes back to the precise clock.
+    """
+    global coarse_now, _TICKER, _TICKER_STOP
+    with _TICKER_LOCK:
+        _TICKER_STOP.set()
+        _TICKER = None
+        coarse_now = None
+        if resolution is None:
+            return
+
+        stop = _TICKER_STOP = threading.Event()
+        coarse_now = time.monotonic()
+        _TICKER = threading.Thread(target=_tick, args=(resolution, stop), daemon=True)
+        _TICKER.start()
+
+
+def _tick(resolution: float, stop: threading.Event):
+    global coarse_now
+    while not stop.wait(resolution):
+        with _TICKER_LOCK:
+            # A ticker stopped meanwhile must not overwrite the clock of the next setting
+            if not stop.is_set():
+                coarse_now = time.monotonic()
@@ -0,0 +1,6 @@
+from caching.codecs.base import Codec, payload_size
+from caching.codecs.compressed import CompressedCodec
+from caching.codecs.msgpack import MsgpackCodec
+from caching.codecs.pickle5 import PickleCodec
+
+__all__ = ["Codec", "CompressedCodec", "MsgpackCodec", "PickleCodec", "payload_size"]
@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from typing import Any, Sequence
+
+from caching.types import Buffer
+
+
+class Codec(ABC):
+    """
+    Serializes results for storage outside of the process.
+
+    `encode` returns a list of bytes-like chunks instead of a single bytes object, so large buffers can reach
+    the storage (a socket, shared memory) without being copied into an intermediate bytes object first.
+    `decode` receives the stored payload as one bytes-like object, and should slice it rather than copy it.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    def encode(self, value: Any) -> list[Buffer]: ...
+
+    @abstractmethod
+    def decode(self, data: Buffer) -> Any: ...
+
+
+def payload_size(chunks: Sequence[Buffer]) -> int:
+    return sum(memoryview(chunk).nbytes for chunk in chunks)
@@ -0,0 +1,45 @@
+import zlib
+from typing import Any
+
+from caching.codecs.base import Codec, payload_size
+from caching.codecs.pickle5 import PickleCodec
+from caching.types import Buffer
+
+_RAW = b"N"
+_ZLIB = b"Z"
+
+
+class CompressedCodec(Codec):
+    """
+    Wraps another codec and zlib compresses its payloads of at least `min_size` bytes.
+    The chunks of the wrapped codec are compressed as a stream, they are never joined.
+    """
+
+    name = "compressed"
+
+    def __init__(self, codec: Codec | None = None, level: int = 6, min_size: int = 1024):
+        self.codec = codec or PickleCodec()
+        self.level = level
+        self.min_size = min_size
+
+    def encode(self, value: Any) -> list[Buffer]:
+        chunks = self.codec.encode(value)
+        if payload_size(chunks) < self.min_size:
+            return [_RAW, *chunks]
+
+        compressor = zlib.compressobj(self.level)
+        compressed: list[Buffer] = [_ZLIB]
+        for chunk in chunks:
+            if data := compressor.compress(chunk):
+                compressed.append(data)
+        compressed.append(compressor.flush())
+        return compressed
+
+    def decode(self, data: Buffer) -> Any:
+        view = memoryview(data)
+        tag = view[:1]
+        if tag == _RAW:
+            return self.codec.decode(view[1:])
+        if tag == _ZLIB:
+            return self.codec.decode(zlib.decompress(view[1:]))
+        raise Exception(f"Unknown compressed codec payload tag {bytes(tag)!r}")
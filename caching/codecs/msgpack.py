@@ -0,0 +1,29 @@
+from typing import Any
+
+from caching.codecs.base import Codec
+from caching.types import Buffer
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class MsgpackCodec(Codec):
+    """
+    msgpack serialization, compact and fast for JSON-like results, requires the `msgpack` package.
+    Tuples come back as lists, and only msgpack serializable types are supported.
+    """
+
+    name = "msgpack"
+
+    def __init__(self, **packb_kwargs: Any):
+        if msgpack is None:
+            raise Exception("MsgpackCodec requires the msgpack package, install it with `pip install msgpack`")
+        self._packer = msgpack.Packer(use_bin_type=True, **packb_kwargs)
+
+    def encode(self, value: Any) -> list[Buffer]:
+        return [self._packer.pack(value)]
+
+    def decode(self, data: Buffer) -> Any:
+        return msgpack.unpackb(data, raw=False)
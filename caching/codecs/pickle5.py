@@ -0,0 +1,73 @@
+import pickle
+import struct
+from typing import Any
+
+from caching.codecs.base import Codec
+from caching.types import Buffer
+
+_BYTES = b"B"
+_BYTEARRAY = b"A"
+_MEMORYVIEW = b"M"
+_PICKLE = b"P"
+_COUNT = struct.Struct("<I")
+_LENGTH = struct.Struct("<Q")
+
+
+class PickleCodec(Codec):
+    """
+    Pickle protocol 5 with out-of-band buffers.
+
+    `bytes`, `bytearray` and `memoryview` results are stored raw, without pickling. Inside other results,
+    objects supporting out-of-band pickling (`pickle.PickleBuffer`, numpy arrays, ...) are not copied into the
+    pickle stream, their buffers are passed through as separate chunks and sliced back out of the payload on decode.
+    Plain bytes and bytearrays nested in a result are pickled in-band, wrap them in a `pickle.PickleBuffer`
+    to skip the copy.
+
+    Format: tag, then for pickles the buffer count, the pickle length, every buffer length, the pickle and the buffers.
+    """
+
+    name = "pickle"
+
+    def encode(self, value: Any) -> list[Buffer]:
+        value_type = type(value)
+        if value_type is bytes:
+            return [_BYTES, value]
+        if value_type is bytearray:
+            return [_BYTEARRAY, value]
+        if value_type is memoryview and value.c_contiguous:
+            return [_MEMORYVIEW, value.cast("B")]
+
+        buffers: list[pickle.PickleBuffer] = []
+        data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        raw_buffers = [buffer.raw() for buffer in buffers]
+
+        header = bytearray(_PICKLE)
+        header += _COUNT.pack(len(raw_buffers))
+        header += _LENGTH.pack(len(data))
+        for raw in raw_buffers:
+            header += _LENGTH.pack(raw.nbytes)
+        return [header, data, *raw_buffers]
+
+    def decode(self, data: Buffer) -> Any:
+        view = memoryview(data)
+        tag = view[:1]
+        if tag == _BYTES:
+            return bytes(view[1:])
+        if tag == _BYTEARRAY:
+            return bytearray(view[1:])
+        if tag == _MEMORYVIEW:
+            return view[1:]
+        if tag != _PICKLE:
+            raise Exception(f"Unknown pickle codec payload tag {bytes(tag)!r}")
+
+        (count,) = _COUNT.unpack_from(view, 1)
+        offset = 1 + _COUNT.size
+        lengths = [_LENGTH.unpack_from(view, offset + index * _LENGTH.size)[0] for index in range(count + 1)]
+        offset += len(lengths) * _LENGTH.size
+
+        slices = []
+        for length in lengths:
+            slices.append(view[offset : offset + length])
+            offset += length
+
+        return pickle.loads(slices[0], buffers=slices[1:])
@@ -0,0 +1,36 @@
+from caching.eviction.base import EvictionPolicy, EvictionStats
+from caching.eviction.budget import MemoryBudget, MemoryStats
+from caching.eviction.lfu import LFUPolicy
+from caching.eviction.lru import LRUPolicy
+from caching.eviction.tinylfu import TinyLFUPolicy
+from caching.types import EvictionPolicyName
+
+EVICTION_POLICIES: dict[str, type[EvictionPolicy]] = {
+    LRUPolicy.name: LRUPolicy,
+    LFUPolicy.name: LFUPolicy,
+    TinyLFUPolicy.name: TinyLFUPolicy,
+}
+
+
+def create_eviction_policy(
+    eviction_policy: EvictionPolicyName | type[EvictionPolicy],
+    max_entries: int,
+) -> EvictionPolicy:
+    if isinstance(eviction_policy, str):
+        if eviction_policy not in EVICTION_POLICIES:
+            raise Exception(f"Unknown eviction policy {eviction_policy!r}, expected one of {list(EVICTION_POLICIES)}")
+        eviction_policy = EVICTION_POLICIES[eviction_policy]
+    return eviction_policy(max_entries)
+
+
+__all__ = [
+    "EvictionPolicy",
+    "EvictionStats",
+    "LRUPolicy",
+    "LFUPolicy",
+    "TinyLFUPolicy",
+    "MemoryBudget",
+    "MemoryStats",
+    "EVICTION_POLICIES",
+    "create_eviction_policy",
+]
@@ -0,0 +1,82 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Hashable
+
+
+@dataclass
+class EvictionStats:
+    policy: str
+    max_entries: int
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EvictionPolicy(ABC):
+    """
+    Base class for eviction policies.
+
+    Policies only keep track of keys, the cached values live in the `CacheBucket`.
+    All methods are expected to run in O(1) and are called with the bucket policy lock held.
+    """
+
+    name: str = "base"
+
+    def __init__(self, max_entries: int):
+        if max_entries < 1:
+            raise Exception("max_entries must be a positive integer")
+        self.max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def __contains__(self, key: Hashable) -> bool: ...
+
+    @abstractmethod
+    def on_hit(self, key: Hashable) -> None:
+        """Called when a tracked key is read from the cache"""
+
+    def on_miss(self, key: Hashable) -> None:
+        """Called when a key is looked up but not found in the cache"""
+
+    @abstractmethod
+    def on_insert(self, key: Hashable) -> Hashable | None:
+        """
+        Called when a key is stored in the cache.
+        Returns the key that must be evicted to stay within `max_entries`, which may be the inserted key itself
+        when the policy refuses to admit it.
+        """
+
+    @abstractmethod
+    def discard(self, key: Hashable) -> None:
+        """Called when a key leaves the cache for reasons other than this policy (expiry, other policies, clear)"""
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    def record_hit(self, key: Hashable) -> None:
+        self._hits += 1
+        self.on_hit(key)
+
+    def record_miss(self, key: Hashable) -> None:
+        self._misses += 1
+        self.on_miss(key)
+
+    def admit(self, key: Hashable) -> Hashable | None:
+        victim = self.on_insert(key)
+        if victim is not None:
+            self._evictions += 1
+        return victim
+
+    def stats(self) -> EvictionStats:
+        return EvictionStats(self.name, self.max_entries, len(self), self._hits, self._misses, self._evictions)
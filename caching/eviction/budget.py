@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import islice
+
+# Least recently used keys among which the largest is evicted
+DEFAULT_SAMPLE = 5
+
+
+@dataclass
+class MemoryStats:
+    max_bytes: int
+    used_bytes: int = 0
+    entries: int = 0
+    evictions: int = 0
+    # Estimated bytes per function id, a function's quota only has its own
+    usage: dict[str, int] = field(default_factory=dict)
+
+
+class MemoryBudget:
+    """
+    Bound on the estimated bytes of the entries it tracks, keyed by (function id, cache key).
+
+    Keys are kept in least recently used order with their size. Over the budget, the largest of the `sample`
+    least recently used keys is evicted first, so a cold 2MB result goes before thousands of cold small ones,
+    until the entries fit again. Like eviction policies, methods are called with the bucket policy lock held.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int, sample: int = DEFAULT_SAMPLE):
+        if max_bytes < 1:
+            raise Exception("max_bytes must be a positive integer")
+        self.max_bytes = max_bytes
+        self.sample = sample
+        self.used = 0
+        self._sizes: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._usage: dict[str, int] = {}
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._sizes
+
+    def usage(self, function_id: str) -> int:
+        return self._usage.get(function_id, 0)
+
+    def record_hit(self, key: tuple[str, str]) -> None:
+        if key in self._sizes:
+            self._sizes.move_to_end(key)
+
+    def admit(self, key: tuple[str, str], size: int) -> list[tuple[str, str]]:
+        """
+        Track a stored key of `size` bytes, returns the keys to evict to fit within the budget again,
+        the key itself when it is larger than the whole budget.
+        """
+        self.discard(key)
+        if size > self.max_bytes:
+            self._evictions += 1
+            return [key]
+
+        self._sizes[key] = size
+        self._account(key[0], size)
+        victims = []
+        while self.used > self.max_bytes:
+            # The stored key is the most recently used, only a sample spanning every key can include it
+            candidates = [item for item in islice(self._sizes.items(), self.sample) if item[0] != key]
+            victim = max(candidates, key=lambda item: item[1])[0]
+            self.discard(victim)
+            self._evictions += 1
+            victims.append(victim)
+        return victims
+
+    def discard(self, key: tuple[str, str]) -> None:
+        if (size := self._sizes.pop(key, None)) is not None:
+            self._account(key[0], -size)
+
+    def clear(self) -> None:
+        self._sizes.clear()
+        self._usage.clear()
+        self.used = 0
+
+    def stats(self) -> MemoryStats:
+        return MemoryStats(self.max_bytes, self.used, len(self._sizes), self._evictions, dict(self._usage))
+
+    def _account(self, function_id: str, size: int):
+        self.used += size
+        if usage := self._usage.get(function_id, 0) + size:
+            self._usage[function_id] = usage
+        else:
+            self._usage.pop(function_id, None)
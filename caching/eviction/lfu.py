@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from typing import Hashable
+
+from caching.eviction.base import EvictionPolicy
+
+
+class LFUPolicy(EvictionPolicy):
+    """
+    Least frequently used, evicts the key with the fewest reads (ties broken by recency).
+
+    Keys are grouped in per-frequency buckets, linked in frequency order, so every operation is O(1).
+    """
+
+    name = "lfu"
+
+    def __init__(self, max_entries: int):
+        super().__init__(max_entries)
+        self._frequencies: dict[Hashable, int] = {}
+        self._buckets: dict[int, OrderedDict[Hashable, None]] = {}
+        # Neighbouring bucket frequencies, 0 is the sentinel so _higher[0] is the minimum frequency
+        self._higher: dict[int, int] = {0: 0}
+        self._lower: dict[int, int] = {0: 0}
+
+    def __len__(self) -> int:
+        return len(self._frequencies)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._frequencies
+
+    def _push(self, key: Hashable, frequency: int, lower: int) -> None:
+        bucket = self._buckets.get(frequency)
+        if bucket is None:
+            bucket = self._buckets[frequency] = OrderedDict()
+            higher = self._higher[lower]
+            self._higher[lower], self._lower[frequency] = frequency, lower
+            self._higher[frequency], self._lower[higher] = higher, frequency
+        bucket[key] = None
+
+    def _remove(self, key: Hashable, frequency: int) -> None:
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+            lower, higher = self._lower.pop(frequency), self._higher.pop(frequency)
+            self._higher[lower], self._lower[higher] = higher, lower
+
+    def _increment(self, key: Hashable) -> None:
+        frequency = self._frequencies[key]
+        self._push(key, frequency + 1, frequency)
+        self._remove(key, frequency)
+        self._frequencies[key] = frequency + 1
+
+    def on_hit(self, key: Hashable) -> None:
+        if key in self._frequencies:
+            self._increment(key)
+
+    def on_insert(self, key: Hashable) -> Hashable | None:
+        if key in self._frequencies:
+            self._increment(key)
+            return None
+
+        victim = None
+        if len(self._frequencies) >= self.max_entries:
+            frequency = self._higher[0]
+            victim = next(iter(self._buckets[frequency]))
+            self._remove(victim, frequency)
+            del self._frequencies[victim]
+
+        self._frequencies[key] = 1
+        self._push(key, 1, 0)
+        return victim
+
+    def discard(self, key: Hashable) -> None:
+        frequency = self._frequencies.pop(key, None)
+        if frequency is not None:
+            self._remove(key, frequency)
+
+    def clear(self) -> None:
+        self._frequencies.clear()
+        self._buckets.clear()
+        self._higher = {0: 0}
+        self._lower = {0: 0}
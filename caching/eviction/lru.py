@@ -0,0 +1,40 @@
+from collections import OrderedDict
+from typing import Hashable
+
+from caching.eviction.base import EvictionPolicy
+
+
+class LRUPolicy(EvictionPolicy):
+    """Least recently used, evicts the key that was read or written the longest time ago"""
+
+    name = "lru"
+
+    def __init__(self, max_entries: int):
+        super().__init__(max_entries)
+        self._order: OrderedDict[Hashable, None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._order
+
+    def on_hit(self, key: Hashable) -> None:
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def on_insert(self, key: Hashable) -> Hashable | None:
+        if key in self._order:
+            self._order.move_to_end(key)
+            return None
+
+        self._order[key] = None
+        if len(self._order) > self.max_entries:
+            return self._order.popitem(last=False)[0]
+        return None
+
+    def discard(self, key: Hashable) -> None:
+        self._order.pop(key, None)
+
+    def clear(self) -> None:
+        self._order.clear()
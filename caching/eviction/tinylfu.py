@@ -0,0 +1,157 @@
+from collections import OrderedDict
+from typing import Hashable
+
+from caching.eviction.base import EvictionPolicy
+
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+_MASK_64 = (1 << 64) - 1
+_MAX_COUNT = 15
+_HALVE = bytes(count >> 1 for count in range(256))
+
+
+class CountMinSketch:
+    """
+    Approximate frequency counter with 4-bit saturating counters.
+
+    The first sighting of a key only sets its bits in a doorkeeper filter, so the flood of keys that are
+    requested once doesn't pollute the counters. Every `sample_size` increments all counters are halved and
+    the doorkeeper is cleared, so the history ages and keys that were popular a long time ago don't stay
+    in the cache forever.
+    """
+
+    def __init__(self, width: int, sample_size: int):
+        self._width = 1 << max(width - 1, 1).bit_length()
+        self._mask = self._width - 1
+        self._rows = [bytearray(self._width) for _ in _SEEDS]
+        self._doorkeeper = bytearray(self._width)
+        self._doorkeeper_mask = self._width * 8 - 1
+        self._sample_size = sample_size
+        self._additions = 0
+
+    def _hash(self, key: Hashable) -> int:
+        return hash(key) & _MASK_64
+
+    def _indexes(self, h: int) -> list[int]:
+        return [(((h ^ seed) * 0xFF51AFD7ED558CCD) & _MASK_64) >> 32 & self._mask for seed in _SEEDS]
+
+    def _doorkeeper_bits(self, h: int) -> tuple[int, int]:
+        return h & self._doorkeeper_mask, (h >> 32) & self._doorkeeper_mask
+
+    def _in_doorkeeper(self, h: int) -> bool:
+        return all(self._doorkeeper[bit >> 3] & (1 << (bit & 7)) for bit in self._doorkeeper_bits(h))
+
+    def increment(self, key: Hashable) -> None:
+        h = self._hash(key)
+        if not self._in_doorkeeper(h):
+            for bit in self._doorkeeper_bits(h):
+                self._doorkeeper[bit >> 3] |= 1 << (bit & 7)
+        else:
+            for row, index in zip(self._rows, self._indexes(h)):
+                if row[index] < _MAX_COUNT:
+                    row[index] += 1
+
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._reset()
+
+    def estimate(self, key: Hashable) -> int:
+        h = self._hash(key)
+        count = min(row[index] for row, index in zip(self._rows, self._indexes(h)))
+        return count + 1 if self._in_doorkeeper(h) else count
+
+    def _reset(self) -> None:
+        self._additions //= 2
+        self._doorkeeper[:] = bytes(self._width)
+        for row in self._rows:
+            row[:] = row.translate(_HALVE)
+
+    def clear(self) -> None:
+        self._additions = 0
+        self._doorkeeper[:] = bytes(self._width)
+        for row in self._rows:
+            row[:] = bytes(self._width)
+
+
+class TinyLFUPolicy(EvictionPolicy):
+    """
+    Window TinyLFU: a small LRU window in front of a segmented LRU main area.
+
+    New keys enter the window, and when the window overflows its oldest key only makes it into the
+    main area if the frequency sketch says it is requested more often than the main area's victim.
+    One-hit wonders are therefore rejected instead of flushing the hot set.
+    """
+
+    name = "tinylfu"
+
+    def __init__(self, max_entries: int):
+        super().__init__(max_entries)
+        self._window_max = max(1, max_entries // 100)
+        self._main_max = max(0, max_entries - self._window_max)
+        self._protected_max = int(self._main_max * 0.8)
+
+        self._window: OrderedDict[Hashable, None] = OrderedDict()
+        self._probation: OrderedDict[Hashable, None] = OrderedDict()
+        self._protected: OrderedDict[Hashable, None] = OrderedDict()
+        self._sketch = CountMinSketch(4 * max_entries, sample_size=10 * max_entries)
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._window or key in self._probation or key in self._protected
+
+    def _touch(self, key: Hashable) -> None:
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+            if len(self._protected) > self._protected_max:
+                demoted, _ = self._protected.popitem(last=False)
+                self._probation[demoted] = None
+
+    def on_hit(self, key: Hashable) -> None:
+        self._sketch.increment(key)
+        self._touch(key)
+
+    def on_miss(self, key: Hashable) -> None:
+        self._sketch.increment(key)
+
+    def on_insert(self, key: Hashable) -> Hashable | None:
+        if key in self:
+            self._touch(key)
+            return None
+
+        self._window[key] = None
+        if len(self._window) <= self._window_max:
+            return None
+
+        candidate, _ = self._window.popitem(last=False)
+        if len(self._probation) + len(self._protected) < self._main_max:
+            self._probation[candidate] = None
+            return None
+
+        victims = self._probation or self._protected
+        if not victims:
+            return candidate
+
+        victim = next(iter(victims))
+        if self._sketch.estimate(candidate) <= self._sketch.estimate(victim):
+            return candidate
+
+        del victims[victim]
+        self._probation[candidate] = None
+        return victim
+
+    def discard(self, key: Hashable) -> None:
+        for segment in (self._window, self._probation, self._protected):
+            if segment.pop(key, 0) is None:
+                return
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._probation.clear()
+        self._protected.clear()
+        self._sketch.clear()
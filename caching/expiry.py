@@ -0,0 +1,76 @@
+import heapq
+import math
+import threading
+import time
+from typing import Callable, Hashable
+
+# Below this size the heap is never compacted, stale items are cheap enough to just pop when due
+_MIN_COMPACTION_SIZE = 1024
+
+
+class ExpiryIndex:
+    """
+    Min-heaps of (expires_at, key) deadlines used by the reaper to only touch entries that are due.
+
+    Overwritten or removed entries are not searched for in the heaps, their items stay until they are due
+    and the reaper skips them when the deadline no longer matches the cached entry.
+
+    With several `stripes`, items are spread over heaps with their own lock so concurrent pushes don't queue on
+    one lock, pushes pick theirs, e.g. the shard of their key. Pushes only take the lock of the reaper when their
+    deadline is earlier than the one it sleeps until.
+    """
+
+    def __init__(self, stripes: int = 1):
+        self._heaps: tuple[list[tuple[float, Hashable]], ...] = tuple([] for _ in range(stripes))
+        self._locks = tuple(threading.Lock() for _ in range(stripes))
+        self._condition = threading.Condition(threading.Lock())
+        # Deadline the reaper sleeps until, infinite while it is awake so every push wakes it up again
+        self._next_due = math.inf
+
+    def __len__(self) -> int:
+        return sum(len(heap) for heap in self._heaps)
+
+    def push(self, expires_at: float, key: Hashable, stripe: int = 0) -> None:
+        with self._locks[stripe]:
+            heapq.heappush(self._heaps[stripe], (expires_at, key))
+        # Read without the lock, the reaper resets it under the lock before it looks at the heaps
+        if expires_at < self._next_due:
+            with self._condition:
+                if expires_at < self._next_due:
+                    self._next_due = expires_at
+                    self._condition.notify()
+
+    def wait_for_due(self, clock=time.monotonic) -> list[tuple[float, Hashable]]:
+        """Block until at least one deadline is due and pop every due item"""
+        with self._condition:
+            while True:
+                self._next_due = math.inf
+                now = clock()
+                due = []
+                next_due = math.inf
+                for heap, lock in zip(self._heaps, self._locks):
+                    with lock:
+                        while heap and heap[0][0] <= now:
+                            due.append(heapq.heappop(heap))
+                        if heap and heap[0][0] < next_due:
+                            next_due = heap[0][0]
+                if due:
+                    return due
+
+                self._next_due = next_due
+                self._condition.wait(None if next_due == math.inf else next_due - now)
+
+    def needs_compaction(self, live_entries: int) -> bool:
+        return len(self) > max(2 * live_entries, _MIN_COMPACTION_SIZE)
+
+    def compact(self, is_live: Callable[[float, Hashable], bool]) -> None:
+        """Drop the items whose entry was overwritten or removed, one stripe at a time so pushes aren't lost"""
+        for heap, lock in zip(self._heaps, self._locks):
+            with lock:
+                heap[:] = [item for item in heap if is_live(*item)]
+                heapq.heapify(heap)
+
+    def clear(self) -> None:
+        for heap, lock in zip(self._heaps, self._locks):
+            with lock:
+                heap.clear()
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+from asyncio import AbstractEventLoop
+from concurrent.futures import Future
+from inspect import Signature
+from typing import Any, Callable, Sequence
+
+# How long a sync batch collects misses when no window is given, async batches default to one loop tick
+DEFAULT_SYNC_WINDOW = 0.001
+
+# Batch calls in flight, referenced until they finish so they aren't garbage collected mid-run
+_BATCH_TASKS: set[asyncio.Task] = set()
+
+
+def _columns(function_signature: Signature, calls: list[tuple[tuple, dict]]) -> list[list[Any]]:
+    """Arguments of the calls transposed per parameter, defaults included, `get_user(id)` calls give `[ids]`"""
+    rows = []
+    for args, kwargs in calls:
+        bound = function_signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        rows.append(tuple(bound.arguments.values()))
+    return [list(column) for column in zip(*rows)]
+
+
+def _check_results(results: Sequence[Any], calls: int) -> Sequence[Any]:
+    if len(results) != calls:
+        raise Exception(f"batch_func returned {len(results)} results for {calls} calls")
+    return results
+
+
+class _Batch:
+    __slots__ = ("calls", "futures", "closed")
+
+    def __init__(self):
+        self.calls: list[tuple[tuple, dict]] = []
+        self.futures: list[Any] = []
+        self.closed = threading.Event()
+
+
+class SyncBatcher:
+    """
+    Coalesces the misses of a function arriving within `window` seconds into one `batch_func` call.
+
+    The first miss of a batch waits out the window and runs the batch, unless another miss fills it to
+    `max_batch_size` first and runs it right away. Every caller blocks until its own result is fanned back.
+    """
+
+    def __init__(
+        self,
+        batch_func: Callable[..., Sequence[Any]],
+        function_signature: Signature,
+        max_batch_size: int | None,
+        window: float | None,
+    ):
+        self.batch_func = batch_func
+        self.function_signature = function_signature
+        self.max_batch_size = max_batch_size
+        self.window = DEFAULT_SYNC_WINDOW if window is None else window
+        self._batch: _Batch | None = None
+        self._lock = threading.Lock()
+
+    def load(self, *args: Any, **kwargs: Any) -> Any:
+        future: Future = Future()
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if batch is None:
+                batch = self._batch = _Batch()
+            batch.calls.append((args, kwargs))
+            batch.futures.append(future)
+            full = self.max_batch_size is not None and len(batch.calls) >= self.max_batch_size
+            if full:
+                self._batch = None
+                batch.closed.set()
+
+        if full:
+            self._run(batch)
+        elif leader and not batch.closed.wait(self.window):
+            with self._lock:
+                # A miss filling the batch meanwhile closed it and runs it itself
+                due = self._batch is batch
+                if due:
+                    self._batch = None
+                    batch.closed.set()
+            if due:
+                self._run(batch)
+        return future.result()
+
+    def _run(self, batch: _Batch):
+        try:
+            results = _check_results(self.batch_func(*_columns(self.function_signature, batch.calls)), len(batch.calls))
+        except BaseException as exception:
+            for future in batch.futures:
+                future.set_exception(exception)
+            return
+        for future, result in zip(batch.futures, results):
+            future.set_result(result)
+
+
+class AsyncBatcher:
+    """
+    Coalesces the misses of a function into one `batch_func` call, per event loop.
+
+    A batch collects the misses of the current loop iteration, or of `window` seconds when one is given,
+    and runs as soon as it reaches `max_batch_size`.
+    """
+
+    def __init__(
+        self,
+        batch_func: Callable[..., Any],
+        function_signature: Signature,
+        max_batch_size: int | None,
+        window: float | None,
+    ):
+        self.batch_func = batch_func
+        self.function_signature = function_signature
+        self.max_batch_size = max_batch_size
+        self.window = window
+        # Futures belong to their loop, each loop collects its own batch, no awaits happen while one is updated
+        self._batches: dict[AbstractEventLoop, _Batch] = {}
+
+    async def load(self, *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if (batch := self._batches.get(loop)) is None:
+            batch = self._batches[loop] = _Batch()
+            if self.window:
+                loop.call_later(self.window, self._close, loop, batch)
+            else:
+                loop.call_soon(self._close, loop, batch)
+
+        future = loop.create_future()
+        batch.calls.append((args, kwargs))
+        batch.futures.append(future)
+        if self.max_batch_size is not None and len(batch.calls) >= self.max_batch_size:
+            self._close(loop, batch)
+        return await future
+
+    def _close(self, loop: AbstractEventLoop, batch: _Batch):
+        # The timer of a batch closed early by its size still fires
+        if self._batches.get(loop) is not batch:
+            return
+        del self._batches[loop]
+        task = loop.create_task(self._run(batch))
+        _BATCH_TASKS.add(task)
+        task.add_done_callback(_BATCH_TASKS.discard)
+
+    async def _run(self, batch: _Batch):
+        try:
+            results = _check_results(
+                await self.batch_func(*_columns(self.function_signature, batch.calls)), len(batch.calls)
+            )
+        except asyncio.CancelledError:
+            # Callers would otherwise wait forever for results that never come
+            for future in batch.futures:
+                future.cancel()
+            raise
+        except BaseException as exception:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(exception)
+            return
+        for future, result in zip(batch.futures, results):
+            # Callers cancelled while waiting have their future cancelled already
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,28 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+# Misses of a bulk call computed at once when the caller doesn't bound it
+DEFAULT_CONCURRENCY = 16
+
+
+def run_in_threads(computes: list[Callable[[], Any]], max_concurrency: int) -> list[Any]:
+    """Results of `computes` in order, run on up to `max_concurrency` threads, the first exception is raised"""
+    if len(computes) <= 1 or max_concurrency <= 1:
+        return [compute() for compute in computes]
+    # A pool per call, a shared one could deadlock when computes make bulk calls themselves
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(computes))) as pool:
+        return list(pool.map(lambda compute: compute(), computes))
+
+
+async def gather_limited(computes: list[Callable[[], Awaitable[Any]]], max_concurrency: int) -> list[Any]:
+    """Results of `computes` in order, at most `max_concurrency` of them awaited at once"""
+    if len(computes) <= 1:
+        return [await compute() for compute in computes]
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def limited(compute: Callable[[], Awaitable[Any]]) -> Any:
+        async with semaphore:
+            return await compute()
+
+    return list(await asyncio.gather(*(limited(compute) for compute in computes)))
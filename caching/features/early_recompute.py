@@ -0,0 +1,35 @@
+import math
+import random
+
+from caching import clock
+from caching.bucket import NEVER, CacheEntry
+
+# Weight of the latest compute duration in the moving average
+_SMOOTHING = 0.2
+
+
+class EarlyRecompute:
+    """
+    Probabilistic early recomputation (XFetch) for the entries of a function.
+
+    Every read recomputes the entry ahead of its expiry with a probability that grows as the expiry gets closer
+    and as computing the result gets slower: `now - delta * beta * log(random()) >= expires_at`, `delta` being
+    the moving average of the function's compute duration. Each worker draws on its own, so instead of every
+    worker recomputing at the ttl boundary, a single early read usually refreshes the entry for everyone.
+    Higher `beta` recomputes earlier.
+    """
+
+    __slots__ = ("beta", "delta")
+
+    def __init__(self, beta: float):
+        self.beta = beta
+        self.delta = 0.0
+
+    def record(self, duration: float) -> None:
+        self.delta = duration if not self.delta else self.delta + _SMOOTHING * (duration - self.delta)
+
+    def should_recompute(self, entry: CacheEntry) -> bool:
+        if entry.expires_at == NEVER or not self.delta:
+            return False
+        # 1 - random() is in (0, 1], log() of it is never undefined
+        return clock.now() - self.delta * self.beta * math.log(1 - random.random()) >= entry.expires_at
@@ -0,0 +1,32 @@
+from typing import Any, NoReturn
+
+
+class CachedError:
+    """
+    An exception cached in place of a result, raised again to every caller until it expires.
+
+    Every raise starts again from the traceback of the original call, so a cached error read a million times
+    doesn't keep a million frames alive. Only cached in the process, it is never written to snapshots.
+    """
+
+    __slots__ = ("exception", "traceback")
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+        self.traceback = exception.__traceback__
+
+    def __repr__(self) -> str:
+        return f"CachedError({self.exception!r})"
+
+    def __reduce__(self):
+        raise TypeError("Cached exceptions are only kept in the process")
+
+    def reraise(self) -> NoReturn:
+        raise self.exception.with_traceback(self.traceback)
+
+
+def unwrap(result: Any) -> Any:
+    """A cached result, raising it instead when it is a cached exception"""
+    if type(result) is CachedError:
+        result.reraise()
+    return result
@@ -1,165 +1,227 @@
 import asyncio
-import functools
 import inspect
+import itertools
+import queue
 import threading
 import time
 from asyncio import AbstractEventLoop
-from concurrent.futures import Future as ConcurrentFuture
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 
-from caching._async.lock import _ASYNC_LOCKS
-from caching._sync.lock import _SYNC_LOCKS
+from caching._async.flight import _ASYNC_FLIGHTS
+from caching._sync.flight import _SYNC_FLIGHTS
 from caching.bucket import CacheBucket
 from caching.config import logger
-from caching.types import CacheKeyFunction, Number
-from caching.utils.functions import get_function_id
+from caching.expiry import ExpiryIndex
+from caching.metrics import record_refresh_failure
+from caching.types import Number
 
 _NEVER_DIE_THREAD: threading.Thread | None = None
 _NEVER_DIE_LOCK: threading.Lock = threading.Lock()
-_NEVER_DIE_REGISTRY: list["NeverDieCacheEntry"] = []
-_NEVER_DIE_CACHE_THREADS: dict[str, threading.Thread] = {}
-_NEVER_DIE_CACHE_FUTURES: dict[str, ConcurrentFuture] = {}
+_NEVER_DIE_REGISTRY: dict[tuple[str, str], "NeverDieCacheEntry"] = {}
+# Registered cache keys per function id, so a function is unregistered without scanning the whole registry
+_NEVER_DIE_FUNCTION_KEYS: dict[str, set[str]] = {}
+# Refresh deadlines of the registered entries, the scheduler sleeps until the next one is due
+_NEVER_DIE_SCHEDULE: ExpiryIndex = ExpiryIndex()
 
+# Sync refreshes run in a bounded pool, every job refreshes the highest priority entry ready at that moment
+_NEVER_DIE_EXECUTOR: ThreadPoolExecutor | None = None
+_NEVER_DIE_MAX_WORKERS: int | None = None
+_NEVER_DIE_READY: queue.PriorityQueue[tuple[int, float, int, "NeverDieCacheEntry"]] = queue.PriorityQueue()
+_NEVER_DIE_SEQUENCE = itertools.count()
 
-@dataclass
+# Adaptive entries that go unread are refreshed at most this many times less often than their ttl
+_MAX_SLOWDOWN = 8
+
+
+@dataclass(eq=False)
 class NeverDieCacheEntry:
+    id: str
+    cache_key: str
     function: Callable[..., Any]
     ttl: Number
     args: tuple
     kwargs: dict
-    cache_key_func: CacheKeyFunction | None
-    ignore_fields: tuple[str, ...]
     loop: AbstractEventLoop | None
+    priority: int = 0
+    retire_after: int | None = None
+    adaptive: bool = False
 
     def __post_init__(self):
         self._backoff: float = 1
         self._expires_at: float = time.monotonic() + self.ttl
-
-    @functools.cached_property
-    def id(self) -> str:
-        return get_function_id(self.function)
-
-    @functools.cached_property
-    def cache_key(self) -> str:
-        function_signature = inspect.signature(self.function)
-        return CacheBucket.create_cache_key(
-            function_signature,
-            self.cache_key_func,
-            self.ignore_fields,
-            self.args,
-            self.kwargs,
-        )
-
-    def __eq__(self, other: Any) -> bool:
-        if not isinstance(other, NeverDieCacheEntry):
-            return False
-        return self.id == other.id and self.cache_key == other.cache_key
-
-    def __hash__(self) -> int:
-        return hash((self.id, self.cache_key))
+        # Reads since the last refresh came due, and refresh periods in a row that went unread
+        self.reads: int = 0
+        self.idle_refreshes: int = 0
 
     def is_expired(self) -> bool:
         return time.monotonic() > self._expires_at
 
+    def schedule(self):
+        _NEVER_DIE_SCHEDULE.push(self._expires_at, (self.id, self.cache_key))
+
     def reset(self):
         self._backoff = 1
-        self._expires_at = time.monotonic() + self.ttl
+        self._expires_at = time.monotonic() + self.ttl * self._slowdown()
+        self.schedule()
+
+    def _slowdown(self) -> int:
+        if not self.adaptive:
+            return 1
+        return min(1 << self.idle_refreshes, _MAX_SLOWDOWN)
+
+    def record_refresh_period(self) -> bool:
+        """Called when a refresh comes due, returns whether the entry went unread for too long to be kept"""
+        idle = self.reads == 0
+        self.reads = 0
+        self.idle_refreshes = self.idle_refreshes + 1 if idle else 0
+        return self.retire_after is not None and self.idle_refreshes >= self.retire_after
 
     def revive(self):
         self._backoff = min(self._backoff * 1.25, 10)
         self._expires_at = time.monotonic() + self.ttl * self._backoff
+        self.schedule()
 
 
 def _run_sync_function_and_cache(entry: NeverDieCacheEntry):
     """Run a function and cache its result"""
-    with _SYNC_LOCKS[entry.id][entry.cache_key]:
-        try:
-            result = entry.function(*entry.args, **entry.kwargs)
-            CacheBucket.set(entry.id, entry.cache_key, result, None)
-            entry.reset()
 
-        except BaseException:
-            entry.revive()
-            logger.debug(
-                f"Exception caching {entry.function.__qualname__}, reviving previous entry",
-                exc_info=True,
-            )
+    def compute() -> Any:
+        result = entry.function(*entry.args, **entry.kwargs)
+        # Invalidated while refreshing, the result must not bring the entry back
+        if _is_registered(entry):
+            CacheBucket.set(entry.id, entry.cache_key, result, None)
+        return result
+
+    try:
+        _SYNC_FLIGHTS.run(entry.id, entry.cache_key, compute, fresh=True)
+        entry.reset()
+
+    except BaseException:
+        entry.revive()
+        record_refresh_failure(entry.id)
+        logger.debug(
+            f"Exception caching {entry.function.__qualname__}, reviving previous entry",
+            exc_info=True,
+        )
 
 
 async def _run_async_function_and_cache(entry: NeverDieCacheEntry):
     """Run a function and cache its result"""
-    async with _ASYNC_LOCKS[entry.id][entry.cache_key]:
-        try:
-            result = await entry.function(*entry.args, **entry.kwargs)
-            CacheBucket.set(entry.id, entry.cache_key, result, None)
-            entry.reset()
-
-        except BaseException:
-            entry.revive()
-            logger.debug(
-                f"Exception caching {entry.function.__qualname__}, reviving previous entry",
-                exc_info=True,
-            )
-
-
-def _cache_is_being_set(entry: NeverDieCacheEntry) -> bool:
-    if entry.loop:
-        return entry.cache_key in _NEVER_DIE_CACHE_FUTURES and not _NEVER_DIE_CACHE_FUTURES[entry.cache_key].done()
-    return entry.cache_key in _NEVER_DIE_CACHE_THREADS and _NEVER_DIE_CACHE_THREADS[entry.cache_key].is_alive()
-
 
-def _clear_dead_futures():
-    """Clear dead futures from the cache future registry"""
-    for cache_key, thread in list(_NEVER_DIE_CACHE_FUTURES.items()):
-        if thread.done():
-            del _NEVER_DIE_CACHE_FUTURES[cache_key]
+    async def compute() -> Any:
+        result = await entry.function(*entry.args, **entry.kwargs)
+        if _is_registered(entry):
+            await CacheBucket.aset(entry.id, entry.cache_key, result, None)
+        return result
+
+    try:
+        await _ASYNC_FLIGHTS.run(entry.id, entry.cache_key, compute, fresh=True)
+        entry.reset()
+
+    except BaseException:
+        entry.revive()
+        record_refresh_failure(entry.id)
+        logger.debug(
+            f"Exception caching {entry.function.__qualname__}, reviving previous entry",
+            exc_info=True,
+        )
 
 
-def _clear_dead_threads():
-    """Clear dead threads from the cache thread registry"""
-    for cache_key, thread in list(_NEVER_DIE_CACHE_THREADS.items()):
-        if not thread.is_alive():
-            del _NEVER_DIE_CACHE_THREADS[cache_key]
+def _is_registered(entry: NeverDieCacheEntry) -> bool:
+    return _NEVER_DIE_REGISTRY.get((entry.id, entry.cache_key)) is entry
 
 
-def _refresh_never_die_caches():
-    """Background thread function that periodically refreshes never_die cache entries"""
-    while True:
-        try:
-            for entry in list(_NEVER_DIE_REGISTRY):
-                if not entry.is_expired():
-                    continue
+def _unregister(function_id: str, cache_key: str):
+    """Must be called with the lock held, scheduled deadlines of the entry are skipped once it's gone"""
+    _NEVER_DIE_REGISTRY.pop((function_id, cache_key), None)
+    if (function_keys := _NEVER_DIE_FUNCTION_KEYS.get(function_id)) is not None:
+        function_keys.discard(cache_key)
 
-                if _cache_is_being_set(entry):
-                    continue
 
-                if not entry.loop:  # sync
-                    thread = threading.Thread(target=_run_sync_function_and_cache, args=(entry,), daemon=True)
-                    thread.start()
-                    _NEVER_DIE_CACHE_THREADS[entry.cache_key] = thread
-                    continue
+def _refresh_next_ready_entry():
+    """Pool job, picks the entry when a worker is free so the highest priority ready entry goes first"""
+    *_, entry = _NEVER_DIE_READY.get_nowait()
+    _run_sync_function_and_cache(entry)
 
-                if entry.loop.is_closed():
-                    logger.debug(f"Loop is closed for {entry.function.__qualname__}, skipping future creation")
-                    continue
 
-                # Doesn't actually run, just creates a coroutine
-                coroutine = _run_async_function_and_cache(entry)
+def _retire(entry: NeverDieCacheEntry):
+    """
+    Stop refreshing an entry nobody reads anymore and drop its cached result.
 
-                try:
-                    future = asyncio.run_coroutine_threadsafe(coroutine, entry.loop)
-                except RuntimeError:
-                    coroutine.close()
-                    logger.debug(f"Loop is closed for {entry.function.__qualname__}, skipping future creation")
-                    continue
+    Retirement is per process, reads in other processes aren't counted. A result shared through a backend is not
+    deleted, it's given the ttl instead so it lapses unless another process still refreshes it.
+    """
+    with _NEVER_DIE_LOCK:
+        _unregister(entry.id, entry.cache_key)
+    try:
+        if (backend := CacheBucket.get_backend(entry.id)) is not None:
+            backend.expire(entry.id, entry.cache_key, entry.ttl)
+        else:
+            CacheBucket.delete(entry.id, entry.cache_key)
+    except Exception:
+        logger.debug(f"Exception removing retired {entry.function.__qualname__} entry", exc_info=True)
+
+
+def _dispatch(entry: NeverDieCacheEntry):
+    if entry.record_refresh_period():
+        logger.debug(f"Retiring never_die entry of {entry.function.__qualname__}, unread for {entry.retire_after} ttls")
+        _retire(entry)
+        return
+
+    if not entry.loop:  # sync
+        _NEVER_DIE_READY.put((-entry.priority, entry._expires_at, next(_NEVER_DIE_SEQUENCE), entry))
+        _get_executor().submit(_refresh_next_ready_entry)
+        return
+
+    # Doesn't actually run, just creates a coroutine
+    coroutine = _run_async_function_and_cache(entry)
+    try:
+        asyncio.run_coroutine_threadsafe(coroutine, entry.loop)
+    except RuntimeError:
+        coroutine.close()
+        # Nothing can run on a closed loop anymore, it won't be refreshed again
+        logger.debug(f"Loop is closed for {entry.function.__qualname__}, unregistering it")
+        with _NEVER_DIE_LOCK:
+            _unregister(entry.id, entry.cache_key)
 
-                _NEVER_DIE_CACHE_FUTURES[entry.cache_key] = future
 
-        finally:
-            time.sleep(0.1)
-            _clear_dead_futures()
-            _clear_dead_threads()
+def _refresh_never_die_caches():
+    """Background thread function that dispatches never_die entries as their refresh deadlines come due"""
+    while True:
+        try:
+            due = []
+            for expires_at, key in _NEVER_DIE_SCHEDULE.wait_for_due():
+                # Entries are rescheduled once their refresh lands, older deadlines are stale
+                entry = _NEVER_DIE_REGISTRY.get(key)
+                if entry is not None and entry._expires_at == expires_at:
+                    due.append(entry)
+
+            for entry in sorted(due, key=lambda entry: -entry.priority):
+                _dispatch(entry)
+        except Exception:
+            logger.debug("Exception dispatching never_die refreshes", exc_info=True)
+            time.sleep(1)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _NEVER_DIE_EXECUTOR
+    if _NEVER_DIE_EXECUTOR is None:
+        with _NEVER_DIE_LOCK:
+            if _NEVER_DIE_EXECUTOR is None:
+                _NEVER_DIE_EXECUTOR = ThreadPoolExecutor(_NEVER_DIE_MAX_WORKERS, thread_name_prefix="never-die")
+    return _NEVER_DIE_EXECUTOR
+
+
+def set_refresh_concurrency(max_workers: int | None) -> None:
+    """Number of sync never_die refreshes running at once, `None` for the `ThreadPoolExecutor` default"""
+    global _NEVER_DIE_EXECUTOR, _NEVER_DIE_MAX_WORKERS
+    with _NEVER_DIE_LOCK:
+        previous, _NEVER_DIE_EXECUTOR = _NEVER_DIE_EXECUTOR, None
+        _NEVER_DIE_MAX_WORKERS = max_workers
+    if previous is not None:
+        previous.shutdown(wait=False)  # queued jobs still run, picking entries from the shared ready queue
 
 
 def _start_never_die_thread():
@@ -173,28 +235,53 @@ def _start_never_die_thread():
 
 
 def register_never_die_function(
+    function_id: str,
+    cache_key: str,
     function: Callable[..., Any],
     ttl: Number,
     args: tuple,
     kwargs: dict,
-    cache_key_func: CacheKeyFunction | None,
-    ignore_fields: tuple[str, ...],
+    priority: int = 0,
+    retire_after: int | None = None,
+    adaptive: bool = False,
 ) -> None:
-    """Register a function for never_die cache refreshing"""
-    is_async = inspect.iscoroutinefunction(function)
-
+    """
+    Register a call for never_die cache refreshing, or count a read of a call that is already registered.
+
+    Entries that go unread for `retire_after` refresh periods in a row are unregistered and removed from the cache,
+    `adaptive` entries are refreshed less often while they go unread.
+    """
+    key = (function_id, cache_key)
+    # Lock-free fast path, entries are only added under the lock, a lost increment is harmless
+    if (entry := _NEVER_DIE_REGISTRY.get(key)) is not None:
+        entry.reads += 1
+        return
+
+    loop = asyncio.get_running_loop() if inspect.iscoroutinefunction(function) else None
     entry = NeverDieCacheEntry(
-        function,
-        ttl,
-        args,
-        kwargs,
-        cache_key_func,
-        ignore_fields,
-        asyncio.get_event_loop() if is_async else None,
+        function_id, cache_key, function, ttl, args, kwargs, loop, priority, retire_after, adaptive
     )
-
     with _NEVER_DIE_LOCK:
-        if entry not in _NEVER_DIE_REGISTRY:
-            _NEVER_DIE_REGISTRY.append(entry)
+        if key in _NEVER_DIE_REGISTRY:
+            return
+        _NEVER_DIE_REGISTRY[key] = entry
+        if (function_keys := _NEVER_DIE_FUNCTION_KEYS.get(function_id)) is None:
+            function_keys = _NEVER_DIE_FUNCTION_KEYS[function_id] = set()
+        function_keys.add(cache_key)
+        entry.schedule()
 
     _start_never_die_thread()
+
+
+def unregister_never_die_keys(keys: Iterable[tuple[str, str]]) -> None:
+    """Stop refreshing the given (function id, cache key) calls, they register again on their next call"""
+    with _NEVER_DIE_LOCK:
+        for function_id, cache_key in keys:
+            _unregister(function_id, cache_key)
+
+
+def unregister_never_die_function(function_id: str) -> None:
+    """Stop refreshing every call of a function, they register again on their next call"""
+    with _NEVER_DIE_LOCK:
+        for cache_key in list(_NEVER_DIE_FUNCTION_KEYS.get(function_id, ())):
+            _unregister(function_id, cache_key)
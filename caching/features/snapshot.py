@@ -0,0 +1,140 @@
+import atexit
+import os
+import pickle
+import threading
+import time
+
+from caching.bucket import NEVER, CacheBucket
+from caching.config import logger
+
+# First record of every snapshot file, bump the version when records change
+_SNAPSHOT_HEADER = ("caching.snapshot", 1)
+
+_SNAPSHOT_LOCK: threading.Lock = threading.Lock()
+_SNAPSHOT_THREAD: threading.Thread | None = None
+_SNAPSHOT_STOP: threading.Event = threading.Event()
+# Where the cache is saved when the process exits, None to not save it
+_SNAPSHOT_ON_EXIT: str | None = None
+
+
+def save_snapshot(path: str) -> int:
+    """
+    Write the process local entries to `path`, returns how many were written.
+
+    Deadlines are stored as wall clock times, monotonic ones don't survive a restart. Results that can't be
+    pickled are skipped. The file is written next to `path` and moved over it, readers never see a partial one.
+    """
+    entries = CacheBucket.snapshot_entries()
+    wall_offset = time.time() - time.monotonic()
+    temporary = f"{path}.{os.getpid()}.tmp"
+    written = 0
+    try:
+        with open(temporary, "wb") as file:
+            pickle.dump(_SNAPSHOT_HEADER, file, pickle.HIGHEST_PROTOCOL)
+            for function_id, cache_key, entry, tags in entries:
+                if entry.is_stale_expired():
+                    continue
+                try:
+                    payload = pickle.dumps(entry.result, pickle.HIGHEST_PROTOCOL)
+                except Exception:
+                    logger.debug(f"Skipping an unpicklable {function_id} result in the snapshot", exc_info=True)
+                    continue
+                expires_at = None if entry.expires_at == NEVER else entry.expires_at + wall_offset
+                stale_until = None if entry.stale_until == NEVER else entry.stale_until + wall_offset
+                record = (function_id, cache_key, expires_at, stale_until, tags, payload)
+                pickle.dump(record, file, pickle.HIGHEST_PROTOCOL)
+                written += 1
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return written
+
+
+def load_snapshot(path: str) -> int:
+    """
+    Load the entries of a snapshot into the process local cache, returns how many were loaded.
+
+    Records are read one at a time, so memory doesn't grow with the file. Entries that expired since the snapshot,
+    whose result can't be unpickled anymore, or whose key was cached meanwhile, are skipped.
+    A missing file loads nothing, the first start of a service has no snapshot yet.
+    """
+    loaded = 0
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        return loaded
+
+    with file:
+        if pickle.load(file) != _SNAPSHOT_HEADER:
+            raise Exception(f"{path} is not a cache snapshot, or one of another version")
+        while True:
+            try:
+                function_id, cache_key, expires_at, stale_until, tags, payload = pickle.load(file)
+            except EOFError:
+                return loaded
+
+            now = time.time()
+            if stale_until is not None and stale_until <= now:
+                continue
+            try:
+                result = pickle.loads(payload)
+            except Exception:
+                logger.debug(f"Skipping a {function_id} result of the snapshot that can't be loaded", exc_info=True)
+                continue
+            # Entries expired but still in their stale window come back with a negative ttl
+            ttl = None if expires_at is None else expires_at - now
+            stale_ttl = 0 if stale_until is None or expires_at is None else stale_until - expires_at
+            if CacheBucket.restore(function_id, cache_key, result, ttl, stale_ttl, tags):
+                loaded += 1
+
+
+def load_snapshot_in_background(path: str) -> threading.Thread:
+    """Stream a snapshot in from a daemon thread, calls made meanwhile compute what isn't loaded yet"""
+
+    def load():
+        try:
+            loaded = load_snapshot(path)
+            logger.debug(f"Loaded {loaded} cache entries from {path}")
+        except Exception:
+            logger.warning(f"Exception loading the cache snapshot {path}", exc_info=True)
+
+    thread = threading.Thread(target=load, daemon=True)
+    thread.start()
+    return thread
+
+
+def set_snapshots(path: str | None, interval: float | None, on_exit: bool) -> None:
+    """Save the cache to `path` every `interval` seconds from a daemon thread and/or when the process exits"""
+    global _SNAPSHOT_THREAD, _SNAPSHOT_STOP, _SNAPSHOT_ON_EXIT
+    with _SNAPSHOT_LOCK:
+        _SNAPSHOT_STOP.set()
+        _SNAPSHOT_THREAD = None
+        _SNAPSHOT_ON_EXIT = path if on_exit else None
+        if path is None or interval is None:
+            return
+
+        stop = _SNAPSHOT_STOP = threading.Event()
+        _SNAPSHOT_THREAD = threading.Thread(target=_save_periodically, args=(path, interval, stop), daemon=True)
+        _SNAPSHOT_THREAD.start()
+
+
+def _save_periodically(path: str, interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        try:
+            save_snapshot(path)
+        except Exception:
+            logger.warning(f"Exception saving the cache snapshot {path}", exc_info=True)
+
+
+@atexit.register
+def _save_on_exit():
+    if (path := _SNAPSHOT_ON_EXIT) is None:
+        return
+    try:
+        save_snapshot(path)
+    except Exception:
+        logger.warning(f"Exception saving the cache snapshot {path}", exc_info=True)
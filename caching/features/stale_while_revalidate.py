@@ -0,0 +1,59 @@
+import asyncio
+import threading
+from asyncio import AbstractEventLoop
+from typing import Any, Awaitable, Callable
+
+from caching._async.flight import _ASYNC_FLIGHTS
+from caching._sync.flight import _SYNC_FLIGHTS
+from caching.config import logger
+from caching.metrics import record_refresh_failure
+
+_REVALIDATION_LOCK: threading.Lock = threading.Lock()
+_REVALIDATION_THREADS: dict[tuple[str, str], threading.Thread] = {}
+# Keyed by loop as well, a task only runs while its loop does
+_REVALIDATION_TASKS: dict[tuple[AbstractEventLoop, str, str], asyncio.Task] = {}
+
+
+def _revalidate_sync(function_id: str, cache_key: str, compute: Callable[[], Any]):
+    """Refresh a stale entry through the key's flight, so callers that missed meanwhile share the refresh"""
+    try:
+        _SYNC_FLIGHTS.run(function_id, cache_key, compute)
+    except Exception:
+        record_refresh_failure(function_id)
+        logger.debug(f"Exception revalidating {function_id}, serving the stale entry until it expires", exc_info=True)
+    finally:
+        with _REVALIDATION_LOCK:
+            del _REVALIDATION_THREADS[(function_id, cache_key)]
+
+
+async def _revalidate_async(function_id: str, cache_key: str, compute: Callable[[], Awaitable[Any]]):
+    """Refresh a stale entry through the key's flight, so callers that missed meanwhile share the refresh"""
+    try:
+        await _ASYNC_FLIGHTS.run(function_id, cache_key, compute)
+    except Exception:
+        record_refresh_failure(function_id)
+        logger.debug(f"Exception revalidating {function_id}, serving the stale entry until it expires", exc_info=True)
+
+
+def revalidate_in_thread(function_id: str, cache_key: str, compute: Callable[[], Any]) -> None:
+    """Start a background refresh of a stale entry, unless one is already running for the key"""
+    key = (function_id, cache_key)
+    with _REVALIDATION_LOCK:
+        if key in _REVALIDATION_THREADS:
+            return
+        thread = _REVALIDATION_THREADS[key] = threading.Thread(
+            target=_revalidate_sync, args=(function_id, cache_key, compute), daemon=True
+        )
+    thread.start()
+
+
+def revalidate_in_task(function_id: str, cache_key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+    """Start a background refresh of a stale entry on the running loop, unless one is already running for the key"""
+    loop = asyncio.get_running_loop()
+    key = (loop, function_id, cache_key)
+    # No awaits between the lookup and the registration, so no lock is needed within a loop
+    if key in _REVALIDATION_TASKS:
+        return
+
+    task = _REVALIDATION_TASKS[key] = loop.create_task(_revalidate_async(function_id, cache_key, compute))
+    task.add_done_callback(lambda _: _REVALIDATION_TASKS.pop(key, None))
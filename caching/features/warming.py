@@ -0,0 +1,124 @@
+import threading
+from functools import partial
+from typing import Any, Awaitable, Callable, Iterable, Mapping
+
+from caching.config import logger
+from caching.features.bulk import gather_limited, run_in_threads
+
+
+class Warmup:
+    """
+    Progress of cache warming, shared by every call it covers and safe to poll from any thread,
+    e.g. from a readiness probe: `warmup.done()`, `warmup.wait(timeout)`, `warmup.failures`.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.succeeded = 0
+        # (function name, args, exception) of every call that raised
+        self.failures: list[tuple[str, tuple, BaseException]] = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._done.set()
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the calls completed, 1.0 once everything is"""
+        return self.completed / self.total if self.total else 1.0
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until every call completed, returns False on timeout"""
+        return self._done.wait(timeout)
+
+    def expect(self, calls: int) -> None:
+        with self._lock:
+            self.total += calls
+            if self.completed < self.total:
+                self._done.clear()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.succeeded += 1
+            self._update()
+
+    def record_failure(self, name: str, args: tuple, exception: BaseException) -> None:
+        with self._lock:
+            self.failures.append((name, args, exception))
+            self._update()
+
+    def _update(self):
+        if self.completed >= self.total:
+            self._done.set()
+
+    def __repr__(self) -> str:
+        return f"Warmup(total={self.total}, succeeded={self.succeeded}, failed={self.failed})"
+
+
+def _arguments(item: Any) -> tuple:
+    """Calls are tuples of positional arguments, anything else is the single argument of its call"""
+    return item if type(item) is tuple else (item,)
+
+
+def _warm_call_sync(function: Callable[..., Any], args: tuple, warmup: Warmup):
+    try:
+        function(*args)
+    except Exception as exception:
+        logger.debug(f"Exception warming {function.__qualname__}{args}", exc_info=True)
+        warmup.record_failure(function.__qualname__, args, exception)
+    else:
+        warmup.record_success()
+
+
+async def _warm_call_async(function: Callable[..., Awaitable[Any]], args: tuple, warmup: Warmup):
+    try:
+        await function(*args)
+    except Exception as exception:
+        logger.debug(f"Exception warming {function.__qualname__}{args}", exc_info=True)
+        warmup.record_failure(function.__qualname__, args, exception)
+    else:
+        warmup.record_success()
+
+
+def warm_sync(
+    plan: Mapping[Callable[..., Any], Iterable[Any]], concurrency: int, warmup: Warmup | None, background: bool
+) -> Warmup:
+    """Call every cached function of the plan with each of its calls on up to `concurrency` threads"""
+    warmup = warmup if warmup is not None else Warmup()
+    jobs = [
+        partial(_warm_call_sync, function, _arguments(item), warmup)
+        for function, calls in plan.items()
+        for item in calls
+    ]
+    # Counted before anything runs, so the warmup can't look done halfway through
+    warmup.expect(len(jobs))
+    if background:
+        threading.Thread(target=run_in_threads, args=(jobs, concurrency), daemon=True).start()
+    else:
+        run_in_threads(jobs, concurrency)
+    return warmup
+
+
+async def warm_async(
+    plan: Mapping[Callable[..., Awaitable[Any]], Iterable[Any]], concurrency: int, warmup: Warmup | None
+) -> Warmup:
+    """Await every cached function of the plan with each of its calls, at most `concurrency` at once"""
+    warmup = warmup if warmup is not None else Warmup()
+    jobs = [
+        partial(_warm_call_async, function, _arguments(item), warmup)
+        for function, calls in plan.items()
+        for item in calls
+    ]
+    warmup.expect(len(jobs))
+    await gather_limited(jobs, concurrency)
+    return warmup
@@ -0,0 +1,187 @@
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+from caching.config import logger
+
+# Histogram bucket `i` counts durations up to 2**i microseconds, the last one (~35 minutes) is unbounded
+_BUCKETS = 32
+
+
+@dataclass
+class HistogramSnapshot:
+    count: int = 0
+    sum: float = 0.0
+    # (upper bound in seconds, cumulative count), the way prometheus histograms are exposed
+    buckets: list[tuple[float, int]] = field(default_factory=list)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+@dataclass
+class CacheStats:
+    function_id: str
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    early_recomputes: int = 0
+    evictions: int = 0
+    refresh_failures: int = 0
+    # Entries in the process local dict, None when the function stores its entries in a backend
+    entries: int | None = None
+    compute_time: HistogramSnapshot = field(default_factory=HistogramSnapshot)
+    wait_time: HistogramSnapshot = field(default_factory=HistogramSnapshot)
+    # Estimated bytes of the entries, None when no memory budget covers the function
+    memory_bytes: int | None = None
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / total if total else 0.0
+
+
+class Histogram:
+    """Durations in power of two microsecond buckets, recording is O(1)"""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, seconds: float) -> None:
+        # frexp's exponent is the index of the smallest power of two above the value
+        index = math.frexp(seconds * 1e6)[1] if seconds > 0 else 0
+        self.counts[index if index < _BUCKETS else _BUCKETS - 1] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def snapshot(self) -> HistogramSnapshot:
+        buckets = []
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            buckets.append((math.inf if index == _BUCKETS - 1 else 2**index / 1e6, cumulative))
+        return HistogramSnapshot(self.count, self.sum, buckets)
+
+
+class FunctionMetrics:
+    """
+    Counters of a cached function, bumped inline by the wrappers and the bucket.
+
+    Increments aren't locked, so under heavy contention a few may be lost, which is the price of keeping them
+    a single attribute update. When metrics are disabled recording sites skip everything after one flag check.
+    """
+
+    __slots__ = (
+        "function_id",
+        "enabled",
+        "hits",
+        "stale_hits",
+        "misses",
+        "early_recomputes",
+        "evictions",
+        "refresh_failures",
+        "compute_time",
+        "wait_time",
+    )
+
+    def __init__(self, function_id: str, enabled: bool):
+        self.function_id = function_id
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.early_recomputes = 0
+        self.evictions = 0
+        self.refresh_failures = 0
+        self.compute_time = Histogram()
+        self.wait_time = Histogram()
+
+    def snapshot(self, entries: int | None) -> CacheStats:
+        return CacheStats(
+            self.function_id,
+            self.hits,
+            self.stale_hits,
+            self.misses,
+            self.early_recomputes,
+            self.evictions,
+            self.refresh_failures,
+            entries,
+            self.compute_time.snapshot(),
+            self.wait_time.snapshot(),
+        )
+
+
+_METRICS: dict[str, FunctionMetrics] = {}
+_METRICS_LOCK: threading.Lock = threading.Lock()
+_METRICS_ENABLED: bool = True
+
+_EXPORTER_THREAD: threading.Thread | None = None
+_EXPORTER_STOP: threading.Event = threading.Event()
+
+
+def function_metrics(function_id: str) -> FunctionMetrics:
+    """Metrics of a function, created on first use, the same object is returned for the lifetime of the process"""
+    if (metrics := _METRICS.get(function_id)) is None:
+        with _METRICS_LOCK:
+            if (metrics := _METRICS.get(function_id)) is None:
+                metrics = _METRICS[function_id] = FunctionMetrics(function_id, _METRICS_ENABLED)
+    return metrics
+
+
+def record_eviction(function_id: str) -> None:
+    if (metrics := _METRICS.get(function_id)) is not None and metrics.enabled:
+        metrics.evictions += 1
+
+
+def record_refresh_failure(function_id: str) -> None:
+    if (metrics := _METRICS.get(function_id)) is not None and metrics.enabled:
+        metrics.refresh_failures += 1
+
+
+def record_wait(function_id: str, seconds: float) -> None:
+    if (metrics := _METRICS.get(function_id)) is not None and metrics.enabled:
+        metrics.wait_time.record(seconds)
+
+
+def set_metrics_enabled(enabled: bool) -> None:
+    """Turn recording on or off for every function, disabled recording sites only check a flag"""
+    global _METRICS_ENABLED
+    with _METRICS_LOCK:
+        _METRICS_ENABLED = enabled
+        for metrics in _METRICS.values():
+            metrics.enabled = enabled
+
+
+def tracked_function_ids() -> list[str]:
+    return list(_METRICS)
+
+
+def set_exporter(exporter: Callable[[], None] | None, interval: float) -> None:
+    """Call `exporter` every `interval` seconds from a daemon thread, `None` stops the current exporter"""
+    global _EXPORTER_THREAD, _EXPORTER_STOP
+    with _METRICS_LOCK:
+        _EXPORTER_STOP.set()
+        _EXPORTER_THREAD = None
+        if exporter is None:
+            return
+
+        stop = _EXPORTER_STOP = threading.Event()
+        _EXPORTER_THREAD = threading.Thread(target=_export, args=(exporter, interval, stop), daemon=True)
+        _EXPORTER_THREAD.start()
+
+
+def _export(exporter: Callable[[], None], interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        try:
+            exporter()
+        except Exception:
+            logger.debug("Exception exporting cache stats", exc_info=True)
@@ -0,0 +1,83 @@
+import functools
+import sys
+from itertools import islice
+from typing import Any
+
+# Items of a container that are sized, the rest are assumed to be alike
+_SAMPLE = 8
+# Containers nested deeper than this are sized shallowly
+_MAX_DEPTH = 3
+# Size of objects that don't report one
+DEFAULT_SIZE = 64
+
+_FLAT = frozenset({str, bytes, bytearray, int, float, bool, complex, type(None)})
+_UNSET = object()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimated bytes held by a cached result, in roughly constant time whatever its size.
+
+    Buffers and arrays report their data size (`nbytes`), DataFrames and Series their `memory_usage()` without
+    inspecting object columns. Containers are sized from their first few items times their length, and objects
+    from their `__dict__` and `__slots__`, a few levels deep, so one slow size estimate can't walk a whole object graph.
+    """
+    return _estimate(value, _MAX_DEPTH)
+
+
+def _estimate(value: Any, depth: int) -> int:
+    kind = type(value)
+    if kind in _FLAT:
+        return sys.getsizeof(value)
+    # Subclasses too, namedtuples, defaultdicts and OrderedDicts hold their data like the builtin containers
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + (_sampled(value, depth) if depth and value else 0)
+    if isinstance(value, dict):
+        if not depth or not value:
+            return sys.getsizeof(value)
+        pairs = islice(value.items(), _SAMPLE)
+        sampled = [_estimate(key, depth - 1) + _estimate(item, depth - 1) for key, item in pairs]
+        return sys.getsizeof(value) + sum(sampled) * len(value) // len(sampled)
+
+    if isinstance(nbytes := getattr(value, "nbytes", None), int):
+        # numpy arrays count their data when they own it, memoryviews and array views never do
+        return max(sys.getsizeof(value, DEFAULT_SIZE), nbytes)
+    if callable(memory_usage := getattr(value, "memory_usage", None)):
+        try:
+            usage = memory_usage(index=True)
+            return int(usage.sum() if hasattr(usage, "sum") else usage)
+        except Exception:
+            pass
+
+    size = sys.getsizeof(value, DEFAULT_SIZE)
+    if depth and not isinstance(value, type) and (attributes := _attributes(value)):
+        size += _estimate(attributes, depth - 1)
+    return size
+
+
+def _attributes(value: Any) -> dict[str, Any]:
+    """Attributes of an object, from its `__dict__` and its `__slots__`, slotted dataclasses included"""
+    attributes = dict(instance_dict) if isinstance(instance_dict := getattr(value, "__dict__", None), dict) else {}
+    for name in _slot_names(type(value)):
+        if (attribute := getattr(value, name, _UNSET)) is not _UNSET:
+            attributes[name] = attribute
+    return attributes
+
+
+@functools.lru_cache(maxsize=1024)
+def _slot_names(kind: type) -> tuple[str, ...]:
+    names = []
+    for klass in kind.__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name in ("__dict__", "__weakref__"):
+                continue
+            if name.startswith("__") and not name.endswith("__"):
+                name = f"_{klass.__name__.lstrip('_')}{name}"  # private names are mangled
+            names.append(name)
+    return tuple(names)
+
+
+def _sampled(items: Any, depth: int) -> int:
+    sampled = [_estimate(item, depth - 1) for item in islice(items, _SAMPLE)]
+    return sum(sampled) * len(items) // len(sampled)
@@ -1,7 +1,14 @@
-from typing import Any, Callable, Hashable, TypeAlias, TypedDict, TypeVar, Union
+from typing import Any, Callable, Hashable, Iterable, Literal, TypeAlias, TypedDict, TypeVar, Union
 
 Number: TypeAlias = Union[int, float]
 CacheKeyFunction: TypeAlias = Callable[[tuple, dict], Hashable]
+EvictionPolicyName: TypeAlias = Literal["lru", "lfu", "tinylfu"]
+Buffer: TypeAlias = Union[bytes, bytearray, memoryview]
+# Tags of cached entries, fixed or computed from the call's arguments
+Tags: TypeAlias = Union[Iterable[str], Callable[..., Iterable[str]]]
+TagsFunction: TypeAlias = Callable[[tuple, dict], tuple[str, ...]]
+# Estimated bytes held by a cached result
+Sizer: TypeAlias = Callable[[Any], int]
 
 F = TypeVar("F", bound=Callable[..., Any])
 
@@ -0,0 +1,151 @@
+import dataclasses
+import datetime
+import hashlib
+import marshal
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+# Personalizes blake2b so these digests never match digests computed for another purpose, bump on encoding changes
+_PERSON = b"caching.key.v1"
+_DIGEST_SIZE = 16
+
+# Marshal format 2 writes these exactly and tells them apart, nested tuples of them included. Unlike later
+# formats it has no back references, whose use depends on reference counts, so equal values give equal bytes
+_SCALARS = frozenset({str, int, float, bool, type(None)})
+_MARSHAL_VERSION = 2
+
+# Buffers larger than this are digested on their own, straight from their memory, instead of copied into the key
+_INLINE_BUFFER_SIZE = 1024
+
+# Subclasses of these are encoded as their base type, after their own type name, namedtuples and defaultdicts included
+_BASE_TYPES = (str, int, float, tuple, list, dict, frozenset, set)
+# Values keyed by their canonical text, the same in every process
+_TEXT_TYPES = (datetime.date, datetime.time, datetime.timedelta, Decimal, UUID)
+
+
+def digest(data: Any) -> str:
+    """128 bit blake2b hex digest of a bytes-like object"""
+    return hashlib.blake2b(data, digest_size=_DIGEST_SIZE, person=_PERSON).hexdigest()
+
+
+def arguments_key(items: tuple) -> str:
+    """
+    Cache key of the arguments of a call, stable across processes and restarts.
+
+    Calls made of plain scalars, the common case, are digested from their marshal bytes. Anything else goes through
+    a canonical encoding: dicts and sets are ordered, subclasses of builtin containers and scalars encoded as
+    their base type, dataclasses field by field, dates, decimals and uuids by their text, and buffers (bytes, arrays)
+    digested from their raw memory. Other hashable objects fall back to `hash()`, keys of such arguments are only
+    stable within the process.
+    """
+    if _is_plain(items):
+        return digest(marshal.dumps(items, _MARSHAL_VERSION))
+    # Marshal data never starts with a null byte, so both encodings can't produce the same data
+    out = bytearray(b"\x00")
+    _encode(items, out)
+    return digest(out)
+
+
+def positional_key(names: tuple[str, ...], args: tuple) -> str:
+    """`arguments_key` of `zip(names, args)`, checking the argument types in one C level pass first"""
+    if _SCALARS.issuperset(map(type, args)):
+        return digest(marshal.dumps(tuple(zip(names, args)), _MARSHAL_VERSION))
+    return arguments_key(tuple(zip(names, args)))
+
+
+def _is_plain(items: tuple) -> bool:
+    for item in items:
+        if type(item) is tuple:
+            for value in item:
+                if type(value) not in _SCALARS:
+                    return False
+        elif type(item) not in _SCALARS:
+            return False
+    return True
+
+
+def _frame(out: bytearray, tag: bytes, payload: bytes):
+    out += b"%s%d:" % (tag, len(payload))
+    out += payload
+
+
+def _encoded(value: Any) -> bytes:
+    out = bytearray()
+    _encode(value, out)
+    return bytes(out)
+
+
+def _type_name(value: Any) -> bytes:
+    kind = type(value)
+    return f"{kind.__module__}.{kind.__qualname__}".encode()
+
+
+def _encode(value: Any, out: bytearray):
+    kind = type(value)
+    if kind in _SCALARS:
+        _frame(out, b"r", repr(value).encode("utf-8", "surrogatepass"))
+    elif kind is tuple or kind is list:
+        out += b"%s%d:" % (b"t" if kind is tuple else b"l", len(value))
+        for item in value:
+            _encode(item, out)
+    elif kind is dict:
+        # Equal dicts get the same key whatever their insertion order
+        pairs = sorted((_encoded(key), _encoded(item)) for key, item in value.items())
+        out += b"d%d:" % len(pairs)
+        for key, item in pairs:
+            out += key
+            out += item
+    elif kind is set or kind is frozenset:
+        elements = sorted(_encoded(element) for element in value)
+        out += b"s%d:" % len(elements)
+        for element in elements:
+            out += element
+    elif isinstance(value, Enum):
+        _frame(out, b"e", _type_name(value))
+        _encode(value.name, out)
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        _frame(out, b"c", _type_name(value))
+        _encode(tuple((field.name, getattr(value, field.name)) for field in dataclasses.fields(value)), out)
+    elif isinstance(value, _BASE_TYPES):
+        # Subclasses, with their type so they don't share the key of the plain value
+        _frame(out, b"x", _type_name(value))
+        base = next(base for base in _BASE_TYPES if isinstance(value, base))
+        _encode(base(value), out)
+    elif isinstance(value, _TEXT_TYPES):
+        _frame(out, b"v", _type_name(value))
+        _encode(value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else str(value), out)
+    else:
+        try:
+            view = memoryview(value)
+        except TypeError:
+            _encode_object(value, out)
+        else:
+            _encode_buffer(value, view, out)
+
+
+def _encode_buffer(value: Any, view: memoryview, out: bytearray):
+    """Buffers by type, layout and raw bytes, so arrays of the same bytes but another shape or dtype differ"""
+    _frame(out, b"m", _type_name(value))
+    _frame(out, b"f", f"{view.format}|{view.itemsize}|{view.shape}".encode())
+    if not view.c_contiguous:
+        view = memoryview(view.tobytes())  # the only copy, there's no raw memory to read in order otherwise
+    elif view.ndim != 1 or view.format != "B":
+        view = view.cast("B")
+    if view.nbytes > _INLINE_BUFFER_SIZE:
+        _frame(out, b"h", hashlib.blake2b(view, digest_size=_DIGEST_SIZE, person=_PERSON).digest())
+    else:
+        _frame(out, b"b", view)
+
+
+def _encode_object(value: Any, out: bytearray):
+    try:
+        hashed = hash(value)
+    except TypeError:
+        raise Exception(
+            f"Can't build a cache key from an argument of type {type(value).__qualname__}, "
+            "it is unhashable and not a dict, list, set, dataclass or buffer"
+        )
+    _frame(out, b"o", _type_name(value))
+    _frame(out, b"h", str(hashed).encode())
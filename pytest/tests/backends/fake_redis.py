@@ -0,0 +1,103 @@
+"""Minimal in-process stand-in for a redis server, only speaks the commands the backends use"""
+
+import fnmatch
+import socket
+import socketserver
+import threading
+import time
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.lock = threading.Lock()
+        self.commands: list[bytes] = []
+        self.connections = 0
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "FakeRedisServer":
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _alive(self, key: bytes) -> tuple[bytes, float | None] | None:
+        item = self.data.get(key)
+        if item and item[1] is not None and item[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return item
+
+    def execute(self, name: bytes, args: list[bytes]):
+        self.commands.append(name)
+        with self.lock:
+            if name == b"PING":
+                return "PONG"
+            if name in (b"AUTH", b"SELECT"):
+                return "OK"
+            if name == b"GET":
+                item = self._alive(args[0])
+                return item[0] if item else None
+            if name == b"SET":
+                expires_at = None
+                if len(args) == 4 and args[2].upper() == b"PX":
+                    expires_at = time.monotonic() + int(args[3]) / 1000
+                self.data[args[0]] = (args[1], expires_at)
+                return "OK"
+            if name == b"DEL":
+                return sum(1 for key in args if self.data.pop(key, None) is not None)
+            if name == b"PTTL":
+                item = self._alive(args[0])
+                if item is None:
+                    return -2
+                return -1 if item[1] is None else int((item[1] - time.monotonic()) * 1000)
+            if name in (b"PEXPIRE", b"PERSIST"):
+                item = self._alive(args[0])
+                if item is None:
+                    return 0
+                expires_at = None if name == b"PERSIST" else time.monotonic() + int(args[1]) / 1000
+                self.data[args[0]] = (item[0], expires_at)
+                return 1
+            if name == b"SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode()
+                keys = [key for key in list(self.data) if fnmatch.fnmatchcase(key.decode(), pattern)]
+                return [b"0", keys]
+            return Exception(f"ERR unknown command '{name.decode()}'")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: FakeRedisServer
+
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.connections += 1
+        while line := self.rfile.readline():
+            count = int(line[1:])
+            args = []
+            for _ in range(count):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(_encode(self.server.execute(args[0].upper(), args[1:])))
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return b"-%s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n%s" % (len(reply), b"".join(_encode(item) for item in reply))
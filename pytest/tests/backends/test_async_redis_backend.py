@@ -0,0 +1,62 @@
+import asyncio
+from itertools import count
+
+import pytest
+from caching import RedisBackend
+from caching.cache import cache
+
+from .fake_redis import FakeRedisServer
+
+TTL = 0.2
+
+
+@pytest.fixture()
+def server():
+    server = FakeRedisServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture()
+def backend(server):
+    return RedisBackend(port=server.port, pool_size=2)
+
+
+@pytest.mark.asyncio
+async def test_get_set_delete_expire(backend):
+    assert await backend.aget("function", "key") is None
+
+    await backend.aset("function", "key", [b"payload"], 60)
+    payload, ttl = await backend.aget("function", "key")
+    assert payload == b"payload"
+    assert 59 < ttl <= 60
+
+    await backend.aexpire("function", "key", None)
+    assert await backend.aget("function", "key") == (b"payload", None)
+
+    await backend.adelete("function", "key")
+    assert await backend.aget("function", "key") is None
+
+
+@pytest.mark.asyncio
+async def test_pool_size_bounds_connections(server, backend):
+    await asyncio.gather(*(backend.aset("function", str(i), [str(i).encode()], 60) for i in range(50)))
+
+    assert server.connections <= 2
+    assert len(server.data) == 50
+
+
+@pytest.mark.asyncio
+async def test_cached_function_uses_backend(server, backend):
+    counter = count()
+
+    @cache(ttl=TTL, backend=backend)
+    async def cached_function(arg: int) -> int:
+        return next(counter)
+
+    results = await asyncio.gather(*(cached_function(1) for _ in range(10)))
+    assert results == [0] * 10
+    assert len(server.data) == 1
+
+    await asyncio.sleep(TTL + 0.1)
+    assert await cached_function(1) == 1
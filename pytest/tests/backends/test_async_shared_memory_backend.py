@@ -0,0 +1,47 @@
+import asyncio
+import uuid
+from itertools import count
+
+import pytest
+from caching import SharedMemoryBackend
+from caching.cache import cache
+from caching.utils.functions import get_function_id
+
+TTL = 0.2
+
+
+@pytest.fixture()
+def backend():
+    backend = SharedMemoryBackend(f"caching-test-{uuid.uuid4().hex[:8]}", slots=64, slot_size=256)
+    yield backend
+    backend.close()
+    backend.unlink()
+
+
+@pytest.mark.asyncio
+async def test_cached_function_uses_backend(backend):
+    counter = count()
+
+    @cache(ttl=TTL, backend=backend)
+    async def cached_function(arg: int) -> int:
+        return next(counter)
+
+    results = await asyncio.gather(*(cached_function(1) for _ in range(10)))
+    assert results == [0] * 10
+    assert await backend.aget(get_function_id(cached_function), "missing") is None
+
+    await asyncio.sleep(TTL + 0.05)
+    assert await cached_function(1) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_clear_of_a_cached_function(backend):
+    counter = count()
+
+    @cache(ttl=60, backend=backend)
+    async def cached_function(arg: int) -> int:
+        return next(counter)
+
+    assert await cached_function(1) == 0
+    await cached_function.cache_clear()
+    assert await cached_function(1) == 1
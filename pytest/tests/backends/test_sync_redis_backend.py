@@ -0,0 +1,181 @@
+import socket
+import threading
+import time
+from itertools import count
+
+import pytest
+from caching import RedisBackend, set_default_backend
+from caching.backends import CacheBackend, RedisError
+from caching.cache import cache
+
+from .fake_redis import FakeRedisServer
+
+TTL = 0.2
+
+
+@pytest.fixture()
+def server():
+    server = FakeRedisServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture()
+def backend(server):
+    return RedisBackend(port=server.port, pool_size=2)
+
+
+def test_get_set_delete_expire(backend):
+    assert backend.get("function", "key") is None
+
+    backend.set("function", "key", [b"payload"], 60)
+    payload, ttl = backend.get("function", "key")
+    assert payload == b"payload"
+    assert 59 < ttl <= 60
+
+    backend.expire("function", "key", None)
+    assert backend.get("function", "key") == (b"payload", None)
+
+    backend.delete("function", "key")
+    assert backend.get("function", "key") is None
+
+
+def test_chunked_payloads_are_sent_as_one_value(backend):
+    large = bytearray(b"x" * 100_000)
+    backend.set("function", "key", [b"header", memoryview(large), b"tail"], None)
+
+    assert backend.get("function", "key") == (b"header" + large + b"tail", None)
+
+
+def test_clear_only_deletes_prefixed_keys(server, backend):
+    other = RedisBackend(port=server.port, prefix="other:")
+    backend.set("function", "key", [b"1"], None)
+    other.set("function", "key", [b"2"], None)
+
+    backend.clear()
+
+    assert backend.get("function", "key") is None
+    assert other.get("function", "key") == (b"2", None)
+
+
+def test_keys_expiring_between_get_and_pttl_are_misses(server, backend, monkeypatch):
+    backend.set("function", "key", [b"payload"], 60)
+    execute = server.execute
+
+    def expire_after_get(name: bytes, args: list[bytes]):
+        reply = execute(name, args)
+        if name == b"GET":
+            server.data.clear()
+        return reply
+
+    monkeypatch.setattr(server, "execute", expire_after_get)
+    assert backend.get("function", "key") is None
+    assert backend.get_many("function", ["key"]) == [None]
+
+
+def test_truncated_replies_raise_and_drop_the_connection():
+    listener = socket.create_server(("127.0.0.1", 0))
+
+    def serve_truncated_reply():
+        connection, _ = listener.accept()
+        with connection:
+            connection.recv(4096)
+            connection.sendall(b"$10\r\nabc")
+
+    thread = threading.Thread(target=serve_truncated_reply, daemon=True)
+    thread.start()
+    backend = RedisBackend(port=listener.getsockname()[1], pool_size=1)
+    try:
+        with pytest.raises(ConnectionError):
+            backend.execute(("GET", "key"))
+    finally:
+        thread.join(1)
+        listener.close()
+    assert list(backend._pool.queue) == [None]
+
+
+def test_delete_function_keeps_other_functions(backend):
+    backend.set("function", "a", [b"1"], None)
+    backend.set("function", "b", [b"2"], None)
+    backend.set("function.other", "a", [b"3"], None)
+
+    backend.delete_function("function")
+    assert backend.get_many("function", ["a", "b"]) == [None, None]
+    assert backend.get("function.other", "a") == (b"3", None)
+
+
+def test_commands_are_pipelined_on_pooled_connections(server, backend):
+    for i in range(50):
+        backend.set("function", str(i), [str(i).encode()], 60)
+        backend.get("function", str(i))
+
+    assert server.connections <= 2
+
+
+def test_get_many(backend):
+    backend.set("function", "a", [b"1"], 60)
+    backend.set("function", "c", [b"3"], None)
+
+    entries = backend.get_many("function", ["a", "b", "c"])
+    assert entries[0][0] == b"1" and 59 < entries[0][1] <= 60
+    assert entries[1:] == [None, (b"3", None)]
+    assert backend.get_many("function", []) == []
+
+
+def test_errors_are_raised(backend):
+    with pytest.raises(RedisError):
+        backend.execute(("UNKNOWN",))
+
+    # The connection is still usable after an error reply
+    backend.set("function", "key", [b"1"], None)
+    assert backend.get("function", "key") == (b"1", None)
+
+
+def test_cached_function_uses_backend(server, backend):
+    counter = count()
+
+    @cache(ttl=TTL, backend=backend)
+    def cached_function(arg: int) -> int:
+        return next(counter)
+
+    assert cached_function(1) == cached_function(1) == 0
+    assert any(key.startswith(b"caching:") for key in server.data)
+
+    time.sleep(TTL + 0.1)
+    assert cached_function(1) == 1
+
+
+def test_default_backend_is_shared_between_functions(server, backend):
+    set_default_backend(backend)
+    try:
+
+        @cache(ttl=60)
+        def cached_function(arg: int) -> int:
+            return arg
+
+        cached_function(1)
+    finally:
+        set_default_backend(None)
+
+    assert len(server.data) == 1
+
+
+def test_incomplete_backends_fail_at_instantiation():
+    class NoDeleteFunction(CacheBackend):
+        def get(self, function_id, cache_key):
+            return None
+
+        def set(self, function_id, cache_key, payload, ttl):
+            pass
+
+        def delete(self, function_id, cache_key):
+            pass
+
+        def expire(self, function_id, cache_key, ttl):
+            pass
+
+        def clear(self):
+            pass
+
+    with pytest.raises(TypeError, match="delete_function"):
+        NoDeleteFunction()
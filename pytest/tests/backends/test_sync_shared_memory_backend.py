@@ -0,0 +1,135 @@
+import subprocess
+import sys
+import textwrap
+import time
+import uuid
+from itertools import count
+
+import pytest
+from caching import SharedMemoryBackend
+from caching.cache import cache
+
+TTL = 0.2
+
+
+@pytest.fixture()
+def backend():
+    backend = SharedMemoryBackend(f"caching-test-{uuid.uuid4().hex[:8]}", slots=64, slot_size=256)
+    yield backend
+    backend.close()
+    backend.unlink()
+
+
+def test_get_set_delete_expire(backend):
+    assert backend.get("function", "key") is None
+
+    backend.set("function", "key", [b"payload"], 60)
+    payload, ttl = backend.get("function", "key")
+    assert payload == b"payload"
+    assert 59 < ttl <= 60
+
+    backend.expire("function", "key", None)
+    assert backend.get("function", "key") == (b"payload", None)
+
+    backend.delete("function", "key")
+    assert backend.get("function", "key") is None
+
+
+def test_entries_expire(backend):
+    backend.set("function", "key", [b"1"], TTL)
+    time.sleep(TTL + 0.05)
+
+    assert backend.get("function", "key") is None
+
+
+def test_results_larger_than_a_slot_are_not_cached(backend):
+    backend.set("function", "key", [b"x" * 1000], None)
+
+    assert backend.get("function", "key") is None
+
+
+def test_full_table_replaces_entries_instead_of_failing(backend):
+    for i in range(500):
+        backend.set("function", str(i), [str(i).encode()], 60)
+
+    assert backend.get("function", "499") == (b"499", pytest.approx(60, abs=1))
+
+
+def test_clear(backend):
+    backend.set("function", "key", [b"1"], None)
+    backend.clear()
+
+    assert backend.get("function", "key") is None
+
+
+def test_delete_function_keeps_other_functions(backend):
+    backend.set("function", "a", [b"1"], None)
+    backend.set("function", "b", [b"2"], None)
+    backend.set("function.other", "a", [b"3"], None)
+
+    backend.delete_function("function")
+    assert backend.get_many("function", ["a", "b"]) == [None, None]
+    assert backend.get("function.other", "a") == (b"3", None)
+
+
+def test_table_is_shared_between_processes(backend):
+    backend.set("function", "parent", [b"from parent"], 60)
+
+    script = textwrap.dedent(
+        f"""
+        from caching import SharedMemoryBackend
+
+        backend = SharedMemoryBackend({backend.name!r}, slots=64, slot_size=256)
+        assert backend.get("function", "parent")[0] == b"from parent"
+        backend.set("function", "child", [b"from child"], None)
+        backend.close()
+        """
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+    assert backend.get("function", "child") == (b"from child", None)
+
+    # The first child exiting must not destroy the table for the processes attaching after it
+    script = textwrap.dedent(
+        f"""
+        from caching import SharedMemoryBackend
+
+        backend = SharedMemoryBackend({backend.name!r}, slots=64, slot_size=256)
+        assert backend.get("function", "child") == (b"from child", None)
+        backend.close()
+        """
+    )
+    result = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True)
+    assert "leaked shared_memory" not in result.stderr
+
+
+def test_cached_function_uses_backend(backend):
+    counter = count()
+
+    @cache(ttl=TTL, backend=backend)
+    def cached_function(arg: int) -> int:
+        return next(counter)
+
+    assert cached_function(1) == cached_function(1) == 0
+
+    time.sleep(TTL + 0.05)
+    assert cached_function(1) == 1
+
+
+def test_cache_clear_of_a_cached_function(backend):
+    counter = count()
+
+    @cache(ttl=60, backend=backend)
+    def cached_function(arg: int) -> int:
+        return next(counter)
+
+    @cache(ttl=60, backend=backend)
+    def other_function(arg: int) -> int:
+        return next(counter)
+
+    assert cached_function(1) == 0
+    assert other_function(1) == 1
+
+    cached_function.cache_clear()
+    assert cached_function(1) == 2
+    assert other_function(1) == 1
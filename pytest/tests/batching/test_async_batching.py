@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from caching.cache import cache
+from caching.features.batching import _BATCH_TASKS
+
+TTL = 60
+
+
+@pytest.mark.asyncio
+async def test_misses_of_the_same_tick_make_one_batch_call():
+    batches = []
+
+    async def get_users(ids: list[int]) -> list[str]:
+        batches.append(ids)
+        return [f"user {id}" for id in ids]
+
+    @cache(ttl=TTL, batch_func=get_users)
+    async def get_user(id: int) -> str:
+        raise AssertionError("misses should go through the batch function")
+
+    results = await asyncio.gather(*(get_user(i) for i in [1, 2, 3, 2]))
+    assert results == ["user 1", "user 2", "user 3", "user 2"]
+    # The repeated key shares the flight of the first call
+    assert batches == [[1, 2, 3]]
+
+    assert await get_user.map([3, 4]) == ["user 3", "user 4"]
+    assert batches == [[1, 2, 3], [4]]
+
+
+@pytest.mark.asyncio
+async def test_max_batch_size_splits_batches():
+    batches = []
+
+    async def get_users(ids: list[int]) -> list[int]:
+        batches.append(ids)
+        return ids
+
+    @cache(ttl=TTL, batch_func=get_users, max_batch_size=2, batch_window_ms=10)
+    async def get_user(id: int) -> int:
+        return id
+
+    assert await asyncio.gather(*(get_user(i) for i in range(5))) == list(range(5))
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.asyncio
+async def test_batch_errors_reach_every_caller():
+    async def get_users(ids: list[int]) -> list[int]:
+        raise ValueError("backend down")
+
+    @cache(ttl=TTL, batch_func=get_users)
+    async def get_user(id: int) -> int:
+        return id
+
+    results = await asyncio.gather(get_user(1), get_user(2), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_batches_cancel_every_caller():
+    started = asyncio.Event()
+
+    async def get_users(ids: list[int]) -> list[int]:
+        started.set()
+        await asyncio.sleep(TTL)
+        return ids
+
+    @cache(ttl=TTL, batch_func=get_users)
+    async def get_user(id: int) -> int:
+        return id
+
+    calls = asyncio.gather(get_user(1), get_user(2), return_exceptions=True)
+    await started.wait()
+    for task in list(_BATCH_TASKS):
+        task.cancel()
+
+    results = await asyncio.wait_for(calls, 1)
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_base_exceptions_reach_every_caller():
+    class Abort(BaseException):
+        pass
+
+    async def get_users(ids: list[int]) -> list[int]:
+        raise Abort()
+
+    @cache(ttl=TTL, batch_func=get_users)
+    async def get_user(id: int) -> int:
+        return id
+
+    results = await asyncio.wait_for(asyncio.gather(get_user(1), get_user(2), return_exceptions=True), 1)
+    assert all(isinstance(result, Abort) for result in results)
@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from caching.cache import cache
+
+TTL = 60
+
+
+def test_concurrent_misses_make_one_batch_call():
+    batches = []
+
+    def get_users(ids: list[int]) -> list[str]:
+        batches.append(ids)
+        return [f"user {id}" for id in ids]
+
+    @cache(ttl=TTL, batch_func=get_users, batch_window_ms=50)
+    def get_user(id: int) -> str:
+        raise AssertionError("misses should go through the batch function")
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(get_user, range(5)))
+
+    assert results == [f"user {i}" for i in range(5)]
+    assert len(batches) == 1 and sorted(batches[0]) == list(range(5))
+
+    # Results are cached per key
+    assert get_user(3) == "user 3"
+    assert len(batches) == 1
+
+
+def test_every_parameter_is_passed_as_a_list():
+    @cache(ttl=TTL, batch_func=lambda a, b: [x + y for x, y in zip(a, b)])
+    def add(a: int, b: int = 10) -> int:
+        return a + b
+
+    assert add.map([1, 2], [3, 4]) == [4, 6]
+    assert add(5) == 15
+
+
+def test_full_batches_are_sent_right_away():
+    batches = []
+    barrier = threading.Barrier(4)
+
+    def get_users(ids: list[int]) -> list[int]:
+        batches.append(len(ids))
+        return ids
+
+    # Without the size bound, a batch would wait out the whole window
+    @cache(ttl=TTL, batch_func=get_users, max_batch_size=2, batch_window_ms=10_000)
+    def get_user(id: int) -> int:
+        return id
+
+    def call(id: int) -> int:
+        barrier.wait()
+        return get_user(id)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(call, range(4))) == list(range(4))
+    assert batches == [2, 2]
+
+
+def test_batch_errors_reach_every_caller():
+    def get_users(ids: list[int]) -> list[int]:
+        return ids[:-1]
+
+    @cache(ttl=TTL, batch_func=get_users)
+    def get_user(id: int) -> int:
+        return id
+
+    with pytest.raises(Exception, match="returned 0 results for 1 calls"):
+        get_user(1)
+
+
+def test_batch_func_must_match_the_function():
+    async def get_users(ids: list[int]) -> list[int]:
+        return ids
+
+    with pytest.raises(Exception):
+
+        @cache(ttl=TTL, batch_func=get_users)
+        def get_user(id: int) -> int:
+            return id
@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+from caching.cache import cache
+
+TTL = 60
+
+
+@pytest.mark.asyncio
+async def test_map_returns_results_in_input_order():
+    calls = []
+
+    @cache(ttl=TTL)
+    async def cached_function(a: int, b: int = 0) -> int:
+        calls.append(a)
+        return a * 10 + b
+
+    await cached_function(3)
+    assert await cached_function.map([5, 3, 1, 4]) == [50, 30, 10, 40]
+    assert await cached_function.get_many([((1,), {}), ((2,), {"b": 1})]) == [10, 21]
+    assert sorted(calls) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited():
+    running = peak = 0
+
+    @cache(ttl=TTL)
+    async def cached_function(arg: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return arg
+
+    started = time.perf_counter()
+    assert await cached_function.map(range(12), max_concurrency=4) == list(range(12))
+    assert peak == 4
+    assert time.perf_counter() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_repeated_keys_are_computed_once():
+    calls = 0
+
+    @cache(ttl=TTL)
+    async def cached_function(arg: int) -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return arg
+
+    single, bulk = await asyncio.gather(cached_function(1), cached_function.map([1, 2, 1]))
+    assert (single, bulk) == (1, [1, 2, 1])
+    assert calls == 2
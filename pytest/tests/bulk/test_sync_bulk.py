@@ -0,0 +1,72 @@
+import threading
+import time
+
+from caching.cache import cache
+
+TTL = 60
+
+
+def test_map_returns_results_in_input_order():
+    calls = []
+
+    @cache(ttl=TTL)
+    def cached_function(a: int, b: int = 0) -> int:
+        calls.append(a)
+        return a * 10 + b
+
+    cached_function(3)
+    assert cached_function.map([5, 3, 1, 4], [0, 0, 0, 0]) == [50, 30, 10, 40]
+    assert sorted(calls) == [1, 3, 4, 5]
+
+    assert cached_function.get_many([((1,), {}), ((2,), {"b": 1})]) == [10, 21]
+    assert sorted(calls) == [1, 2, 3, 4, 5]
+
+    stats = cached_function.cache_stats()
+    assert (stats.hits, stats.misses) == (2, 5)
+
+
+def test_misses_are_computed_concurrently():
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        time.sleep(0.1)
+        return arg
+
+    started = time.perf_counter()
+    assert cached_function.map(range(8), max_concurrency=8) == list(range(8))
+    assert time.perf_counter() - started < 0.5
+
+
+def test_repeated_keys_are_computed_once():
+    calls = 0
+    lock = threading.Lock()
+
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        nonlocal calls
+        with lock:
+            calls += 1
+        time.sleep(0.05)
+        return arg
+
+    # Concurrent single calls share the flights of the bulk call
+    single = threading.Thread(target=cached_function, args=(1,))
+    single.start()
+    assert cached_function.map([1, 2, 1, 2, 1]) == [1, 2, 1, 2, 1]
+    single.join()
+    assert calls == 2
+
+
+def test_exceptions_are_raised():
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        if arg == 2:
+            raise ValueError(arg)
+        return arg
+
+    try:
+        cached_function.map([1, 2, 3])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("the exception of the failing call should be raised")
+    assert cached_function.map([1, 3]) == [1, 3]
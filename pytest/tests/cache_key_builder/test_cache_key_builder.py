@@ -0,0 +1,55 @@
+import inspect
+
+import pytest
+from caching.bucket import CacheBucket
+
+
+def positional(a, b, c): ...
+
+
+def with_defaults(a, b=2, c=None): ...
+
+
+def variadic(a, *args, b=1, **kwargs): ...
+
+
+def no_params(): ...
+
+
+CALLS = [
+    (positional, (1, 2, 3), {}),
+    (positional, (1, 2), {"c": 3}),
+    (positional, (), {"c": 3, "a": 1, "b": 2}),
+    (with_defaults, (1,), {}),
+    (with_defaults, (1, 5), {}),
+    (with_defaults, (1, 5, "x"), {}),
+    (with_defaults, (1,), {"c": "x"}),
+    (variadic, (1, 2, 3), {"d": 4}),
+    (variadic, (1,), {}),
+    (no_params, (), {}),
+]
+
+
+@pytest.mark.parametrize("function, args, kwargs", CALLS)
+@pytest.mark.parametrize("ignore_fields", [(), ("b",), ("a", "b", "c")])
+def test_compiled_key_matches_generic_key(function, args, kwargs, ignore_fields):
+    signature = inspect.signature(function)
+    make_cache_key = CacheBucket.compile_cache_key_function(signature, None, ignore_fields)
+
+    expected = CacheBucket.create_cache_key(signature, None, ignore_fields, args, kwargs)
+    assert make_cache_key(args, kwargs) == expected
+
+
+def test_positional_and_keyword_calls_share_keys():
+    signature = inspect.signature(with_defaults)
+    make_cache_key = CacheBucket.compile_cache_key_function(signature, None, ())
+
+    assert make_cache_key((1,), {}) == make_cache_key((), {"a": 1, "b": 2})
+    assert make_cache_key((1, 2, None), {}) == make_cache_key((1,), {"c": None})
+
+
+def test_cache_key_func_is_used():
+    signature = inspect.signature(positional)
+    make_cache_key = CacheBucket.compile_cache_key_function(signature, lambda args, kwargs: args[0], ())
+
+    assert make_cache_key((1, 2, 3), {}) == make_cache_key((1, 5, 6), {})
@@ -0,0 +1,127 @@
+import array
+import collections
+import dataclasses
+import datetime
+import decimal
+import enum
+import subprocess
+import sys
+import uuid
+
+import pytest
+from caching.cache import cache
+from caching.utils.keys import arguments_key, positional_key
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: list
+
+
+class Color(enum.Enum):
+    RED = 1
+
+
+Pair = collections.namedtuple("Pair", "left right")
+
+# Evaluated in subprocesses with other hash seeds as well
+STABLE_ARGUMENTS = """(
+    ("a", "text"),
+    ("b", {"c": [1.5]}),
+    ("date", datetime.date(2024, 1, 31)),
+    ("datetime", datetime.datetime(2024, 1, 31, 12, 30, tzinfo=datetime.timezone.utc)),
+    ("time", datetime.time(12, 30)),
+    ("decimal", decimal.Decimal("1.10")),
+    ("uuid", uuid.UUID(int=1)),
+    ("pair", collections.namedtuple("Pair", "left right", module="shared")(1, "x")),
+    ("defaultdict", collections.defaultdict(list, {"k": [1]})),
+    ("ordered", collections.OrderedDict(a=1, b=2)),
+)"""
+
+
+def test_keys_are_stable_across_processes():
+    script = (
+        "import collections, datetime, decimal, uuid\n"
+        "from caching.utils.keys import arguments_key\n"
+        f"print(arguments_key({STABLE_ARGUMENTS}))"
+    )
+    keys = {
+        subprocess.run(
+            [sys.executable, "-c", script], env={"PYTHONHASHSEED": seed}, capture_output=True, text=True, check=True
+        ).stdout
+        for seed in ("1", "2")
+    }
+    assert keys == {arguments_key(eval(STABLE_ARGUMENTS)) + "\n"}
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (1, True),
+        (1, 1.0),
+        (1, "1"),
+        ([1, 2], (1, 2)),
+        ([1, 2], [12]),
+        ({"a": 1}, {"a": "1"}),
+        ({1, 2}, {1, 3}),
+        (b"ab", bytearray(b"ab")),
+        (array.array("b", [1, 2]), array.array("B", [1, 2])),
+        (memoryview(bytes(6)).cast("B", (2, 3)), memoryview(bytes(6)).cast("B", (3, 2))),
+        (Point(1, [2]), Point(1, [3])),
+        (Color.RED, 1),
+        (Pair(1, 2), (1, 2)),
+        (collections.OrderedDict(a=1), {"a": 1}),
+        (datetime.date(2024, 1, 1), datetime.datetime(2024, 1, 1)),
+        (datetime.date(2024, 1, 1), "2024-01-01"),
+        (decimal.Decimal("1.10"), decimal.Decimal("1.1")),
+        (uuid.UUID(int=1), uuid.UUID(int=2)),
+    ],
+)
+def test_different_arguments_get_different_keys(first, second):
+    assert arguments_key((first,)) != arguments_key((second,))
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ({"a": 1, "b": [2]}, {"b": [2], "a": 1}),
+        ({3, 1, 2}, {1, 2, 3}),
+        (Point(1, [2]), Point(1, [2])),
+        (bytearray(5000), bytearray(5000)),
+        (memoryview(bytes(range(10)))[::2], memoryview(bytes(range(0, 10, 2)))),
+        (collections.defaultdict(list, {"a": [1]}), collections.defaultdict(list, {"a": [1]})),
+        (datetime.date(2024, 1, 1), datetime.date(2024, 1, 1)),
+    ],
+)
+def test_equal_arguments_get_equal_keys(first, second):
+    assert arguments_key((first,)) == arguments_key((second,))
+
+
+def test_positional_key_matches_arguments_key():
+    names = ("a", "b")
+    for args in [(1, "x"), (1, [2]), (None, {"c": b"d"})]:
+        assert positional_key(names, args) == arguments_key(tuple(zip(names, args)))
+
+
+def test_unsupported_unhashable_arguments_raise():
+    class Unhashable:
+        __hash__ = None
+
+    with pytest.raises(Exception, match="Can't build a cache key"):
+        arguments_key((Unhashable(),))
+
+
+def test_cached_functions_accept_unhashable_arguments():
+    calls = 0
+
+    @cache(ttl=60)
+    def total(values: list, weights: dict) -> float:
+        nonlocal calls
+        calls += 1
+        return sum(values) * sum(weights.values())
+
+    assert total([1, 2], {"a": 1, "b": 2}) == 9
+    assert total([1, 2], {"b": 2, "a": 1}) == 9
+    assert total([1, 3], {"a": 1, "b": 2}) == 12
+    assert calls == 2
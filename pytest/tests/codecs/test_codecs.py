@@ -0,0 +1,104 @@
+import pickle
+import uuid
+from dataclasses import dataclass
+
+import pytest
+from caching import CompressedCodec, MsgpackCodec, PickleCodec, SharedMemoryBackend
+from caching.cache import cache
+from caching.codecs import Codec, payload_size
+
+RESULTS = [
+    None,
+    42,
+    "text",
+    {"prices": [1.5, 2.5], "name": "market"},
+    b"raw bytes",
+    bytearray(b"raw bytearray"),
+    {"nested": bytearray(b"x" * 100_000)},
+]
+
+
+@dataclass
+class Market:
+    id: int
+    name: str
+
+
+def _join(chunks) -> bytes:
+    return b"".join(bytes(chunk) for chunk in chunks)
+
+
+@pytest.mark.parametrize("result", RESULTS + [Market(1, "BTC")])
+@pytest.mark.parametrize("codec", [PickleCodec(), CompressedCodec(), CompressedCodec(min_size=0)])
+def test_roundtrip(codec, result):
+    assert codec.decode(_join(codec.encode(result))) == result
+
+
+def test_bytes_are_not_pickled_or_copied():
+    result = b"x" * 1_000_000
+    chunks = PickleCodec().encode(result)
+
+    assert any(chunk is result for chunk in chunks)
+    assert payload_size(chunks) == len(result) + 1
+
+
+def test_out_of_band_buffers_are_not_copied_on_encode():
+    buffer = bytearray(b"x" * 1_000_000)
+    chunks = PickleCodec().encode({"buffer": pickle.PickleBuffer(buffer)})
+
+    buffer[0] = ord("y")  # the chunk is a view of the buffer, so it sees the write
+
+    assert any(memoryview(chunk).nbytes == len(buffer) and bytes(chunk[:1]) == b"y" for chunk in chunks)
+
+
+def test_memoryview_decodes_as_a_view_of_the_payload():
+    payload = _join(PickleCodec().encode(memoryview(b"abc")))
+    decoded = PickleCodec().decode(payload)
+
+    assert isinstance(decoded, memoryview)
+    assert decoded.obj is payload
+    assert decoded == b"abc"
+
+
+def test_compression_reduces_size():
+    result = {"rows": ["same row"] * 10_000}
+    plain = payload_size(PickleCodec().encode(result))
+    compressed = payload_size(CompressedCodec().encode(result))
+
+    assert compressed < plain / 10
+
+
+def test_msgpack_roundtrip():
+    pytest.importorskip("msgpack")
+    codec = MsgpackCodec()
+
+    for result in RESULTS[:5]:
+        assert codec.decode(_join(codec.encode(result))) == result
+    assert codec.decode(_join(codec.encode((1, 2)))) == [1, 2]
+
+
+def test_codec_is_selected_per_function():
+    backend = SharedMemoryBackend(f"caching-test-{uuid.uuid4().hex[:8]}", slots=64, slot_size=1024)
+    calls = 0
+    try:
+
+        @cache(ttl=60, backend=backend, codec=CompressedCodec(min_size=0))
+        def cached_function() -> str:
+            nonlocal calls
+            calls += 1
+            return "x" * 10_000  # only fits in a slot once compressed
+
+        assert cached_function() == cached_function() == "x" * 10_000
+        assert calls == 1
+    finally:
+        backend.close()
+        backend.unlink()
+
+
+def test_incomplete_codecs_fail_at_instantiation():
+    class EncodeOnly(Codec):
+        def encode(self, value):
+            return [pickle.dumps(value)]
+
+    with pytest.raises(TypeError, match="decode"):
+        EncodeOnly()
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from caching.cache import cache
+
+
+@pytest.mark.asyncio
+async def test_slow_functions_are_recomputed_before_expiry():
+    calls = 0
+
+    @cache(ttl=1, early_recompute=1_000_000)
+    async def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await cached_function() == 1
+    assert await cached_function() == 2
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_early_recomputes_share_one_call():
+    calls = 0
+
+    @cache(ttl=1, early_recompute=1_000_000)
+    async def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    await cached_function()
+    results = await asyncio.gather(*(cached_function() for _ in range(10)))
+    assert 2 in results and set(results) <= {1, 2}
+    assert calls == 2
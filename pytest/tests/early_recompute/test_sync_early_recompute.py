@@ -0,0 +1,65 @@
+import time
+
+from caching.bucket import CacheBucket, CacheEntry
+from caching.cache import cache
+from caching.features.early_recompute import EarlyRecompute
+from caching.utils.functions import get_function_id
+
+
+def test_slow_functions_are_recomputed_before_expiry():
+    calls = 0
+
+    # With such a beta, a 10ms compute makes the recompute all but certain (1 - 1e-4) way before the 1s ttl
+    @cache(ttl=1, early_recompute=1_000_000)
+    def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.01)
+        return calls
+
+    assert cached_function() == 1
+    assert cached_function() == 2
+    assert calls == 2
+
+
+def test_entries_are_not_recomputed_early_by_default():
+    calls = 0
+
+    @cache(ttl=1)
+    def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.01)
+        return calls
+
+    for _ in range(10):
+        assert cached_function() == 1
+
+
+def test_recompute_probability_grows_towards_expiry():
+    early = EarlyRecompute(beta=1)
+    early.record(1)
+
+    fresh = CacheEntry(None, ttl=100)
+    expiring = CacheEntry(None, ttl=0.01)
+
+    assert sum(early.should_recompute(fresh) for _ in range(1000)) == 0
+    assert sum(early.should_recompute(expiring) for _ in range(1000)) > 950
+
+
+def test_ttl_jitter_spreads_expiries():
+    @cache(ttl=10, ttl_jitter=0.5)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    started = time.monotonic()
+    for i in range(100):
+        cached_function(i)
+    finished = time.monotonic()
+
+    function_id = get_function_id(cached_function)
+    entries = [entry for fid, _, entry, _ in CacheBucket.snapshot_entries() if fid == function_id]
+    assert len(entries) == 100
+    assert all(started + 5 <= entry.expires_at <= finished + 10 for entry in entries)
+    ttls = [entry.expires_at - started for entry in entries]
+    assert max(ttls) - min(ttls) > 2
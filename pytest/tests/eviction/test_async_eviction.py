@@ -0,0 +1,38 @@
+from itertools import count
+
+import pytest
+from caching import eviction_stats
+from caching.cache import cache
+from caching.utils.functions import get_function_id
+
+TTL = 60
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used():
+    counter = count()
+
+    @cache(ttl=TTL, max_entries=2, eviction_policy="lru")
+    async def cached_function(arg: int) -> int:
+        return next(counter)
+
+    first = await cached_function(1)
+    await cached_function(2)
+    await cached_function(1)
+    await cached_function(3)
+
+    assert await cached_function(1) == first
+    assert eviction_stats()[get_function_id(cached_function)].evictions == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("eviction_policy", ["lru", "lfu", "tinylfu"])
+async def test_max_entries_is_respected(eviction_policy):
+    @cache(ttl=TTL, max_entries=10, eviction_policy=eviction_policy)
+    async def cached_function(arg: int) -> int:
+        return arg
+
+    for i in range(100):
+        assert await cached_function(i) == i
+
+    assert eviction_stats()[get_function_id(cached_function)].size <= 10
@@ -0,0 +1,174 @@
+import random
+from itertools import count
+
+import pytest
+from caching import eviction_stats, set_max_entries
+from caching.bucket import CacheBucket
+from caching.cache import cache
+from caching.eviction import EvictionPolicy, LFUPolicy
+from caching.utils.functions import get_function_id
+
+TTL = 60
+
+
+def test_lru_evicts_least_recently_used():
+    counter = count()
+
+    @cache(ttl=TTL, max_entries=2, eviction_policy="lru")
+    def cached_function(arg: int) -> int:
+        return next(counter)
+
+    first = cached_function(1)
+    cached_function(2)
+    cached_function(1)  # 1 is now the most recently used
+    cached_function(3)  # evicts 2
+
+    assert cached_function(1) == first
+    assert cached_function(2) != 1, "2 should have been evicted and recomputed"
+
+    stats = eviction_stats()[get_function_id(cached_function)]
+    assert stats.size == 2
+    assert stats.evictions == 2
+    assert stats.hits == 2
+
+
+def test_lfu_evicts_least_frequently_used():
+    counter = count()
+
+    @cache(ttl=TTL, max_entries=2, eviction_policy="lfu")
+    def cached_function(arg: int) -> int:
+        return next(counter)
+
+    first = cached_function(1)
+    for _ in range(3):
+        cached_function(1)
+    second = cached_function(2)
+    cached_function(3)  # evicts 2, which was read less often than 1
+
+    assert cached_function(1) == first
+    assert cached_function(2) != second
+
+
+@pytest.mark.parametrize("eviction_policy", ["lru", "lfu", "tinylfu"])
+def test_max_entries_is_respected(eviction_policy):
+    @cache(ttl=TTL, max_entries=10, eviction_policy=eviction_policy)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    for i in range(100):
+        assert cached_function(i) == i
+
+    stats = eviction_stats()[get_function_id(cached_function)]
+    assert stats.size <= 10
+    assert stats.evictions >= 90
+
+
+def test_tinylfu_keeps_hot_set_under_scan():
+    counter = count()
+
+    @cache(ttl=TTL, max_entries=100, eviction_policy="tinylfu")
+    def cached_function(arg: int) -> int:
+        return next(counter)
+
+    hot = {i: cached_function(i) for i in range(50)}
+    for _ in range(5):
+        for i in hot:
+            cached_function(i)
+
+    # A scan of one-hit wonders should not flush the frequently read keys, which an LRU would all lose.
+    # The sketch hashes keys with the per process hash seed, a rare collision may still cost a hot key
+    for i in range(1000, 2000):
+        cached_function(i)
+
+    kept = sum(cached_function(i) == value for i, value in hot.items())
+    assert kept >= 0.9 * len(hot)
+
+
+def test_global_max_entries():
+    @cache(ttl=TTL)
+    def first_function(arg: int) -> int:
+        return arg
+
+    @cache(ttl=TTL)
+    def second_function(arg: int) -> int:
+        return arg
+
+    CacheBucket.clear()
+    set_max_entries(5)
+    try:
+        for i in range(10):
+            first_function(i)
+            second_function(i)
+
+        stats = eviction_stats()["*"]
+        assert stats.size == 5
+        assert stats.evictions == 15
+    finally:
+        set_max_entries(None)
+
+
+def test_incomplete_policies_fail_at_instantiation():
+    class NoDiscard(EvictionPolicy):
+        def __len__(self) -> int:
+            return 0
+
+        def __contains__(self, key) -> bool:
+            return False
+
+        def on_hit(self, key) -> None:
+            pass
+
+        def on_insert(self, key):
+            return None
+
+        def clear(self) -> None:
+            pass
+
+    with pytest.raises(TypeError, match="discard"):
+        NoDiscard(10)
+
+
+def test_lfu_evicts_the_next_frequency_after_a_discard():
+    policy = LFUPolicy(3)
+    for key, reads in (("once", 0), ("twice", 1), ("thrice", 2)):
+        policy.on_insert(key)
+        for _ in range(reads):
+            policy.on_hit(key)
+
+    policy.discard("once")
+    policy.on_insert("new")
+    policy.on_hit("new")
+    policy.on_hit("new")
+    policy.on_hit("new")
+
+    assert policy.on_insert("last") == "twice"
+
+
+def test_lfu_matches_a_reference_model():
+    rng = random.Random(0)
+    policy = LFUPolicy(8)
+    frequencies: dict[int, int] = {}
+    touched: dict[int, int] = {}
+    clock = count()
+
+    for _ in range(5000):
+        key, operation = rng.randrange(20), rng.random()
+        if operation < 0.3:
+            policy.discard(key)
+            frequencies.pop(key, None)
+        elif operation < 0.6 and key in frequencies:
+            policy.on_hit(key)
+            frequencies[key] += 1
+            touched[key] = next(clock)
+        else:
+            expected = None
+            if key in frequencies:
+                frequencies[key] += 1
+            else:
+                if len(frequencies) >= 8:
+                    expected = min(frequencies, key=lambda k: (frequencies[k], touched[k]))
+                    del frequencies[expected]
+                frequencies[key] = 1
+            touched[key] = next(clock)
+            assert policy.on_insert(key) == expected
+        assert len(policy) == len(frequencies)
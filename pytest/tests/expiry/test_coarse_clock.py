@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from caching import clock
+from caching.bucket import CacheBucket, CacheEntry
+from caching.cache import cache, set_clock_resolution
+
+TTL = 0.1
+RESOLUTION = 0.02
+
+
+@pytest.fixture
+def coarse_clock():
+    set_clock_resolution(RESOLUTION)
+    yield
+    set_clock_resolution(None)
+
+
+def test_entries_expire_with_the_coarse_clock(coarse_clock):
+    calls = 0
+
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        nonlocal calls
+        calls += 1
+        return arg
+
+    cached_function(1)
+    cached_function(1)
+    assert calls == 1
+
+    time.sleep(TTL + 2 * RESOLUTION)
+
+    cached_function(1)
+    assert calls == 2
+
+
+def test_coarse_clock_ticks():
+    set_clock_resolution(RESOLUTION)
+    try:
+        first = clock.now()
+        time.sleep(3 * RESOLUTION)
+        assert clock.now() > first
+    finally:
+        set_clock_resolution(None)
+    assert clock.coarse_now is None
+
+
+def test_entries_are_compact():
+    entry = CacheEntry(1, TTL)
+    assert not hasattr(entry, "__dict__")
+    assert entry.stale_until is entry.expires_at
+    assert not entry.is_expired()
+
+    forever = CacheEntry(1, None)
+    assert not forever.is_expired() and not forever.is_stale_expired()
+
+    CacheBucket.set("test_entries_are_compact", "key", 1, None)
+    assert CacheBucket.get("test_entries_are_compact", "key", False).result == 1
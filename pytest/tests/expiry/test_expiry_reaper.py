@@ -0,0 +1,56 @@
+import time
+
+from caching.bucket import CacheBucket
+from caching.cache import cache
+from caching.utils.functions import get_function_id
+
+TTL = 0.1
+
+
+def _cached_keys(function) -> list[str]:
+    function_id = get_function_id(function)
+    return [
+        cache_key for key_function_id, cache_key, *_ in CacheBucket.snapshot_entries() if key_function_id == function_id
+    ]
+
+
+def test_expired_entries_are_removed():
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    for i in range(10):
+        cached_function(i)
+    assert len(_cached_keys(cached_function)) == 10
+
+    time.sleep(TTL + 0.1)
+
+    assert _cached_keys(cached_function) == []
+
+
+def test_overwritten_entries_keep_their_new_deadline():
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    cached_function(1)
+    time.sleep(TTL / 2)
+    cached_function(1, skip_cache=True)  # pushes the deadline forward
+    time.sleep(TTL * 0.75)
+
+    # The first deadline already passed but the overwritten entry is still alive
+    assert len(_cached_keys(cached_function)) == 1
+
+    time.sleep(TTL)
+    assert _cached_keys(cached_function) == []
+
+
+def test_never_expiring_entries_are_not_indexed():
+    @cache(ttl=TTL, never_die=True)
+    def cached_function() -> int:
+        return 1
+
+    cached_function()
+    time.sleep(TTL * 3)
+
+    assert len(_cached_keys(cached_function)) == 1
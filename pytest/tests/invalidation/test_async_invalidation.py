@@ -0,0 +1,44 @@
+import pytest
+from caching import invalidate_tags
+from caching.cache import cache
+
+TTL = 60
+
+
+@pytest.mark.asyncio
+async def test_invalidate_and_cache_clear():
+    calls = []
+
+    @cache(ttl=TTL)
+    async def cached_function(arg: int) -> int:
+        calls.append(arg)
+        return arg
+
+    for i in range(3):
+        await cached_function(i)
+
+    await cached_function.invalidate(1)
+    await cached_function(0)
+    await cached_function(1)
+    assert calls == [0, 1, 2, 1]
+
+    await cached_function.cache_clear()
+    await cached_function(0)
+    assert calls == [0, 1, 2, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_tags():
+    calls = []
+
+    @cache(ttl=TTL, tags=lambda user_id: [f"async-user:{user_id}"])
+    async def get_user(user_id: int) -> int:
+        calls.append(user_id)
+        return user_id
+
+    await get_user(1)
+    await get_user(2)
+    invalidate_tags("async-user:2")
+    await get_user(1)
+    await get_user(2)
+    assert calls == [1, 2, 2]
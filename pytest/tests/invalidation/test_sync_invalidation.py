@@ -0,0 +1,130 @@
+import time
+
+import pytest
+from caching import RedisBackend, invalidate_tags
+from caching.bucket import CacheBucket
+from caching.cache import cache
+from caching.features.never_die import _NEVER_DIE_FUNCTION_KEYS
+from caching.utils.functions import get_function_id
+
+TTL = 60
+
+
+def test_invalidate_removes_a_single_key():
+    calls = []
+
+    @cache(ttl=TTL)
+    def cached_function(arg: int, other: int = 0) -> int:
+        calls.append(arg)
+        return arg
+
+    cached_function(1)
+    cached_function(2, other=3)
+
+    cached_function.invalidate(2, other=3)
+    cached_function(1)
+    cached_function(2, other=3)
+    assert calls == [1, 2, 2]
+
+
+def test_cache_clear_only_removes_the_function_entries():
+    calls = []
+    other_calls = []
+
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        calls.append(arg)
+        return arg
+
+    @cache(ttl=TTL)
+    def other_function(arg: int) -> int:
+        other_calls.append(arg)
+        return arg
+
+    for i in range(3):
+        cached_function(i)
+        other_function(i)
+
+    cached_function.cache_clear()
+    for i in range(3):
+        cached_function(i)
+        other_function(i)
+
+    assert calls == [0, 1, 2, 0, 1, 2]
+    assert other_calls == [0, 1, 2]
+
+
+def test_invalidate_tags_across_functions():
+    user_calls = []
+    market_calls = []
+
+    @cache(ttl=TTL, tags=lambda user_id: [f"user:{user_id}", "users"])
+    def get_user(user_id: int) -> int:
+        user_calls.append(user_id)
+        return user_id
+
+    @cache(ttl=TTL, tags=("markets",))
+    def get_market(market_id: int) -> int:
+        market_calls.append(market_id)
+        return market_id
+
+    for i in range(3):
+        get_user(i)
+        get_market(i)
+
+    invalidate_tags("user:1", "markets")
+    for i in range(3):
+        get_user(i)
+        get_market(i)
+
+    assert user_calls == [0, 1, 2, 1]
+    assert market_calls == [0, 1, 2, 0, 1, 2]
+
+
+def test_indexes_forget_expired_entries():
+    @cache(ttl=0.05, tags=lambda arg: [f"expiring:{arg}"])
+    def cached_function(arg: int) -> int:
+        return arg
+
+    for i in range(10):
+        cached_function(i)
+    function_id = get_function_id(cached_function)
+    assert len(CacheBucket._NAMESPACES[function_id]) == 10
+
+    time.sleep(0.2)
+
+    assert not CacheBucket._NAMESPACES[function_id]
+    assert not any(tag.startswith("expiring:") for tag in CacheBucket._TAG_KEYS)
+
+
+def test_invalidated_never_die_calls_stop_being_refreshed():
+    calls = 0
+
+    @cache(ttl=0.1, never_die=True)
+    def cached_function(arg: int) -> int:
+        nonlocal calls
+        calls += 1
+        return arg
+
+    function_id = get_function_id(cached_function)
+    cached_function(1)
+    cached_function.invalidate(1)
+    assert not _NEVER_DIE_FUNCTION_KEYS[function_id]
+
+    time.sleep(0.3)
+    assert calls == 1
+
+    cached_function(1)
+    cached_function(2)
+    cached_function.cache_clear()
+    assert not _NEVER_DIE_FUNCTION_KEYS[function_id]
+    time.sleep(0.3)
+    assert calls == 3
+
+
+def test_tags_need_the_process_cache():
+    with pytest.raises(Exception, match="tags are only supported"):
+
+        @cache(ttl=TTL, backend=RedisBackend(), tags=("tag",))
+        def cached_function(arg: int) -> int:
+            return arg
@@ -0,0 +1,25 @@
+import pytest
+from caching.cache import cache
+
+TTL = 60
+KB = 1024
+
+
+@pytest.mark.asyncio
+async def test_function_quota_evicts_by_size():
+    calls = 0
+
+    @cache(ttl=TTL, max_bytes=4 * KB, sizer=len)
+    async def cached_function(arg: int, size: int) -> bytes:
+        nonlocal calls
+        calls += 1
+        return b"x" * size
+
+    await cached_function(1, 3 * KB)
+    await cached_function(2, KB)
+    await cached_function(3, 2 * KB)  # evicts 1, the largest
+    await cached_function(2, KB)
+    assert calls == 3
+
+    stats = cached_function.cache_stats()
+    assert (stats.entries, stats.memory_bytes, stats.evictions) == (2, 3 * KB, 1)
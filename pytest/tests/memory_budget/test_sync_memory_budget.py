@@ -0,0 +1,180 @@
+import collections
+import dataclasses
+
+import pytest
+from caching import RedisBackend, estimate_size, memory_stats, set_memory_budget
+from caching.bucket import GLOBAL_POLICY_ID, CacheBucket
+from caching.cache import cache
+from caching.utils.functions import get_function_id
+
+TTL = 60
+KB = 1024
+
+
+def _sizer(result) -> int:
+    return len(result) if isinstance(result, bytes) else 0
+
+
+class Slotted:
+    __slots__ = ("__data", "name")
+
+    def __init__(self, data: bytes):
+        self.__data = data
+        self.name = "slotted"
+
+
+@dataclasses.dataclass(slots=True)
+class SlottedRecord:
+    data: bytes
+
+
+def test_estimates_track_the_data_not_the_container():
+    small, large = list(range(10)), list(range(100_000))
+    assert estimate_size(large) > 5000 * estimate_size(small)
+    assert estimate_size(b"x" * 10 * KB) >= 10 * KB
+    assert estimate_size({"key": "x" * KB}) > KB
+
+    class Frame:
+        def memory_usage(self, index=True):
+            return 5 * KB
+
+    class Array:
+        nbytes = 7 * KB
+
+    assert estimate_size(Frame()) == 5 * KB
+    assert estimate_size(Array()) == 7 * KB
+
+
+@pytest.mark.parametrize(
+    "wrap",
+    [
+        lambda data: collections.namedtuple("Result", "data")(data),
+        lambda data: collections.defaultdict(bytes, {"data": data}),
+        lambda data: collections.OrderedDict(data=data),
+        lambda data: Slotted(data),
+        lambda data: SlottedRecord(data),
+        lambda data: [Slotted(data)],
+    ],
+)
+def test_estimates_see_the_data_of_common_result_types(wrap):
+    data = b"x" * 1024 * KB
+    assert estimate_size(wrap(data)) >= len(data)
+
+
+def test_function_quota_evicts_by_size():
+    @cache(ttl=TTL, max_bytes=10 * KB, sizer=_sizer)
+    def cached_function(arg: int, size: int) -> bytes:
+        return b"x" * size
+
+    cached_function(1, 4 * KB)
+    cached_function(2, KB)
+    cached_function(3, KB)
+    cached_function(4, 3 * KB)
+    assert cached_function.cache_stats().memory_bytes == 9 * KB
+
+    # Over the quota, the largest of the least recently used entries goes first, not the oldest one
+    cached_function(5, 2 * KB)
+    stats = cached_function.cache_stats()
+    assert (stats.entries, stats.memory_bytes, stats.evictions) == (4, 7 * KB, 1)
+
+    function_stats = memory_stats()[get_function_id(cached_function)]
+    assert (function_stats.used_bytes, function_stats.evictions) == (7 * KB, 1)
+
+
+def test_results_larger_than_the_quota_are_not_kept():
+    calls = 0
+
+    @cache(ttl=TTL, max_bytes=KB, sizer=_sizer)
+    def cached_function(size: int) -> bytes:
+        nonlocal calls
+        calls += 1
+        return b"x" * size
+
+    assert cached_function(2 * KB) == b"x" * 2 * KB
+    cached_function(2 * KB)
+    assert calls == 2
+    assert cached_function.cache_stats().memory_bytes == 0
+
+
+def test_invalidated_entries_give_their_bytes_back():
+    @cache(ttl=TTL, max_bytes=10 * KB, sizer=_sizer)
+    def cached_function(size: int) -> bytes:
+        return b"x" * size
+
+    cached_function(KB)
+    cached_function(2 * KB)
+    cached_function.invalidate(KB)
+    assert cached_function.cache_stats().memory_bytes == 2 * KB
+    cached_function.cache_clear()
+    assert cached_function.cache_stats().memory_bytes == 0
+
+
+def test_global_budget_reports_usage_per_function():
+    @cache(ttl=TTL)
+    def first(size: int) -> bytes:
+        return b"x" * size
+
+    @cache(ttl=TTL)
+    def second(size: int) -> bytes:
+        return b"y" * size
+
+    CacheBucket.clear()
+    first(KB)
+    try:
+        # Entries cached before the budget count towards it
+        set_memory_budget(8 * KB, sizer=_sizer)
+        second(3 * KB)
+        first(3 * KB)
+
+        usage = memory_stats()[GLOBAL_POLICY_ID].usage
+        assert usage == {get_function_id(first): 4 * KB, get_function_id(second): 3 * KB}
+        assert first.cache_stats().memory_bytes == 4 * KB
+
+        second(2 * KB)
+        assert memory_stats()[GLOBAL_POLICY_ID].used_bytes <= 8 * KB
+    finally:
+        set_memory_budget(None)
+    assert GLOBAL_POLICY_ID not in memory_stats()
+    assert first.cache_stats().memory_bytes is None
+
+
+def test_existing_entries_are_sized_outside_the_policy_lock():
+    sized_under_lock = []
+
+    def sizer(result) -> int:
+        sized_under_lock.append(CacheBucket._POLICY_LOCK.locked())
+        return _sizer(result)
+
+    @cache(ttl=TTL)
+    def cached_function(size: int) -> bytes:
+        return b"x" * size
+
+    CacheBucket.clear()
+    for size in range(1, 11):
+        cached_function(size * 100)
+    try:
+        set_memory_budget(100 * KB, sizer=sizer)
+        assert sized_under_lock == [False] * 10
+        assert cached_function.cache_stats().memory_bytes == 5500
+    finally:
+        set_memory_budget(None)
+
+
+def test_failing_sizers_fall_back_to_the_default_estimate():
+    def sizer(result) -> int:
+        raise ValueError("can't size")
+
+    @cache(ttl=TTL, max_bytes=100 * KB, sizer=sizer)
+    def cached_function(size: int) -> bytes:
+        return b"x" * size
+
+    assert cached_function(KB) == b"x" * KB
+    assert cached_function.cache_stats().memory_bytes == estimate_size(b"x" * KB)
+
+
+def test_memory_budgets_need_the_process_cache():
+    with pytest.raises(Exception, match="max_bytes"):
+
+        @cache(ttl=TTL, max_bytes=KB, backend=RedisBackend())
+        def cached_function(arg: int) -> int:
+            return arg
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from caching.cache import cache
+
+TTL = 60
+
+
+@pytest.mark.asyncio
+async def test_hits_misses_and_entries_are_counted():
+    @cache(ttl=TTL)
+    async def cached_function(arg: int) -> int:
+        return arg
+
+    for _ in range(3):
+        for i in range(5):
+            await cached_function(i)
+
+    stats = cached_function.cache_stats()
+    assert (stats.hits, stats.misses, stats.entries) == (10, 5, 5)
+    assert stats.compute_time.count == 5
+
+
+@pytest.mark.asyncio
+async def test_waiters_record_their_wait_time():
+    @cache(ttl=TTL)
+    async def cached_function() -> int:
+        await asyncio.sleep(0.1)
+        return 1
+
+    await asyncio.gather(*(cached_function() for _ in range(5)))
+
+    stats = cached_function.cache_stats()
+    assert stats.compute_time.count == 1
+    assert stats.wait_time.count == 4
+    assert stats.wait_time.mean > 0.05
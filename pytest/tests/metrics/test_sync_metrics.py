@@ -0,0 +1,118 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from caching import cache_stats, set_metrics_enabled, set_stats_exporter
+from caching.cache import cache
+from caching.utils.functions import get_function_id
+
+TTL = 60
+
+
+def test_hits_misses_and_entries_are_counted():
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    for _ in range(3):
+        for i in range(5):
+            cached_function(i)
+
+    stats = cached_function.cache_stats()
+    assert (stats.hits, stats.misses, stats.entries) == (10, 5, 5)
+    assert stats.compute_time.count == 5
+    assert stats.hit_ratio == 10 / 15
+
+
+def test_waiters_record_their_wait_time():
+    barrier = threading.Barrier(5)
+
+    @cache(ttl=TTL)
+    def cached_function() -> int:
+        time.sleep(0.1)
+        return 1
+
+    def call():
+        barrier.wait()
+        return cached_function()
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        list(executor.map(lambda _: call(), range(5)))
+
+    stats = cached_function.cache_stats()
+    assert stats.compute_time.count == 1
+    assert stats.wait_time.count == 4
+    assert stats.wait_time.mean > 0.05
+    # Cumulative buckets, the last one holds every sample
+    assert stats.wait_time.buckets[-1][1] == 4
+
+
+def test_evictions_are_counted():
+    @cache(ttl=TTL, max_entries=2)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    for i in range(5):
+        cached_function(i)
+
+    stats = cached_function.cache_stats()
+    assert (stats.evictions, stats.entries) == (3, 2)
+
+
+def test_refresh_failures_are_counted():
+    calls = 0
+
+    @cache(ttl=0.05, stale_ttl=1)
+    def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise ValueError
+        return calls
+
+    cached_function()
+    time.sleep(0.1)
+    cached_function()
+    time.sleep(0.1)
+
+    stats = cached_function.cache_stats()
+    assert stats.stale_hits == 1
+    assert stats.refresh_failures == 1
+
+
+def test_nothing_is_recorded_while_disabled():
+    @cache(ttl=TTL)
+    def cached_function() -> int:
+        return 1
+
+    set_metrics_enabled(False)
+    try:
+        cached_function()
+        cached_function()
+    finally:
+        set_metrics_enabled(True)
+
+    stats = cached_function.cache_stats()
+    assert (stats.hits, stats.misses, stats.compute_time.count) == (0, 0, 0)
+
+
+def test_global_snapshot_and_exporter():
+    @cache(ttl=TTL)
+    def cached_function() -> int:
+        return 1
+
+    cached_function()
+    function_id = get_function_id(cached_function)
+    assert cache_stats()[function_id].misses == 1
+
+    exported = threading.Event()
+
+    def exporter(stats):
+        if function_id in stats:
+            exported.set()
+
+    set_stats_exporter(exporter, interval=0.01)
+    try:
+        assert exported.wait(1)
+    finally:
+        set_stats_exporter(None)
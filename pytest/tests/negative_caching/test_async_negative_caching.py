@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from caching.cache import cache
+
+TTL = 60
+ERROR_TTL = 0.1
+
+
+@pytest.mark.asyncio
+async def test_exceptions_are_cached_for_error_ttl():
+    calls = 0
+
+    @cache(ttl=TTL, cache_exceptions=(TimeoutError,), error_ttl=ERROR_TTL)
+    async def cached_function(arg: int) -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        if calls == 1:
+            raise TimeoutError("backend down")
+        return arg
+
+    # Concurrent callers share the leader's exception, later ones get the cached one
+    outcomes = await asyncio.gather(*(cached_function(1) for _ in range(5)), return_exceptions=True)
+    with pytest.raises(TimeoutError):
+        await cached_function(1)
+    assert calls == 1
+    assert all(isinstance(outcome, TimeoutError) for outcome in outcomes)
+
+    await asyncio.sleep(ERROR_TTL + 0.05)
+    assert await cached_function(1) == 1
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_lookups_raise_cached_exceptions():
+    @cache(ttl=TTL, cache_exceptions=(TimeoutError,), error_ttl=TTL)
+    async def cached_function(arg: int) -> int:
+        if arg == 2:
+            raise TimeoutError("backend down")
+        return arg
+
+    with pytest.raises(TimeoutError):
+        await cached_function(2)
+    assert await cached_function.map([1, 3]) == [1, 3]
+    with pytest.raises(TimeoutError):
+        await cached_function.map([1, 2])
+
+
+@pytest.mark.asyncio
+async def test_failed_revalidations_keep_serving_the_stale_result():
+    failing = False
+
+    @cache(ttl=ERROR_TTL, stale_ttl=TTL, cache_exceptions=(TimeoutError,), error_ttl=TTL)
+    async def cached_function(arg: int) -> str:
+        if failing:
+            raise TimeoutError("backend down")
+        return "good"
+
+    assert await cached_function(1) == "good"
+    failing = True
+    await asyncio.sleep(ERROR_TTL + 0.05)
+
+    assert await cached_function(1) == "good"
+    await asyncio.sleep(0.05)
+    assert await cached_function(1) == "good"
@@ -0,0 +1,138 @@
+import threading
+import time
+import traceback
+
+import pytest
+from caching import RedisBackend
+from caching.cache import cache
+
+TTL = 60
+ERROR_TTL = 0.1
+
+
+def test_exceptions_are_cached_for_error_ttl():
+    calls = 0
+    failing = True
+
+    @cache(ttl=TTL, cache_exceptions=(TimeoutError,), error_ttl=ERROR_TTL)
+    def cached_function(arg: int) -> int:
+        nonlocal calls
+        calls += 1
+        if failing:
+            raise TimeoutError("backend down")
+        return arg
+
+    for _ in range(3):
+        with pytest.raises(TimeoutError, match="backend down"):
+            cached_function(1)
+    assert calls == 1
+
+    failing = False
+    time.sleep(ERROR_TTL + 0.05)
+    assert cached_function(1) == 1
+    assert cached_function(1) == 1
+    assert calls == 2
+
+
+def test_other_exceptions_are_not_cached():
+    calls = 0
+
+    @cache(ttl=TTL, cache_exceptions=TimeoutError, error_ttl=ERROR_TTL)
+    def cached_function(arg: int) -> int:
+        nonlocal calls
+        calls += 1
+        raise ValueError("bad argument")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            cached_function(1)
+    assert calls == 3
+
+
+def test_concurrent_callers_share_the_exception():
+    calls = 0
+    outcomes = []
+
+    @cache(ttl=TTL, cache_exceptions=(TimeoutError,), error_ttl=TTL)
+    def cached_function(arg: int) -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        raise TimeoutError("backend down")
+
+    def call():
+        try:
+            cached_function(1)
+        except TimeoutError as exception:
+            outcomes.append(exception)
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    call()
+
+    assert calls == 1
+    assert len(outcomes) == 9
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+
+
+def test_cached_exceptions_keep_their_traceback():
+    @cache(ttl=TTL, cache_exceptions=(TimeoutError,), error_ttl=TTL)
+    def cached_function(arg: int) -> int:
+        raise TimeoutError("backend down")
+
+    depths = []
+    for _ in range(50):
+        try:
+            cached_function(1)
+        except TimeoutError as exception:
+            frames = traceback.extract_tb(exception.__traceback__)
+            assert frames[-1].name == "cached_function"
+            depths.append(len(frames))
+    assert max(depths[1:]) == min(depths[1:])
+
+
+def test_invalidate_removes_cached_exceptions():
+    failing = True
+
+    @cache(ttl=TTL, cache_exceptions=(TimeoutError,), error_ttl=TTL)
+    def cached_function(arg: int) -> int:
+        if failing:
+            raise TimeoutError("backend down")
+        return arg
+
+    with pytest.raises(TimeoutError):
+        cached_function(1)
+    failing = False
+    cached_function.invalidate(1)
+    assert cached_function(1) == 1
+    assert cached_function.map([1, 2]) == [1, 2]
+
+
+def test_failed_revalidations_keep_serving_the_stale_result():
+    failing = False
+
+    @cache(ttl=ERROR_TTL, stale_ttl=TTL, cache_exceptions=(TimeoutError,), error_ttl=TTL)
+    def cached_function(arg: int) -> str:
+        if failing:
+            raise TimeoutError("backend down")
+        return "good"
+
+    assert cached_function(1) == "good"
+    failing = True
+    time.sleep(ERROR_TTL + 0.05)
+
+    # The outage is when serving stale matters, the failed refresh must not replace the stale result
+    assert cached_function(1) == "good"
+    time.sleep(0.05)
+    assert cached_function(1) == "good"
+
+
+def test_cached_exceptions_need_the_process_cache():
+    with pytest.raises(Exception, match="cache_exceptions is only supported"):
+
+        @cache(ttl=TTL, backend=RedisBackend(), cache_exceptions=(TimeoutError,))
+        def cached_function(arg: int) -> int:
+            return arg
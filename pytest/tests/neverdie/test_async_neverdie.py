@@ -1,11 +1,40 @@
 import asyncio
+import time
 
 import pytest
+from caching.bucket import CacheBucket
 from caching.cache import cache
+from caching.features.never_die import _NEVER_DIE_REGISTRY, NeverDieCacheEntry, unregister_never_die_keys
+from caching.utils.functions import get_function_id
 
 TTL = 0.1
 
 
+@pytest.fixture(autouse=True)
+def isolated_refreshes():
+    """Entries registered by other tests would keep refreshing for the whole session"""
+    unregister_never_die_keys(list(_NEVER_DIE_REGISTRY))
+    yield
+    unregister_never_die_keys(list(_NEVER_DIE_REGISTRY))
+
+
+async def _wait_until(condition, timeout: float = 2) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(TTL / 10)
+    return True
+
+
+def _entry(function) -> NeverDieCacheEntry:
+    function_id = get_function_id(function)
+    [entry] = [
+        entry for (key_function_id, _), entry in list(_NEVER_DIE_REGISTRY.items()) if key_function_id == function_id
+    ]
+    return entry
+
+
 @pytest.mark.asyncio
 async def test_neverdie_vs_regular():
     """
@@ -67,3 +96,105 @@ async def test_neverdie_exception():
     # At this point, the function got stuck at returning just 3
     assert await neverdie_fn() == 2
     assert neverdie_counter > 2
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_refreshes_go_first():
+    refreshed: list[str] = []
+    calls = {"low": 0, "high": 0}
+
+    def record(name: str):
+        calls[name] += 1
+        if calls[name] == 2:
+            refreshed.append(name)
+
+    @cache(ttl=TTL, never_die=True, never_die_priority=5)
+    async def low_fn() -> None:
+        record("low")
+
+    @cache(ttl=TTL, never_die=True, never_die_priority=10)
+    async def high_fn() -> None:
+        record("high")
+
+    await low_fn()
+    await high_fn()
+
+    # Due at the same moment, so both are dispatched to the loop in one pass of the scheduler
+    deadline = time.monotonic() + TTL
+    for entry in (_entry(low_fn), _entry(high_fn)):
+        entry._expires_at = deadline
+        entry.schedule()
+
+    assert await _wait_until(lambda: len(refreshed) == 2)
+    assert refreshed == ["high", "low"]
+
+
+@pytest.mark.asyncio
+async def test_unread_entries_are_retired():
+    counter = 0
+
+    @cache(ttl=TTL, never_die=True, never_die_retire_after=2)
+    async def neverdie_fn() -> int:
+        nonlocal counter
+        counter += 1
+        return counter
+
+    await neverdie_fn()
+    function_id = get_function_id(neverdie_fn)
+
+    def retired() -> bool:
+        registered = any(key_function_id == function_id for key_function_id, _ in list(_NEVER_DIE_REGISTRY))
+        cached = any(key_function_id == function_id for key_function_id, *_ in CacheBucket.snapshot_entries())
+        return not registered and not cached
+
+    assert await _wait_until(retired)
+
+    # The next read recomputes the call and registers it again
+    refreshes = counter
+    assert await neverdie_fn() == refreshes + 1
+    assert not retired()
+
+
+@pytest.mark.asyncio
+async def test_read_entries_are_kept():
+    refreshes = 0
+
+    @cache(ttl=TTL, never_die=True, never_die_retire_after=2)
+    async def neverdie_fn() -> int:
+        nonlocal refreshes
+        refreshes += 1
+        return 1
+
+    async def read_until_refreshed() -> None:
+        while refreshes < 6:
+            await neverdie_fn()
+            await asyncio.sleep(TTL / 10)
+
+    await neverdie_fn()
+    entry = _entry(neverdie_fn)
+    # Read several times per refresh period, for more periods than an unread entry would last
+    await asyncio.wait_for(read_until_refreshed(), 2)
+
+    # Still the first registration, a retired call would have been registered again by the reads
+    assert _entry(neverdie_fn) is entry
+
+
+@pytest.mark.asyncio
+async def test_adaptive_entries_are_refreshed_less_often_while_unread():
+    counters = {"fixed": 0, "adaptive": 0}
+
+    @cache(ttl=TTL, never_die=True)
+    async def fixed_fn() -> None:
+        counters["fixed"] += 1
+
+    @cache(ttl=TTL, never_die=True, never_die_adaptive=True)
+    async def adaptive_fn() -> None:
+        counters["adaptive"] += 1
+
+    await fixed_fn()
+    await adaptive_fn()
+
+    # Unread, the adaptive entry is refreshed after 1, 2, 4 then 8 ttls
+    assert await _wait_until(lambda: counters["fixed"] >= 8)
+    assert counters["adaptive"] <= 5
+    assert _entry(adaptive_fn).idle_refreshes >= 2
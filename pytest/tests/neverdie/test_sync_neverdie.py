@@ -1,10 +1,49 @@
+import threading
 import time
+import uuid
 
-from caching.cache import cache
+import pytest
+from caching import SharedMemoryBackend
+from caching.bucket import CacheBucket
+from caching.cache import cache, set_never_die_concurrency
+from caching.features.never_die import (
+    _NEVER_DIE_READY,
+    _NEVER_DIE_REGISTRY,
+    NeverDieCacheEntry,
+    _retire,
+    unregister_never_die_keys,
+)
+from caching.utils.functions import get_function_id
 
 TTL = 0.1
 
 
+@pytest.fixture(autouse=True)
+def isolated_refreshes():
+    """Entries registered by other tests would keep refreshing on the shared pool for the whole session"""
+    unregister_never_die_keys(list(_NEVER_DIE_REGISTRY))
+    set_never_die_concurrency(None)
+    yield
+    unregister_never_die_keys(list(_NEVER_DIE_REGISTRY))
+
+
+def _wait_until(condition, timeout: float = 2) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(TTL / 10)
+    return True
+
+
+def _entry(function) -> NeverDieCacheEntry:
+    function_id = get_function_id(function)
+    [entry] = [
+        entry for (key_function_id, _), entry in list(_NEVER_DIE_REGISTRY.items()) if key_function_id == function_id
+    ]
+    return entry
+
+
 def test_neverdie_vs_regular():
     """
     Compare never_die and regular caching side by side to demonstrate
@@ -64,3 +103,206 @@ def test_neverdie_exception():
     # At this point, the function got stuck at returning just 3
     assert neverdie_fn() == 2
     assert neverdie_counter > 2
+
+
+def test_refreshes_are_bounded_by_the_concurrency():
+    running = 0
+    max_running = 0
+    calls: dict[int, int] = {}
+    lock = threading.Lock()
+
+    @cache(ttl=TTL, never_die=True)
+    def neverdie_fn(arg: int) -> int:
+        nonlocal running, max_running
+        with lock:
+            calls[arg] = calls.get(arg, 0) + 1
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return arg
+
+    set_never_die_concurrency(2)
+    try:
+        for i in range(10):
+            neverdie_fn(i)
+        max_running = 0
+
+        # Every call came due and was refreshed at least once
+        assert _wait_until(lambda: len(calls) == 10 and min(calls.values()) >= 2)
+        assert max_running == 2
+    finally:
+        set_never_die_concurrency(None)
+
+
+def test_higher_priority_refreshes_go_first():
+    refreshed: list[str] = []
+    calls = {"blocking": 0, "low": 0, "high": 0}
+    blocking = threading.Event()
+    release = threading.Event()
+
+    def record(name: str):
+        calls[name] += 1
+        if calls[name] == 2:
+            refreshed.append(name)
+
+    @cache(ttl=TTL, never_die=True, never_die_priority=100)
+    def blocking_fn() -> None:
+        record("blocking")
+        if calls["blocking"] == 2:
+            blocking.set()
+            release.wait(5)  # holds the only worker while the others come due
+
+    @cache(ttl=TTL, never_die=True, never_die_priority=5)
+    def low_fn() -> None:
+        record("low")
+
+    @cache(ttl=TTL, never_die=True, never_die_priority=10)
+    def high_fn() -> None:
+        record("high")
+
+    def queued_priorities() -> list[int]:
+        return sorted(item[-1].priority for item in list(_NEVER_DIE_READY.queue))
+
+    set_never_die_concurrency(1)
+    try:
+        blocking_fn()
+        low_fn()
+        high_fn()
+
+        assert _wait_until(lambda: blocking.is_set() and queued_priorities() == [5, 10])
+        release.set()
+        assert _wait_until(lambda: len(refreshed) == 3)
+        assert refreshed == ["blocking", "high", "low"]
+    finally:
+        release.set()
+        set_never_die_concurrency(None)
+
+
+def test_calls_are_registered_once():
+    @cache(ttl=60, never_die=True)
+    def neverdie_fn(arg: int) -> int:
+        return arg
+
+    for _ in range(100):
+        for i in range(10):
+            neverdie_fn(i)
+
+    function_id = get_function_id(neverdie_fn)
+    assert sum(1 for key_function_id, _ in list(_NEVER_DIE_REGISTRY) if key_function_id == function_id) == 10
+
+
+def test_unread_entries_are_retired():
+    counter = 0
+
+    @cache(ttl=TTL, never_die=True, never_die_retire_after=2)
+    def neverdie_fn() -> int:
+        nonlocal counter
+        counter += 1
+        return counter
+
+    neverdie_fn()
+    function_id = get_function_id(neverdie_fn)
+
+    def retired() -> bool:
+        registered = any(key_function_id == function_id for key_function_id, _ in list(_NEVER_DIE_REGISTRY))
+        cached = any(key_function_id == function_id for key_function_id, *_ in CacheBucket.snapshot_entries())
+        return not registered and not cached
+
+    # Retired after 2 unread refresh periods, polled as refreshes share the pool with the rest of the process
+    assert _wait_until(retired)
+
+    # The next read recomputes the call and registers it again
+    refreshes = counter
+    assert neverdie_fn() == refreshes + 1
+    assert not retired()
+
+
+def test_entries_retire_after_consecutive_unread_periods():
+    entry = NeverDieCacheEntry("function", "key", lambda: None, 60, (), {}, None, retire_after=2)
+
+    assert not entry.record_refresh_period()
+    entry.reads += 1
+    assert not entry.record_refresh_period()  # a read starts the count again
+    assert not entry.record_refresh_period()
+    assert entry.record_refresh_period()
+
+
+def test_read_entries_are_kept():
+    refreshes = 0
+
+    @cache(ttl=TTL, never_die=True, never_die_retire_after=2)
+    def neverdie_fn() -> int:
+        nonlocal refreshes
+        refreshes += 1
+        return 1
+
+    def read_until_refreshed() -> bool:
+        neverdie_fn()
+        return refreshes >= 6
+
+    neverdie_fn()
+    entry = _entry(neverdie_fn)
+    # Read several times per refresh period, for more periods than an unread entry would last
+    assert _wait_until(read_until_refreshed)
+
+    # Still the first registration, a retired call would have been registered again by the reads
+    assert _entry(neverdie_fn) is entry
+
+
+def test_adaptive_entries_are_refreshed_less_often_while_unread():
+    counters = {"fixed": 0, "adaptive": 0}
+
+    @cache(ttl=TTL, never_die=True)
+    def fixed_fn() -> None:
+        counters["fixed"] += 1
+
+    @cache(ttl=TTL, never_die=True, never_die_adaptive=True)
+    def adaptive_fn() -> None:
+        counters["adaptive"] += 1
+
+    fixed_fn()
+    adaptive_fn()
+
+    # Unread, the adaptive entry is refreshed after 1, 2, 4 then 8 ttls
+    assert _wait_until(lambda: counters["fixed"] >= 8)
+    assert counters["adaptive"] <= 5
+
+
+def test_adaptive_refresh_periods_double_while_unread():
+    entry = NeverDieCacheEntry("function", "key", lambda: None, 60, (), {}, None, adaptive=True)
+
+    def next_period() -> int:
+        entry.record_refresh_period()
+        started = time.monotonic()
+        entry.reset()
+        return round((entry._expires_at - started) / entry.ttl)
+
+    assert [next_period() for _ in range(5)] == [2, 4, 8, 8, 8]
+    entry.reads += 1
+    assert next_period() == 1
+
+
+def test_retiring_a_backend_entry_keeps_it_for_other_processes():
+    backend = SharedMemoryBackend(f"caching-test-{uuid.uuid4().hex[:8]}", slots=64, slot_size=256)
+    try:
+
+        @cache(ttl=60, never_die=True, never_die_retire_after=2, backend=backend)
+        def neverdie_fn() -> int:
+            return 1
+
+        neverdie_fn()
+        function_id = get_function_id(neverdie_fn)
+        entry = _entry(neverdie_fn)
+        assert backend.get(function_id, entry.cache_key)[1] is None
+
+        _retire(entry)
+
+        assert (function_id, entry.cache_key) not in _NEVER_DIE_REGISTRY
+        # Left to lapse after a ttl unless another process that still reads it refreshes it
+        _, ttl = backend.get(function_id, entry.cache_key)
+        assert 59 < ttl <= 60
+    finally:
+        backend.close()
+        backend.unlink()
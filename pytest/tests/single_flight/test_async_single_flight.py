@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from caching._async.flight import _ASYNC_FLIGHTS
+from caching.cache import cache
+from caching.utils.functions import get_function_id
+
+TTL = 60
+
+
+def _flights_in_progress(function) -> int:
+    function_id = get_function_id(function)
+    return sum(1 for _, key_function_id, _ in list(_ASYNC_FLIGHTS._flights) if key_function_id == function_id)
+
+
+@pytest.mark.asyncio
+async def test_flights_are_released_after_use():
+    @cache(ttl=TTL)
+    async def cached_function(arg: int) -> int:
+        return arg
+
+    await asyncio.gather(*(cached_function(i) for i in range(1000)))
+
+    assert _flights_in_progress(cached_function) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_computation():
+    calls = 0
+
+    @cache(ttl=TTL)
+    async def cached_function(arg: int) -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return arg
+
+    results = await asyncio.gather(*(cached_function(1) for _ in range(5000)))
+
+    assert results == [1] * 5000
+    assert calls == 1
+    assert _flights_in_progress(cached_function) == 0
+
+
+@pytest.mark.asyncio
+async def test_waiters_receive_the_leader_exception():
+    calls = 0
+
+    @cache(ttl=TTL)
+    async def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise ValueError
+
+    results = await asyncio.gather(*(cached_function() for _ in range(10)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_skip_cache_callers_share_one_recomputation():
+    calls = 0
+
+    @cache(ttl=TTL)
+    async def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    assert await cached_function() == 1
+    results = await asyncio.gather(*(cached_function(skip_cache=True) for _ in range(10)))
+
+    assert results == [2] * 10
+    assert await cached_function() == 2
+
+
+@pytest.mark.asyncio
+async def test_waiters_take_over_when_the_leader_is_cancelled():
+    calls = 0
+
+    @cache(ttl=TTL)
+    async def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    leader = asyncio.create_task(cached_function())
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(cached_function())
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await waiter == 2
+    assert _flights_in_progress(cached_function) == 0
+
+
+@pytest.mark.asyncio
+async def test_waiters_cancelled_with_the_leader_stay_cancelled():
+    calls = 0
+
+    @cache(ttl=TTL)
+    async def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    leader = asyncio.create_task(cached_function())
+    await asyncio.sleep(0.01)
+    cancelled_waiter = asyncio.create_task(cached_function())
+    waiter = asyncio.create_task(cached_function())
+    await asyncio.sleep(0.01)
+    # In the same loop iteration, the cancelled waiter must not be elected as the new leader
+    leader.cancel()
+    cancelled_waiter.cancel()
+
+    assert await waiter == 2
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled_waiter
+    assert calls == 2
+    assert _flights_in_progress(cached_function) == 0
+
+
+@pytest.mark.asyncio
+async def test_flight_is_released_when_waiter_is_cancelled():
+    @cache(ttl=TTL)
+    async def cached_function() -> int:
+        await asyncio.sleep(0.05)
+        return 1
+
+    leader = asyncio.create_task(cached_function())
+    waiter = asyncio.create_task(cached_function())
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+
+    assert await leader == 1
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert _flights_in_progress(cached_function) == 0
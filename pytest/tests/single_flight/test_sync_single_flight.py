@@ -0,0 +1,87 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from caching._sync.flight import _SYNC_FLIGHTS
+from caching.cache import cache
+from caching.utils.functions import get_function_id
+
+TTL = 60
+
+
+def _flights_in_progress(function) -> int:
+    function_id = get_function_id(function)
+    return sum(1 for key_function_id, _ in list(_SYNC_FLIGHTS._flights) if key_function_id == function_id)
+
+
+def test_flights_are_released_after_use():
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    for i in range(1000):
+        cached_function(i)
+
+    assert _flights_in_progress(cached_function) == 0
+
+
+def test_concurrent_callers_share_one_computation():
+    calls = 0
+
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        return arg
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(cached_function, [1] * 10))
+
+    assert results == [1] * 10
+    assert calls == 1
+    assert _flights_in_progress(cached_function) == 0
+
+
+def test_waiters_receive_the_leader_exception():
+    calls = 0
+    barrier = threading.Barrier(5)
+
+    @cache(ttl=TTL)
+    def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.1)
+        raise ValueError
+
+    def call():
+        barrier.wait()
+        with pytest.raises(ValueError):
+            cached_function()
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        for future in [executor.submit(call) for _ in range(5)]:
+            future.result()
+
+    assert calls == 1
+    assert _flights_in_progress(cached_function) == 0
+
+
+def test_concurrent_skip_cache_callers_share_one_recomputation():
+    calls = 0
+
+    @cache(ttl=TTL)
+    def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        return calls
+
+    assert cached_function() == 1
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(lambda _: cached_function(skip_cache=True), range(10)))
+
+    assert results == [2] * 10
+    assert cached_function() == 2
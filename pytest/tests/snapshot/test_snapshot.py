@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+from caching import invalidate_tags, load_snapshot, save_snapshot, set_snapshots
+from caching.bucket import CacheBucket
+from caching.cache import cache
+
+TTL = 60
+
+
+def test_entries_are_loaded_back(tmp_path):
+    calls = []
+
+    @cache(ttl=TTL, tags=lambda arg: [f"snapshot:{arg}"])
+    def cached_function(arg: int) -> list[int]:
+        calls.append(arg)
+        return [arg]
+
+    for i in range(3):
+        cached_function(i)
+    path = str(tmp_path / "cache.snapshot")
+    assert save_snapshot(path) >= 3
+
+    CacheBucket.clear()
+    assert load_snapshot(path, background=False) >= 3
+    assert [cached_function(i) for i in range(3)] == [[0], [1], [2]]
+    assert calls == [0, 1, 2]
+
+    invalidate_tags("snapshot:1")
+    cached_function(1)
+    assert calls == [0, 1, 2, 1]
+
+
+def test_expiry_survives_the_snapshot(tmp_path):
+    @cache(ttl=0.2)
+    def short_lived(arg: int) -> int:
+        return arg
+
+    @cache(ttl=TTL)
+    def long_lived(arg: int) -> int:
+        return arg
+
+    short_lived(1)
+    long_lived(1)
+    path = str(tmp_path / "cache.snapshot")
+    save_snapshot(path)
+    CacheBucket.clear()
+
+    time.sleep(0.3)
+    load_snapshot(path, background=False)
+    keys = {function_id for function_id, *_ in CacheBucket.snapshot_entries()}
+    assert any(function_id.endswith("long_lived") for function_id in keys)
+    assert not any(function_id.endswith("short_lived") for function_id in keys)
+    entry = next(
+        entry for function_id, _, entry, _ in CacheBucket.snapshot_entries() if function_id.endswith("long_lived")
+    )
+    assert TTL - 1 < entry.expires_at - time.monotonic() <= TTL
+
+
+def test_unpicklable_results_are_skipped(tmp_path):
+    @cache(ttl=TTL)
+    def unpicklable(arg: int):
+        return lambda: arg
+
+    @cache(ttl=TTL)
+    def picklable(arg: int) -> int:
+        return arg
+
+    CacheBucket.clear()
+    unpicklable(1)
+    picklable(1)
+    assert save_snapshot(str(tmp_path / "cache.snapshot")) == 1
+
+
+def test_loading_keeps_entries_cached_meanwhile(tmp_path):
+    results = iter(["old", "new"])
+
+    @cache(ttl=TTL)
+    def cached_function() -> str:
+        return next(results)
+
+    cached_function()
+    path = str(tmp_path / "cache.snapshot")
+    save_snapshot(path)
+    CacheBucket.clear()
+
+    assert cached_function() == "new"
+    load_snapshot(path, background=False)
+    assert cached_function() == "new"
+
+
+def test_missing_snapshot_loads_nothing(tmp_path):
+    assert load_snapshot(str(tmp_path / "missing.snapshot"), background=False) == 0
+
+
+def test_snapshots_are_saved_periodically(tmp_path):
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    cached_function(1)
+    path = str(tmp_path / "cache.snapshot")
+    set_snapshots(path, interval=0.05, on_exit=False)
+    try:
+        time.sleep(0.2)
+        assert os.path.exists(path)
+    finally:
+        set_snapshots(None)
+
+
+def test_warm_restart(tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    script = textwrap.dedent(
+        f"""
+        import time
+        from caching import cache, load_snapshot, set_snapshots
+
+        calls = []
+
+        @cache(ttl=60)
+        def get_user(user_id):
+            calls.append(user_id)
+            return {{"id": user_id}}
+
+        load_snapshot({path!r}, background=False)
+        set_snapshots({path!r})
+        assert [get_user(i) for i in range(3)] == [{{"id": i}} for i in range(3)]
+        print(len(calls))
+        """
+    )
+    runs = [
+        subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout.strip()
+        for _ in range(2)
+    ]
+    # The first process computes every call and saves them on exit, the second one starts warm
+    assert runs == ["3", "0"]
@@ -0,0 +1,105 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+from caching import SharedMemoryBackend
+from caching.cache import cache
+
+TTL = 0.1
+STALE_TTL = 1
+
+
+async def _wait_for(condition, timeout: float = 2):
+    deadline = time.monotonic() + timeout
+    while not await condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_refreshing():
+    calls = 0
+
+    @cache(ttl=TTL, stale_ttl=STALE_TTL)
+    async def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            await asyncio.sleep(0.2)
+        return calls
+
+    assert await cached_function() == 1
+    await asyncio.sleep(TTL * 1.5)
+
+    start = time.monotonic()
+    assert await cached_function() == 1
+    assert time.monotonic() - start < 0.05, "the stale entry should be served without waiting for the refresh"
+
+    async def refreshed() -> bool:
+        return await cached_function() == 2
+
+    await _wait_for(refreshed)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_stale_hits_start_a_single_refresh():
+    calls = 0
+
+    @cache(ttl=TTL, stale_ttl=STALE_TTL)
+    async def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return calls
+
+    await cached_function()
+    await asyncio.sleep(TTL * 1.5)
+
+    assert await asyncio.gather(*(cached_function() for _ in range(10))) == [1] * 10
+
+    async def refreshed() -> bool:
+        return await cached_function() == 2
+
+    await _wait_for(refreshed)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_entry_past_the_stale_window_is_recomputed():
+    calls = 0
+
+    @cache(ttl=TTL, stale_ttl=TTL)
+    async def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await cached_function() == 1
+    await asyncio.sleep(TTL * 2.5)
+    assert await cached_function() == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_from_backends():
+    backend = SharedMemoryBackend(f"caching-test-{uuid.uuid4().hex[:8]}", slots=64, slot_size=1024)
+    calls = 0
+    try:
+
+        @cache(ttl=TTL, stale_ttl=STALE_TTL, backend=backend)
+        async def cached_function() -> int:
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await cached_function() == 1
+        await asyncio.sleep(TTL * 1.5)
+        assert await cached_function() == 1
+
+        async def refreshed() -> bool:
+            return await cached_function() == 2
+
+        await _wait_for(refreshed)
+    finally:
+        backend.close()
+        backend.unlink()
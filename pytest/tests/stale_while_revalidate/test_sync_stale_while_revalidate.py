@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from caching.cache import cache
+
+TTL = 0.1
+STALE_TTL = 1
+
+
+def _wait_for(condition, timeout: float = 2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_stale_entry_is_served_while_refreshing():
+    calls = 0
+    refreshing = threading.Event()
+    release = threading.Event()
+
+    @cache(ttl=TTL, stale_ttl=STALE_TTL)
+    def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            refreshing.set()
+            release.wait(2)
+        return calls
+
+    assert cached_function() == 1
+    time.sleep(TTL * 1.5)
+
+    start = time.monotonic()
+    assert cached_function() == 1
+    assert time.monotonic() - start < 0.05, "the stale entry should be served without waiting for the refresh"
+
+    assert refreshing.wait(2)
+    release.set()
+    _wait_for(lambda: cached_function() == 2)
+
+
+def test_concurrent_stale_hits_start_a_single_refresh():
+    calls = 0
+    barrier = threading.Barrier(10)
+
+    @cache(ttl=TTL, stale_ttl=STALE_TTL)
+    def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.1)
+        return calls
+
+    cached_function()
+    time.sleep(TTL * 1.5)
+
+    def call() -> int:
+        barrier.wait()
+        return cached_function()
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(lambda _: call(), range(10)))
+
+    assert results == [1] * 10
+    _wait_for(lambda: cached_function() == 2)
+    assert calls == 2
+
+
+def test_entry_past_the_stale_window_is_recomputed():
+    calls = 0
+
+    @cache(ttl=TTL, stale_ttl=TTL)
+    def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert cached_function() == 1
+    time.sleep(TTL * 2.5)
+    assert cached_function() == 2
+
+
+def test_failed_refresh_keeps_serving_the_stale_entry():
+    calls = 0
+
+    @cache(ttl=TTL, stale_ttl=STALE_TTL)
+    def cached_function() -> int:
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise ValueError
+        return calls
+
+    assert cached_function() == 1
+    time.sleep(TTL * 1.5)
+
+    assert cached_function() == 1
+    _wait_for(lambda: calls >= 2)
+    assert cached_function() == 1
+
+
+def test_never_die_and_stale_ttl_are_exclusive():
+    with pytest.raises(Exception, match="never_die or stale_ttl"):
+        cache(ttl=TTL, never_die=True, stale_ttl=STALE_TTL)
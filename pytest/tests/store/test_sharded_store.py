@@ -0,0 +1,130 @@
+import threading
+import time
+
+from caching import eviction_stats
+from caching.bucket import SHARDS, CacheBucket
+from caching.cache import cache
+from caching.expiry import ExpiryIndex
+from caching.utils.functions import get_function_id
+
+TTL = 60
+THREADS = 8
+
+
+def _run_threads(work):
+    threads = [threading.Thread(target=work, args=(offset,)) for offset in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_functions_have_their_own_shards():
+    @cache(ttl=TTL)
+    def first(arg: int) -> int:
+        return arg
+
+    @cache(ttl=TTL)
+    def second(arg: int) -> int:
+        return arg
+
+    for i in range(200):
+        first(i)
+        second(i)
+
+    namespace = CacheBucket._NAMESPACES[get_function_id(first)]
+    assert len(namespace) == 200
+    assert all(shard.entries for shard in namespace.shards), f"200 keys should spread over all {SHARDS} shards"
+
+    first.cache_clear()
+    assert len(namespace) == 0
+    assert second.cache_stats().entries == 200
+
+
+def test_concurrent_writes_reads_and_deletes():
+    errors = []
+
+    @cache(ttl=TTL, tags=lambda arg: [f"parity:{arg % 2}"])
+    def cached_function(arg: int) -> int:
+        return arg
+
+    def work(offset: int):
+        try:
+            for i in range(500):
+                arg = offset * 1000 + i
+                assert cached_function(arg) == arg
+                if i % 5 == 0:
+                    cached_function.invalidate(arg)
+        except Exception as exception:
+            errors.append(exception)
+
+    _run_threads(work)
+    assert errors == []
+    assert cached_function.cache_stats().entries == THREADS * 400
+    assert len(CacheBucket.tagged_keys(["parity:0", "parity:1"])) == THREADS * 400
+
+
+def test_bounded_functions_keep_their_bound_under_concurrent_writes():
+    @cache(ttl=TTL, max_entries=100)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    def work(offset: int):
+        for i in range(300):
+            cached_function(offset * 1000 + i)
+
+    _run_threads(work)
+    stats = eviction_stats()[get_function_id(cached_function)]
+    assert stats.size == cached_function.cache_stats().entries == 100
+    assert stats.evictions == THREADS * 300 - 100
+
+
+def test_expiry_index_wakes_up_for_earlier_deadlines_of_any_stripe():
+    index = ExpiryIndex(SHARDS)
+    index.push(time.monotonic() + TTL, "late", 0)
+    due = []
+    waiter = threading.Thread(target=lambda: due.extend(index.wait_for_due()))
+    waiter.start()
+
+    time.sleep(0.05)
+    index.push(time.monotonic() + 0.05, "early", SHARDS - 1)
+    waiter.join(1)
+    assert not waiter.is_alive()
+    assert [key for _, key in due] == ["early"]
+    assert len(index) == 1
+
+
+class _CountingLock:
+    def __init__(self, lock):
+        self.lock = lock
+        self.acquisitions = 0
+
+    def __enter__(self):
+        self.acquisitions += 1
+        return self.lock.__enter__()
+
+    def __exit__(self, *args):
+        return self.lock.__exit__(*args)
+
+
+def test_unbounded_functions_never_take_the_policy_lock(monkeypatch):
+    @cache(ttl=TTL, max_entries=10)
+    def bounded_function(arg: int) -> int:
+        return arg
+
+    @cache(ttl=TTL)
+    def unbounded_function(arg: int) -> int:
+        return arg
+
+    bounded_function(1)
+    lock = _CountingLock(CacheBucket._POLICY_LOCK)
+    monkeypatch.setattr(CacheBucket, "_POLICY_LOCK", lock)
+
+    for i in range(100):
+        unbounded_function(i)
+        unbounded_function(i)
+    unbounded_function.get_many([((i,), {}) for i in range(100)])
+    assert lock.acquisitions == 0
+
+    bounded_function(1)
+    assert lock.acquisitions > 0
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+from caching import Warmup, awarm_all
+from caching.cache import cache
+
+TTL = 60
+
+
+@pytest.mark.asyncio
+async def test_warm_fills_the_cache():
+    calls = []
+
+    @cache(ttl=TTL)
+    async def cached_function(a: int, b: int = 0) -> int:
+        calls.append((a, b))
+        return a + b
+
+    warmup = await cached_function.warm([1, 2, (3, 4)])
+    assert (warmup.total, warmup.succeeded, warmup.failed) == (3, 3, 0)
+    assert [await cached_function(1), await cached_function(2), await cached_function(3, 4)] == [1, 2, 7]
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_progress_can_be_polled_while_warming():
+    @cache(ttl=TTL)
+    async def cached_function(arg: int) -> int:
+        await asyncio.sleep(0.1 * arg)
+        if arg == 3:
+            raise ValueError("boom")
+        return arg
+
+    warmup = Warmup()
+    started = time.perf_counter()
+    task = asyncio.create_task(cached_function.warm(range(1, 5), concurrency=4, warmup=warmup))
+    await asyncio.sleep(0.15)
+    assert 0 < warmup.completed < 4 and not warmup.done()
+    assert await task is warmup
+    assert warmup.done() and (warmup.succeeded, warmup.failed) == (3, 1)
+    assert time.perf_counter() - started < 0.8
+
+
+@pytest.mark.asyncio
+async def test_awarm_all():
+    @cache(ttl=TTL)
+    async def first(arg: int) -> int:
+        return arg
+
+    @cache(ttl=TTL)
+    async def second(arg: int) -> int:
+        return -arg
+
+    warmup = await awarm_all({first: [1, 2], second: [3]})
+    assert (warmup.total, warmup.succeeded) == (3, 3)
+    assert second.cache_stats().misses == 1
+
+    @cache(ttl=TTL)
+    def sync_function(arg: int) -> int:
+        return arg
+
+    with pytest.raises(Exception, match="warm_all"):
+        await awarm_all({sync_function: [1]})
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+from caching import Warmup, warm_all
+from caching.cache import cache
+from caching.features.never_die import _NEVER_DIE_FUNCTION_KEYS
+from caching.utils.functions import get_function_id
+
+TTL = 60
+
+
+def test_warm_fills_the_cache():
+    calls = []
+
+    @cache(ttl=TTL)
+    def cached_function(a: int, b: int = 0) -> int:
+        calls.append((a, b))
+        return a + b
+
+    warmup = cached_function.warm([1, 2, (3, 4)])
+    assert (warmup.total, warmup.succeeded, warmup.failed) == (3, 3, 0)
+    assert warmup.done() and warmup.progress == 1.0
+
+    assert [cached_function(1), cached_function(2), cached_function(3, 4)] == [1, 2, 7]
+    assert len(calls) == 3
+    assert cached_function.cache_stats().hits == 3
+
+
+def test_warm_registers_never_die_calls():
+    @cache(ttl=TTL, never_die=True)
+    def cached_function(arg: int) -> int:
+        return arg
+
+    cached_function.warm(range(3))
+    assert len(_NEVER_DIE_FUNCTION_KEYS[get_function_id(cached_function)]) == 3
+    cached_function.cache_clear()
+
+
+def test_failures_are_reported_without_stopping_the_warmup():
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        if arg == 2:
+            raise ValueError("boom")
+        return arg
+
+    warmup = cached_function.warm(range(4))
+    assert (warmup.succeeded, warmup.failed) == (3, 1)
+    name, args, exception = warmup.failures[0]
+    assert name.endswith("cached_function") and args == (2,)
+    assert isinstance(exception, ValueError)
+
+
+def test_concurrency_is_limited():
+    running = peak = 0
+    lock = threading.Lock()
+
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return arg
+
+    started = time.perf_counter()
+    cached_function.warm(range(12), concurrency=4)
+    assert peak == 4
+    assert time.perf_counter() - started < 0.5
+
+
+def test_background_warmup_can_be_waited_on():
+    release = threading.Event()
+
+    @cache(ttl=TTL)
+    def cached_function(arg: int) -> int:
+        release.wait()
+        return arg
+
+    warmup = cached_function.warm(range(3), background=True)
+    assert not warmup.done()
+    assert not warmup.wait(0.05)
+    release.set()
+    assert warmup.wait(1)
+    assert warmup.succeeded == 3
+
+
+def test_warm_all_shares_one_warmup():
+    @cache(ttl=TTL)
+    def first(arg: int) -> int:
+        return arg
+
+    @cache(ttl=TTL)
+    def second(arg: str) -> str:
+        return arg
+
+    warmup = warm_all({first: [1, 2], second: ["a"]})
+    assert isinstance(warmup, Warmup)
+    assert (warmup.total, warmup.succeeded) == (3, 3)
+    assert first.cache_stats().misses == 2 and second.cache_stats().misses == 1
+
+
+def test_warm_all_rejects_async_functions():
+    @cache(ttl=TTL)
+    async def cached_function(arg: int) -> int:
+        return arg
+
+    with pytest.raises(Exception, match="awarm_all"):
+        warm_all({cached_function: [1]})